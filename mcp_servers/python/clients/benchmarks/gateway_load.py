@@ -0,0 +1,333 @@
+"""
+End-to-end load test of the gateway against local stubs, without any LLM key
+or SaaS backend.
+
+  * benchmarks/stubs/stub_llm_server.py answers as Azure OpenAI, OpenAI and
+    Gemini (router call, scripted tool calls, final text; SSE when streamed);
+  * benchmarks/stubs/stub_mcp_server.py serves the tool catalogs of
+    MCP-GSUITE, NOTION, QUICKBOOKS, DOCKERHUB, DATAROBOT and DART;
+  * run.py is started as a subprocess pointed at both through
+    MCP_SERVERS_CONFIG_FILE, OPENAI_BASE_URL, GEMINI_BASE_URL and
+    MCP_GATEWAY_BIND.
+
+Request bodies replay the shapes in postman_api_collections/ (client, input,
+prompt, chat_history); requests for servers that are not stubbed are sent to
+MCP-GSUITE. Each endpoint is driven at fixed concurrency levels and the
+report gives p50/p95/p99 latency, requests/sec, and the gateway process's
+CPU and peak RSS (read from /proc, so Linux only). Requests are spread over
+--tenants API keys (admission control keys tenants by API key); 429s from
+admission control are counted apart from errors.
+
+Run from mcp_servers/python/clients:
+
+    python -m benchmarks.gateway_load --levels 1,8,32 --requests 200 --llm-latency 0.2
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from benchmarks.stubs.catalogs import CATALOGS
+from benchmarks.stubs.stub_llm_server import StubScript, start_stub_llm
+
+CLIENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_ROOT = os.path.abspath(os.path.join(CLIENTS_DIR, "..", "..", ".."))
+POSTMAN_DIR = os.path.join(REPO_ROOT, "postman_api_collections")
+STUB_MCP_SERVER = os.path.join(CLIENTS_DIR, "benchmarks", "stubs", "stub_mcp_server.py")
+
+ENDPOINTS = {
+    "process_message": "/api/v1/mcp/process_message",
+    "process_message_stream": "/api/v1/mcp/process_message_stream",
+}
+
+_LINE_COMMENT_RE = re.compile(r"^\s*//.*$", re.MULTILINE)
+_TRAILING_COMMA_RE = re.compile(r",(\s*[}\]])")
+
+
+def _loads_lenient(raw: str) -> Optional[Dict[str, Any]]:
+    """Postman bodies keep commented-out blocks; drop // lines and the commas they leave behind."""
+    try:
+        return json.loads(_TRAILING_COMMA_RE.sub(r"\1", _LINE_COMMENT_RE.sub("", raw)))
+    except ValueError:
+        return None
+
+
+def load_request_shapes() -> List[Dict[str, Any]]:
+    shapes = []
+    for path in sorted(glob.glob(os.path.join(POSTMAN_DIR, "*_request.json"))):
+        with open(path) as f:
+            body = _loads_lenient(f.read())
+        if body:
+            shapes.append(body)
+
+    def walk(items):
+        for item in items:
+            if "item" in item:
+                walk(item["item"])
+                continue
+            body = _loads_lenient(item.get("request", {}).get("body", {}).get("raw", ""))
+            if body and "process_message" in json.dumps(item["request"].get("url")):
+                shapes.append(body)
+
+    collection = os.path.join(POSTMAN_DIR, "MCP.postman_collection.json")
+    if os.path.exists(collection):
+        with open(collection) as f:
+            walk(json.load(f).get("item", []))
+    return [shape for shape in shapes if shape.get("client_details", {}).get("input")]
+
+
+def to_stub_request(shape: Dict[str, Any], llm_url: str, client: Optional[str]) -> Dict[str, Any]:
+    """Keep the request's shape; point credentials, keys and endpoints at the stubs."""
+    servers = [server if server in CATALOGS else "MCP-GSUITE" for server in shape.get("selected_servers", [])] or ["MCP-GSUITE"]
+    details = dict(shape["client_details"])
+    details.update({
+        "api_key": "stub",
+        "endpoint": llm_url,
+        "deployment_id": details.get("deployment_id") or "stub-deployment",
+        "api_version": details.get("api_version") or "2024-02-01",
+        "chat_model": details.get("chat_model") or "stub-model",
+    })
+    return {
+        "selected_client": client or shape.get("selected_client", "MCP_CLIENT_OPENAI"),
+        "selected_servers": servers[:1],
+        "selected_server_credentials": {server: {"token": "stub"} for server in servers[:1]},
+        "client_details": details,
+    }
+
+
+class ProcessSampler:
+    """CPU seconds and peak RSS of one process, read from /proc."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.peak_rss = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def cpu_seconds(self) -> float:
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        except (OSError, IndexError, ValueError):
+            return 0.0
+
+    def rss_bytes(self) -> int:
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        return 0
+
+    async def _sample(self, interval: float):
+        while True:
+            self.peak_rss = max(self.peak_rss, self.rss_bytes())
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float = 0.2):
+        self.peak_rss = self.rss_bytes()
+        self._task = asyncio.create_task(self._sample(interval))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+async def send_one(session: aiohttp.ClientSession, url: str, body: Dict[str, Any], streaming: bool, tenant: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    first_event = None
+    ok = False
+    status = None
+    body = {**body, "client_details": {**body["client_details"], "api_key": f"stub-{tenant}"}}
+    try:
+        async with session.post(url, json=body) as response:
+            status = response.status
+            if status == 429:
+                pass
+            elif not streaming:
+                data = await response.json()
+                ok = response.status == 200 and bool(data.get("Status"))
+            else:
+                ok = response.status == 200
+                async for raw_line in response.content:
+                    line = raw_line.decode("utf-8").strip()
+                    if not line.startswith("data:"):
+                        continue
+                    if first_event is None:
+                        first_event = time.perf_counter() - started
+                    event = json.loads(line[5:])
+                    if event.get("StreamingStatus") == "ERROR" or "error" in event:
+                        ok = False
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        ok = False
+    return {"ok": ok, "status": status, "latency": time.perf_counter() - started, "first_event": first_event}
+
+
+async def run_level(base_url: str, endpoint: str, bodies: List[Dict[str, Any]], concurrency: int, total: int, tenants: int, sampler: ProcessSampler) -> Dict[str, Any]:
+    url = base_url + ENDPOINTS[endpoint]
+    streaming = endpoint.endswith("_stream")
+    results: List[Dict[str, Any]] = []
+    counter = iter(range(total))
+
+    async def worker(session: aiohttp.ClientSession):
+        for index in counter:
+            results.append(await send_one(session, url, bodies[index % len(bodies)], streaming, f"bench-{index % tenants}"))
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=300)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        cpu_before = sampler.cpu_seconds()
+        sampler.start()
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        await sampler.stop()
+        cpu = sampler.cpu_seconds() - cpu_before
+
+    latencies = [r["latency"] for r in results if r["ok"]]
+    first_events = [r["first_event"] for r in results if r["ok"] and r["first_event"] is not None]
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": len(results),
+        "errors": sum(1 for r in results if not r["ok"] and r["status"] != 429),
+        "rejected": sum(1 for r in results if r["status"] == 429),
+        "rps": len(results) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "first_event_p50": percentile(first_events, 50) if streaming else None,
+        "cpu_percent": 100 * cpu / elapsed if elapsed else 0.0,
+        "peak_rss_mb": sampler.peak_rss / (1024 * 1024),
+    }
+
+
+async def wait_until_ready(base_url: str, servers: List[str], gateway: subprocess.Popen, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            if gateway.poll() is not None:
+                return False
+            try:
+                async with session.get(base_url + "/api/v1/mcp/servers/status") as response:
+                    status = (await response.json()).get("Data") or {}
+                    if all(status.get(server, {}).get("status") == "ready" for server in servers):
+                        return True
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.5)
+    return False
+
+
+def start_gateway(args, llm_url: str, servers_file: str, log_file) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        "MCP_SERVERS_CONFIG_FILE": servers_file,
+        "OPENAI_BASE_URL": f"{llm_url}/v1",
+        "GEMINI_BASE_URL": f"{llm_url}/v1beta",
+        "MCP_GATEWAY_BIND": f"127.0.0.1:{args.gateway_port}",
+    })
+    return subprocess.Popen([sys.executable, "run.py"], cwd=CLIENTS_DIR, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+
+
+def print_report(rows: List[Dict[str, Any]]):
+    print(f"{'endpoint':<24} {'conc':>5} {'reqs':>6} {'errs':>5} {'429':>5} {'req/s':>8} {'p50 (s)':>8} {'p95 (s)':>8} {'p99 (s)':>8} {'1st ev':>8} {'cpu %':>7} {'rss MB':>8}")
+    for row in rows:
+        first_event = f"{row['first_event_p50']:.3f}" if row["first_event_p50"] is not None else "-"
+        print(
+            f"{row['endpoint']:<24} {row['concurrency']:>5} {row['requests']:>6} {row['errors']:>5} {row['rejected']:>5} {row['rps']:>8.1f} "
+            f"{row['p50']:>8.3f} {row['p95']:>8.3f} {row['p99']:>8.3f} {first_event:>8} {row['cpu_percent']:>7.1f} {row['peak_rss_mb']:>8.1f}"
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=str, default="1,8,32", help="concurrency levels")
+    parser.add_argument("--requests", type=int, default=100, help="requests per endpoint and level")
+    parser.add_argument("--endpoints", type=str, default=",".join(ENDPOINTS))
+    parser.add_argument("--tenants", type=int, default=16, help="API keys the requests are spread over (admission control tenants)")
+    parser.add_argument("--client", choices=["MCP_CLIENT_AZURE_AI", "MCP_CLIENT_OPENAI", "MCP_CLIENT_GEMINI"], help="override the client of every replayed request")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds before each stub LLM answer")
+    parser.add_argument("--tool-rounds", type=int, default=1)
+    parser.add_argument("--tool-latency", type=float, default=0.02, help="seconds per stub tool call")
+    parser.add_argument("--result-bytes", type=int, default=2000, help="size of each stub tool result")
+    parser.add_argument("--llm-port", type=int, default=8600)
+    parser.add_argument("--gateway-port", type=int, default=5101)
+    parser.add_argument("--startup-timeout", type=float, default=120)
+    parser.add_argument("--json", type=str, help="also write the report rows to this file")
+    args = parser.parse_args()
+
+    llm_url = f"http://127.0.0.1:{args.llm_port}"
+    base_url = f"http://127.0.0.1:{args.gateway_port}"
+    bodies = [to_stub_request(shape, llm_url, args.client) for shape in load_request_shapes()]
+    if not bodies:
+        sys.exit(f"No request shapes found in {POSTMAN_DIR}")
+    servers = sorted({body["selected_servers"][0] for body in bodies})
+
+    servers_config = [
+        {
+            "server_name": name,
+            "command": sys.executable,
+            "args": [STUB_MCP_SERVER, "--server", name, "--latency", str(args.tool_latency), "--result-bytes", str(args.result_bytes)],
+        }
+        for name in CATALOGS
+    ]
+    llm_runner = await start_stub_llm("127.0.0.1", args.llm_port, StubScript(args.llm_latency, args.tool_rounds))
+    with tempfile.TemporaryDirectory() as workdir:
+        servers_file = os.path.join(workdir, "servers.json")
+        with open(servers_file, "w") as f:
+            json.dump(servers_config, f)
+        log_path = os.path.join(workdir, "gateway.log")
+        with open(log_path, "w") as log_file:
+            gateway = start_gateway(args, llm_url, servers_file, log_file)
+            try:
+                if not await wait_until_ready(base_url, servers, gateway, args.startup_timeout):
+                    with open(log_path) as f:
+                        print(f.read()[-4000:])
+                    sys.exit("Gateway did not become ready")
+
+                print(f"{len(bodies)} request shapes from {POSTMAN_DIR} on {', '.join(servers)}")
+                print(f"stub LLM latency {args.llm_latency}s, {args.tool_rounds} tool round(s), tool latency {args.tool_latency}s, result {args.result_bytes} bytes")
+                sampler = ProcessSampler(gateway.pid)
+                rows = []
+                for endpoint in args.endpoints.split(","):
+                    for level in [int(x) for x in args.levels.split(",")]:
+                        rows.append(await run_level(base_url, endpoint, bodies, level, args.requests, args.tenants, sampler))
+                print_report(rows)
+                if args.json:
+                    with open(args.json, "w") as f:
+                        json.dump(rows, f, indent=2)
+            finally:
+                gateway.terminate()
+                try:
+                    gateway.wait(timeout=15)
+                except subprocess.TimeoutExpired:
+                    gateway.kill()
+                await llm_runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""
+Throughput of the LLM processors under concurrency, against a local stub LLM.
+
+The stub answers every chat completion after a fixed delay, so with a
+non-blocking HTTP engine throughput should grow with the number of concurrent
+requests instead of staying flat at 1 / latency.
+
+Run from mcp_servers/python/clients:
+
+    python -m benchmarks.llm_http_concurrency --latency 0.2 --requests 64
+"""
+import argparse
+import asyncio
+import time
+
+from aiohttp import web
+
+from src.llm.azureopenai import azure_openai_processor
+from src.llm.http_client import close_all_sessions
+
+STUB_RESPONSE = {
+    "id": "chatcmpl-stub",
+    "object": "chat.completion",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "pong"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 12, "completion_tokens": 1, "total_tokens": 13},
+}
+
+
+async def start_stub_llm(port: int, latency: float) -> web.AppRunner:
+    async def chat_completions(request: web.Request) -> web.Response:
+        await request.read()
+        await asyncio.sleep(latency)
+        return web.json_response(STUB_RESPONSE)
+
+    app = web.Application()
+    app.router.add_post("/openai/deployments/{deployment}/chat/completions", chat_completions)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+async def run_level(endpoint: str, concurrency: int, total_requests: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    request = {
+        "api_key": "stub",
+        "endpoint": endpoint,
+        "deployment_id": "stub",
+        "api_version": "2024-02-01",
+        "prompt": "you are a helpful assistant",
+        "chat_history": [{"role": "user", "content": "ping"}],
+    }
+
+    async def one_call():
+        async with semaphore:
+            response = await azure_openai_processor(dict(request))
+            if not response.Status:
+                raise RuntimeError(response.Error)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_call() for _ in range(total_requests)))
+    return time.perf_counter() - started
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub LLM latency in seconds")
+    parser.add_argument("--requests", type=int, default=64, help="requests per concurrency level")
+    parser.add_argument("--levels", type=str, default="1,2,4,8,16,32")
+    args = parser.parse_args()
+
+    runner = await start_stub_llm(args.port, args.latency)
+    endpoint = f"http://127.0.0.1:{args.port}"
+    try:
+        print(f"stub latency: {args.latency:.3f}s, requests per level: {args.requests}")
+        print(f"{'concurrency':>12} {'elapsed (s)':>12} {'req/s':>10}")
+        for level in [int(x) for x in args.levels.split(",")]:
+            elapsed = await run_level(endpoint, level, args.requests)
+            print(f"{level:>12} {elapsed:>12.3f} {args.requests / elapsed:>10.1f}")
+    finally:
+        await close_all_sessions()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
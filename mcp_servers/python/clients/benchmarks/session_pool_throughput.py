@@ -0,0 +1,56 @@
+"""
+Per-server tool throughput as a function of the MCP session pool size.
+
+Each stub server process blocks for --work seconds per call, so a single
+session serializes every call; throughput should grow roughly linearly with
+pool_size.
+
+Run from mcp_servers/python/clients:
+
+    python -m benchmarks.session_pool_throughput --sizes 1,2,4 --calls 40
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+from src.client_and_server_config import MCPSessionPoolConfig
+from src.session_pool import MCPSessionPool
+
+STUB_SERVER = os.path.join(os.path.dirname(__file__), "stubs", "blocking_mcp_server.py")
+
+
+async def run_pool(size: int, calls: int, work: float) -> float:
+    server = {
+        "server_name": "BLOCKING_STUB",
+        "command": sys.executable,
+        "args": [STUB_SERVER],
+        "pool_size": size,
+        "max_in_flight_per_session": 1,
+    }
+    pool = MCPSessionPool(server, MCPSessionPoolConfig)
+    await pool.start()
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(pool.call_tool("blocking_work", {"seconds": work}) for _ in range(calls)))
+        return time.perf_counter() - started
+    finally:
+        await pool.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=str, default="1,2,4")
+    parser.add_argument("--calls", type=int, default=40)
+    parser.add_argument("--work", type=float, default=0.05, help="seconds each call blocks the server")
+    args = parser.parse_args()
+
+    print(f"{'pool_size':>10} {'elapsed (s)':>12} {'calls/s':>10}")
+    for size in [int(x) for x in args.sizes.split(",")]:
+        elapsed = await run_pool(size, args.calls, args.work)
+        print(f"{size:>10} {elapsed:>12.3f} {args.calls / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
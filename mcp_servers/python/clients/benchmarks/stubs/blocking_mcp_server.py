@@ -0,0 +1,20 @@
+"""
+Stub MCP stdio server whose tool blocks its event loop, like the synchronous
+Google client calls in MCP-GSUITE. Used by benchmarks/session_pool_throughput.py.
+"""
+import time
+
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("Blocking-Stub-MCP", log_level="WARNING")
+
+
+@mcp.tool()
+def blocking_work(seconds: float = 0.1) -> str:
+    """Block the server for `seconds` and return."""
+    time.sleep(seconds)
+    return "done"
+
+
+if __name__ == "__main__":
+    mcp.run(transport="stdio")
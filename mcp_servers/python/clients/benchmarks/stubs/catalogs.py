@@ -0,0 +1,113 @@
+"""
+Tool catalogs served by benchmarks/stubs/stub_mcp_server.py. Names,
+descriptions and parameters mirror the real servers under
+mcp_servers/python/servers closely enough for routing, schema conversion and
+prompt sizes to behave as in production.
+"""
+from typing import Any, Dict, List
+
+
+def tool(name: str, description: str, required: List[str] = (), /, **properties: str) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "description": description,
+        "inputSchema": {
+            "type": "object",
+            "properties": {key: {"type": kind, "description": key.replace("_", " ")} for key, kind in properties.items()},
+            "required": list(required),
+        },
+    }
+
+
+CATALOGS: Dict[str, List[Dict[str, Any]]] = {
+    "MCP-GSUITE": [
+        tool("query_gmail_emails", "Query Gmail emails based on an optional search query. Returns emails in reverse chronological order.", query="string", max_results="integer"),
+        tool("get_gmail_email", "Retrieve a complete Gmail email message by its ID, including the full body and attachment IDs.", ["email_id"], email_id="string"),
+        tool("bulk_get_gmail_emails", "Retrieve multiple Gmail email messages by their IDs in a single request.", ["email_ids"], email_ids="array"),
+        tool("create_gmail_draft", "Create a draft email message from scratch in Gmail.", ["to", "subject", "body"], to="string", subject="string", body="string", cc="array"),
+        tool("delete_gmail_draft", "Delete a Gmail draft message by its ID.", ["draft_id"], draft_id="string"),
+        tool("reply_gmail_email", "Create a reply to an existing Gmail email message, either sent or saved as draft.", ["original_message_id", "reply_body"], original_message_id="string", reply_body="string", send="boolean"),
+        tool("send_gmail_email", "Send an email message via Gmail.", ["to", "subject", "body"], to="string", subject="string", body="string"),
+        tool("get_gmail_attachment", "Retrieve and save a Gmail attachment to a local file.", ["message_id", "attachment_id", "save_to_disk"], message_id="string", attachment_id="string", mime_type="string", filename="string", save_to_disk="string"),
+        tool("bulk_save_gmail_attachments", "Save multiple Gmail attachments to disk.", ["attachments"], attachments="array"),
+        tool("get_calendar_events", "Retrieve calendar events within a specified time range from Google Calendar.", time_min="string", time_max="string", max_results="integer", calendar_id="string"),
+        tool("create_calendar_event", "Create a new event in Google Calendar.", ["summary", "start_time", "end_time"], summary="string", start_time="string", end_time="string", location="string", description="string", attendees="array"),
+        tool("delete_calendar_event", "Delete a calendar event from Google Calendar by its event ID.", ["event_id"], event_id="string", send_notifications="boolean"),
+    ],
+    "DOCKERHUB": [
+        tool("list_my_repositories", "List the repositories of the authenticated Docker Hub user."),
+        tool("list_repositories", "List the repositories of a Docker Hub namespace.", ["namespace"], namespace="string"),
+        tool("list_tags", "List the tags of a Docker Hub repository.", ["namespace", "repository"], namespace="string", repository="string"),
+        tool("search_repositories", "Search public Docker Hub repositories.", ["query"], query="string"),
+        tool("get_repository_info", "Get the details of a Docker Hub repository.", ["namespace", "repository"], namespace="string", repository="string"),
+        tool("list_collaborators", "List the collaborators of a Docker Hub repository.", ["namespace", "repository"], namespace="string", repository="string"),
+        tool("get_user_info", "Get the profile of a Docker Hub user.", ["username"], username="string"),
+    ],
+    "DATAROBOT": [
+        tool("create_project", "Create a DataRobot project from a dataset.", ["dataset_path", "project_name"], dataset_path="string", project_name="string"),
+        tool("set_target_and_start_training", "Set the target of a project and start Autopilot training.", ["project_id", "target"], project_id="string", target="string"),
+        tool("get_status_of_project", "Get the status of a DataRobot project.", ["project_id"], project_id="string"),
+        tool("get_modeling_jobs", "List the modeling jobs of a project.", ["project_id"], project_id="string"),
+        tool("list_models", "List the models trained in a project.", ["project_id"], project_id="string"),
+        tool("select_best_model", "Select the best model of a project by its validation metric.", ["project_id"], project_id="string"),
+        tool("delete_project", "Delete a DataRobot project.", ["project_id"], project_id="string"),
+        tool("delete_deployment", "Delete a DataRobot deployment.", ["deployment_id"], deployment_id="string"),
+        tool("list_projects", "List the DataRobot projects of the user."),
+        tool("list_deployments", "List the DataRobot deployments of the user."),
+        tool("get_deployment_metrics", "Get the service health metrics of a deployment.", ["deployment_id"], deployment_id="string"),
+        tool("get_deployment_summary", "Get a summary of a deployment.", ["deployment_id"], deployment_id="string"),
+    ],
+    "NOTION": [
+        tool("search", "Search Notion pages and databases by title.", query="string"),
+        tool("retrieve_page", "Retrieve a Notion page by its ID.", ["page_id"], page_id="string"),
+        tool("retrieve_page_blocks", "Retrieve the content blocks of a Notion page.", ["page_id"], page_id="string"),
+        tool("create_page", "Create a Notion page under a parent page or database.", ["parent_id", "title"], parent_id="string", title="string", content="string"),
+        tool("update_page", "Update the properties of a Notion page.", ["page_id", "properties"], page_id="string", properties="object"),
+        tool("archive_page", "Archive a Notion page.", ["page_id"], page_id="string"),
+        tool("append_blocks", "Append content blocks to a Notion page.", ["page_id", "content"], page_id="string", content="string"),
+        tool("update_block", "Update the content of a Notion block.", ["block_id", "content"], block_id="string", content="string"),
+        tool("delete_block", "Delete a Notion block.", ["block_id"], block_id="string"),
+        tool("retrieve_database", "Retrieve a Notion database schema.", ["database_id"], database_id="string"),
+        tool("query_database", "Query the rows of a Notion database.", ["database_id"], database_id="string", filter="object"),
+        tool("create_database", "Create a Notion database under a parent page.", ["parent_id", "title"], parent_id="string", title="string", properties="object"),
+        tool("assign_user_property", "Assign a user to a people property of a Notion page.", ["page_id", "property_name", "user_id"], page_id="string", property_name="string", user_id="string"),
+    ],
+    "QUICKBOOKS": [
+        tool("get_quickbooks_customers", "Fetch customers from QuickBooks.", max_results="integer"),
+        tool("get_quickbooks_customer_by_id", "Fetch one QuickBooks customer by ID.", ["customer_id"], customer_id="string"),
+        tool("create_quickbooks_customer", "Create a QuickBooks customer.", ["display_name"], display_name="string", email="string"),
+        tool("update_quickbooks_customer", "Update a QuickBooks customer.", ["customer_id"], customer_id="string", display_name="string", email="string"),
+        tool("deactivate_quickbooks_customer", "Deactivate a QuickBooks customer.", ["customer_id"], customer_id="string"),
+        tool("get_quickbooks_invoices", "Fetch invoices from QuickBooks.", max_results="integer"),
+        tool("create_quickbooks_invoice", "Create a QuickBooks invoice.", ["customer_id", "amount"], customer_id="string", amount="number", description="string"),
+        tool("update_quickbooks_invoice", "Update a QuickBooks invoice.", ["invoice_id"], invoice_id="string", amount="number"),
+        tool("delete_quickbooks_invoice", "Delete a QuickBooks invoice.", ["invoice_id"], invoice_id="string"),
+        tool("get_quickbooks_accounts", "Fetch accounts from QuickBooks.", max_results="integer"),
+        tool("create_quickbooks_account", "Create a QuickBooks account.", ["name", "account_type"], name="string", account_type="string"),
+        tool("update_quickbooks_account", "Update a QuickBooks account.", ["account_id"], account_id="string", name="string"),
+        tool("deactivate_quickbooks_account", "Deactivate a QuickBooks account.", ["account_id"], account_id="string"),
+        tool("get_quickbooks_purchases", "Fetch purchases from QuickBooks.", max_results="integer"),
+        tool("create_quickbooks_purchase", "Create a QuickBooks purchase.", ["account_id", "amount"], account_id="string", amount="number"),
+        tool("update_quickbooks_purchase", "Update a QuickBooks purchase.", ["purchase_id"], purchase_id="string", amount="number"),
+        tool("delete_quickbooks_purchase", "Delete a QuickBooks purchase.", ["purchase_id"], purchase_id="string"),
+        tool("create_quickbooks_vendor", "Create a QuickBooks vendor.", ["display_name"], display_name="string"),
+    ],
+    "DART": [
+        tool("get_config", "Get the Dart workspace configuration: assignees, dartboards, statuses and tags."),
+        tool("list_tasks", "List Dart tasks, optionally filtered by dartboard, status or assignee.", dartboard="string", status="string", assignee="string"),
+        tool("get_task", "Get a Dart task by its ID.", ["task_id"], task_id="string"),
+        tool("create_task", "Create a Dart task.", ["title"], title="string", dartboard="string", description="string"),
+        tool("update_task", "Update a Dart task.", ["task_id"], task_id="string", title="string", status="string"),
+        tool("delete_task", "Move a Dart task to the trash.", ["task_id"], task_id="string"),
+        tool("list_comments", "List the comments of a Dart task.", ["task_id"], task_id="string"),
+        tool("create_comment", "Create a comment on a Dart task.", ["task_id", "text"], task_id="string", text="string"),
+        tool("list_docs", "List Dart docs, optionally filtered by folder.", folder="string"),
+        tool("get_doc", "Get a Dart doc by its ID.", ["doc_id"], doc_id="string"),
+        tool("create_doc", "Create a Dart doc.", ["title"], title="string", text="string", folder="string"),
+        tool("update_doc", "Update a Dart doc.", ["doc_id"], doc_id="string", title="string", text="string"),
+        tool("delete_doc", "Move a Dart doc to the trash.", ["doc_id"], doc_id="string"),
+        tool("get_dartboard", "Get a Dart dartboard by its ID.", ["dartboard_id"], dartboard_id="string"),
+        tool("get_folder", "Get a Dart folder by its ID.", ["folder_id"], folder_id="string"),
+        tool("get_view", "Get a Dart view by its ID.", ["view_id"], view_id="string"),
+    ],
+}
@@ -0,0 +1,215 @@
+"""
+Stub LLM HTTP server speaking the Azure OpenAI, OpenAI and Gemini APIs used
+by src/llm, with scripted answers and configurable latency.
+
+Every conversation follows the gateway's two-stage flow:
+
+  * router call (no tools, router prompt): selects the tool whose name best
+    matches the user input;
+  * tool-calling calls: call that tool --tool-rounds times, filling the
+    required arguments from its schema, then answer with text.
+
+Streaming requests ("stream": true, or :streamGenerateContent) are answered
+as SSE with --chunks content deltas, one every --chunk-delay seconds.
+Used by benchmarks/gateway_load.py; it can also be started on its own:
+
+    python -m benchmarks.stubs.stub_llm_server --port 8600 --latency 0.2
+"""
+import argparse
+import asyncio
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+_TOOL_NAME_RE = re.compile(r'"function_name":\s*"([^"]+)"')
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_SAMPLE_VALUES = {"string": "stub", "integer": 1, "number": 1, "boolean": False, "array": [], "object": {}}
+
+FINAL_ANSWER = "Here is a summary of the results returned by the tool for your request."
+
+
+class StubScript:
+    def __init__(self, latency: float = 0.2, tool_rounds: int = 1, chunks: int = 8, chunk_delay: float = 0.01):
+        self.latency = latency
+        self.tool_rounds = tool_rounds
+        self.chunks = chunks
+        self.chunk_delay = chunk_delay
+        self.requests = 0
+
+    @staticmethod
+    def best_tool(user_input: str, tool_names: List[str]) -> Optional[str]:
+        if not tool_names:
+            return None
+        words = set(_WORD_RE.findall(user_input.lower()))
+        return max(tool_names, key=lambda name: len(words & set(name.split("_"))))
+
+    def answer(self, system: str, texts: List[str], tools: List[Dict[str, Any]]) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Return (text, tool_call) for one request; tool_call is {"name", "arguments"}."""
+        user_input = next((text for text in reversed(texts) if not text.startswith("Executed tool:")), "")
+        if not tools:
+            router_tools = _TOOL_NAME_RE.findall(system)
+            if "<function_call>" in system and router_tools:
+                selected = self.best_tool(user_input, router_tools)
+                return f"<function_call>TRUE</function_call>\n<selected_tools>{selected}</selected_tools>", None
+            return FINAL_ANSWER, None
+
+        executed = sum(1 for text in texts if text.startswith("Executed tool:"))
+        if executed >= self.tool_rounds:
+            return FINAL_ANSWER, None
+        by_name = {tool["name"]: tool for tool in tools}
+        tool = by_name[self.best_tool(user_input, list(by_name))]
+        parameters = tool.get("parameters") or {}
+        properties = parameters.get("properties", {})
+        arguments = {
+            key: _SAMPLE_VALUES.get(properties.get(key, {}).get("type", "string"), "stub")
+            for key in parameters.get("required", [])
+        }
+        return None, {"name": tool["name"], "arguments": arguments}
+
+    def text_chunks(self, text: str) -> List[str]:
+        words = text.split(" ")
+        size = max(1, -(-len(words) // self.chunks))
+        return [" ".join(words[i:i + size]) + (" " if i + size < len(words) else "") for i in range(0, len(words), size)]
+
+
+def _usage(prompt: str, completion: str) -> Tuple[int, int]:
+    return max(1, len(prompt) // 4), max(1, len(completion) // 4)
+
+
+async def _sse(request: web.Request) -> web.StreamResponse:
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+    await response.prepare(request)
+    return response
+
+
+async def chat_completions(request: web.Request) -> web.StreamResponse:
+    script: StubScript = request.app["script"]
+    script.requests += 1
+    payload = await request.json()
+    messages = payload.get("messages", [])
+    system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+    texts = [m.get("content") or "" for m in messages if m.get("role") != "system"]
+    tools = [tool["function"] for tool in payload.get("tools") or []]
+    text, tool_call = script.answer(system, texts, tools)
+    prompt_tokens, completion_tokens = _usage(json.dumps(payload), text or json.dumps(tool_call))
+    usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+    tool_calls = None
+    if tool_call:
+        tool_calls = [{"id": f"call_{script.requests}", "type": "function", "function": {"name": tool_call["name"], "arguments": json.dumps(tool_call["arguments"])}}]
+
+    await asyncio.sleep(script.latency)
+    if not payload.get("stream"):
+        message = {"role": "assistant", "content": text}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        return web.json_response({
+            "id": f"chatcmpl-stub-{script.requests}",
+            "object": "chat.completion",
+            "model": payload.get("model", "stub"),
+            "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_calls else "stop"}],
+            "usage": usage,
+        })
+
+    response = await _sse(request)
+
+    async def send(delta: Dict[str, Any], finish_reason: Optional[str] = None):
+        chunk = {"id": f"chatcmpl-stub-{script.requests}", "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+        await response.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+
+    await send({"role": "assistant", "content": ""})
+    if tool_calls:
+        arguments = tool_calls[0]["function"]["arguments"]
+        half = len(arguments) // 2
+        await send({"tool_calls": [{"index": 0, "id": tool_calls[0]["id"], "type": "function", "function": {"name": tool_call["name"], "arguments": arguments[:half]}}]})
+        await send({"tool_calls": [{"index": 0, "function": {"arguments": arguments[half:]}}]}, "tool_calls")
+    else:
+        for piece in script.text_chunks(text):
+            await asyncio.sleep(script.chunk_delay)
+            await send({"content": piece})
+        await send({}, "stop")
+    if (payload.get("stream_options") or {}).get("include_usage"):
+        await response.write(f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n".encode("utf-8"))
+    await response.write(b"data: [DONE]\n\n")
+    await response.write_eof()
+    return response
+
+
+async def gemini_generate(request: web.Request) -> web.StreamResponse:
+    script: StubScript = request.app["script"]
+    script.requests += 1
+    payload = await request.json()
+    streaming = request.match_info["model_action"].endswith(":streamGenerateContent")
+    system = " ".join(part.get("text", "") for part in (payload.get("system_instruction") or {}).get("parts", []))
+    texts = [part.get("text", "") for content in payload.get("contents", []) for part in content.get("parts", [])]
+    tools = [decl for group in payload.get("tools") or [] for decl in group.get("functionDeclarations", [])]
+    text, tool_call = script.answer(system, texts, tools)
+    prompt_tokens, completion_tokens = _usage(json.dumps(payload), text or json.dumps(tool_call))
+    usage = {"promptTokenCount": prompt_tokens, "candidatesTokenCount": completion_tokens, "totalTokenCount": prompt_tokens + completion_tokens}
+
+    def candidate(parts: List[Dict[str, Any]], finish: Optional[str] = None) -> Dict[str, Any]:
+        entry = {"content": {"role": "model", "parts": parts}}
+        if finish:
+            entry["finishReason"] = finish
+        return {"candidates": [entry]}
+
+    await asyncio.sleep(script.latency)
+    if tool_call:
+        parts = [{"functionCall": {"name": tool_call["name"], "args": tool_call["arguments"]}}]
+    else:
+        parts = [{"text": text}]
+    if not streaming:
+        return web.json_response({**candidate(parts, "STOP"), "usageMetadata": usage})
+
+    response = await _sse(request)
+    pieces = [parts] if tool_call else [[{"text": piece}] for piece in script.text_chunks(text)]
+    for index, piece in enumerate(pieces):
+        await asyncio.sleep(script.chunk_delay)
+        event = candidate(piece, "STOP" if index == len(pieces) - 1 else None)
+        if index == len(pieces) - 1:
+            event["usageMetadata"] = usage
+        await response.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+    await response.write_eof()
+    return response
+
+
+def build_app(script: StubScript) -> web.Application:
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app["script"] = script
+    app.router.add_post("/openai/deployments/{deployment}/chat/completions", chat_completions)  # Azure OpenAI
+    app.router.add_post("/v1/chat/completions", chat_completions)                               # OpenAI
+    app.router.add_post("/v1beta/models/{model_action}", gemini_generate)                       # Gemini
+    return app
+
+
+async def start_stub_llm(host: str, port: int, script: StubScript) -> web.AppRunner:
+    runner = web.AppRunner(build_app(script), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before each answer starts")
+    parser.add_argument("--tool-rounds", type=int, default=1, help="tool-calling turns before the text answer")
+    parser.add_argument("--chunks", type=int, default=8, help="content deltas of a streamed text answer")
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="seconds between two streamed deltas")
+    args = parser.parse_args()
+
+    runner = await start_stub_llm(args.host, args.port, StubScript(args.latency, args.tool_rounds, args.chunks, args.chunk_delay))
+    print(f"Stub LLM listening on http://{args.host}:{args.port}")
+    print(f"  OPENAI_BASE_URL=http://{args.host}:{args.port}/v1")
+    print(f"  GEMINI_BASE_URL=http://{args.host}:{args.port}/v1beta")
+    print(f"  Azure endpoint: http://{args.host}:{args.port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
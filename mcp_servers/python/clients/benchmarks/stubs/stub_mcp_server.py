@@ -0,0 +1,62 @@
+"""
+Stub MCP stdio server serving the tool catalog of one real server (see
+catalogs.py). Every call waits --latency seconds and returns a JSON list of
+records of about --result-bytes bytes. Used by benchmarks/gateway_load.py.
+
+    python benchmarks/stubs/stub_mcp_server.py --server NOTION --latency 0.05
+"""
+import argparse
+import asyncio
+import json
+from typing import Any, Dict, List
+
+import mcp.types as types
+from mcp.server.lowlevel import Server
+from mcp.server.stdio import stdio_server
+
+from catalogs import CATALOGS
+
+
+def build_result(tool_name: str, result_bytes: int) -> str:
+    records: List[Dict[str, Any]] = []
+    size = 2
+    while size < result_bytes:
+        record = {
+            "id": f"{tool_name}-{len(records)}",
+            "name": f"Stub record {len(records)}",
+            "created": "2025-06-15T05:32:49Z",
+            "description": "Generated by the stub MCP server for gateway benchmarks.",
+        }
+        records.append(record)
+        size += len(json.dumps(record)) + 2
+    return json.dumps({"tool": tool_name, "items": records})
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", required=True, choices=sorted(CATALOGS))
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds each tool call takes")
+    parser.add_argument("--result-bytes", type=int, default=2000, help="approximate size of each tool result")
+    args = parser.parse_args()
+
+    catalog = CATALOGS[args.server]
+    results = {entry["name"]: build_result(entry["name"], args.result_bytes) for entry in catalog}
+    server = Server(f"stub-{args.server.lower()}")
+
+    @server.list_tools()
+    async def list_tools() -> List[types.Tool]:
+        return [types.Tool(**entry) for entry in catalog]
+
+    @server.call_tool()
+    async def call_tool(name: str, arguments: Dict[str, Any]) -> List[types.TextContent]:
+        if name not in results:
+            raise ValueError(f"Unknown tool: {name}")
+        await asyncio.sleep(args.latency)
+        return [types.TextContent(type="text", text=results[name])]
+
+    async with stdio_server() as (read_stream, write_stream):
+        await server.run(read_stream, write_stream, server.create_initialization_options())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
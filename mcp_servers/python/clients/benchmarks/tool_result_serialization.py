@@ -0,0 +1,97 @@
+"""
+Cost of turning one large MCP CallToolResult into the JSON the gateway sends
+to the response, the stream notification and the chat history.
+
+  legacy : json round-trip through __dict__, then json.dumps again for the
+           notification and for the chat history (three encodes, one parse)
+  typed  : ToolResult.from_mcp once, encoded once (orjson when installed) and
+           the cached string reused by every consumer
+
+The payload mimics query_gmail_emails: --messages parsed Gmail messages,
+either as one JSON text block or one text block per message (FastMCP list
+returns).
+
+Run from mcp_servers/python/clients:
+
+    python -m benchmarks.tool_result_serialization --messages 500 --iterations 20
+"""
+import argparse
+import json
+import time
+
+from mcp.types import CallToolResult, TextContent
+
+from src import tool_result
+from src.tool_result import ToolResult
+
+
+def gmail_message(i: int) -> dict:
+    return {
+        "id": f"18c{i:013x}",
+        "threadId": f"18c{i // 3:013x}",
+        "historyId": str(9000000 + i),
+        "snippet": "Hi team, following up on the quarterly planning notes from yesterday's sync " * 2,
+        "subject": f"Re: Quarterly planning #{i}",
+        "from": "Alice Example <alice@example.com>",
+        "to": "team@example.com",
+        "cc": "bob@example.com, carol@example.com",
+        "date": "Tue, 14 May 2024 09:12:44 +0000",
+        "message_id": f"<CAF{i}@mail.example.com>",
+        "labelIds": ["INBOX", "IMPORTANT", "CATEGORY_UPDATES"],
+        "body": ("Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 40),
+        "attachments": {
+            "2": {"filename": f"notes-{i}.pdf", "mimeType": "application/pdf", "attachmentId": f"ANGjdJ{i:020d}", "partId": "2"}
+        },
+    }
+
+
+def build_result(messages: int, per_message_blocks: bool) -> CallToolResult:
+    data = [gmail_message(i) for i in range(messages)]
+    if per_message_blocks:
+        content = [TextContent(type="text", text=json.dumps(message)) for message in data]
+    else:
+        content = [TextContent(type="text", text=json.dumps(data))]
+    return CallToolResult(content=content, isError=False)
+
+
+def legacy(raw_result: CallToolResult) -> int:
+    serialized = json.loads(json.dumps(raw_result, default=lambda o: getattr(o, "__dict__", str(o))))
+    notification = json.dumps(serialized)
+    history = json.dumps(serialized)
+    return len(notification) + len(history)
+
+
+def typed(raw_result: CallToolResult) -> int:
+    result = ToolResult.from_mcp(raw_result)
+    notification = result.encoded()
+    history = result.encoded()
+    return len(notification) + len(history)
+
+
+def measure(fn, raw_result: CallToolResult, iterations: int) -> float:
+    fn(raw_result)  # warm-up
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn(raw_result)
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"encoder: {'orjson' if tool_result.orjson is not None else 'json (stdlib)'}")
+    print(f"{'payload':>22} {'size (KB)':>10} {'legacy (ms)':>12} {'typed (ms)':>11} {'speed-up':>9}")
+    for per_message_blocks in (False, True):
+        raw_result = build_result(args.messages, per_message_blocks)
+        size_kb = len(ToolResult.from_mcp(raw_result).encoded()) / 1024
+        legacy_ms = measure(legacy, raw_result, args.iterations)
+        typed_ms = measure(typed, raw_result, args.iterations)
+        label = f"{len(raw_result.content)} text block(s)"
+        print(f"{label:>22} {size_kb:>10.0f} {legacy_ms:>12.2f} {typed_ms:>11.2f} {legacy_ms / typed_ms:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
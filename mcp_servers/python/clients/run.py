@@ -1,6 +1,7 @@
 from quart import Quart, request, jsonify, make_response, Response
 import json
 import asyncio
+import contextlib
 import sys
 import os
 import logging
@@ -10,60 +11,115 @@ from typing import Optional, Dict, Any
 from asyncio import Lock
 from hypercorn.asyncio import serve
 from hypercorn.config import Config
-from contextlib import AsyncExitStack
 from src.llm.azureopenai import azure_openai_processor
-from src.server_connection import initialize_all_mcp, MCPServers
+from src.llm.http_client import close_all_sessions
+from src.llm.resilience import llm_resilience
+from src.llm.deployment_pool import azure_deployment_pool
+from src.server_connection import initialize_all_mcp, shutdown_all_mcp, MCPServers, MCPServerStatus
+from src.tool_catalog import tool_catalog
+from src.tool_router import routing_stats
+from src.router_cache import router_cache
+from src.conversation_store import conversation_store
+from src.tool_result_shaper import result_store
+from src.logging_config import configure_logging, shutdown_logging
+from src.client_and_server_config import LoggingConfig
+from src.tracing import tracer
+from src.metrics import gateway_metrics
+from src.admission import admission_controller, tenant_key, credentials_key, AdmissionRejected
+from src.streaming import CustomStreamHandler, stream_generator, new_stream_queue, stream_metrics
 from src.client_and_server_validation import client_and_server_validation
 from src.client_and_server_execution import client_and_server_execution
-import logging
 
 
-# Configure clean logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Configure queued, redacted logging (see LoggingConfig)
+configure_logging(LoggingConfig)
 logger = logging.getLogger('api')
 
 app = Quart(__name__)
 
+def metrics_route() -> str:
+    """URL rule of the request (bounded label values), not the raw path."""
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
 # Clean request logging middleware
 @app.before_request
 async def log_request_start():
     request.start_time = time.time()
+    gateway_metrics.requests_in_flight.labels(metrics_route()).inc()
 
 # Clean response logging middleware
 @app.after_request
 async def log_request_complete(response):
     request_time = time.time() - request.start_time
-    logger.info(f"{request.method} {request.path} - {response.status_code} - {request_time:.3f}s")
+    logger.info("%s %s - %s - %.3fs", request.method, request.path, response.status_code, request_time)
+    gateway_metrics.observe_request(metrics_route(), request.method, response.status_code, request_time)
+    if response.status_code >= 500:
+        gateway_metrics.record_error("request", f"http_{response.status_code}")
     return response
 
-app.mcp_exit_stack = None
-# Initialize the clients when the app starts
+@app.teardown_request
+async def track_request_end(exc):
+    if hasattr(request, "start_time"):
+        gateway_metrics.requests_in_flight.labels(metrics_route()).dec()
+
+# Gauges read when /metrics is scraped
+gateway_metrics.state.register("server_status", lambda: MCPServerStatus)
+gateway_metrics.state.register("session_pools", lambda: {name: pool.stats() for name, pool in MCPServers.items()})
+gateway_metrics.state.register("active_streams", lambda: stream_metrics.active_streams)
+gateway_metrics.state.register("sse_queue_depth", stream_metrics.queued_events)
+gateway_metrics.state.register("trace_queue_depth", tracer.queue_depth)
+gateway_metrics.state.register("admission_queue_depth", lambda: admission_controller.waiting)
+gateway_metrics.state.register("circuit_breakers", llm_resilience.breaker_states)
+gateway_metrics.state.register("azure_deployments", lambda: azure_deployment_pool.stats()["deployments"])
+
+
+def rejected_response(rejected: AdmissionRejected):
+    """Fast 429 for a request refused by admission control."""
+    return jsonify({"Data": None, "Error": str(rejected), "Status": False}), 429, {"Retry-After": str(rejected.retry_after)}
+
+app.mcp_startup_task = None
+# Initialize the clients when the app starts. Servers start in the background so
+# requests for servers that are already ready are served while others come up.
 @app.before_serving
 async def startup():
-    try:
-        app.mcp_exit_stack = AsyncExitStack()
-        await app.mcp_exit_stack.__aenter__()
-        print("\n✅ MCP servers initialization started.")
-        success = await initialize_all_mcp(app.mcp_exit_stack)
-        if success: 
-            print(f"\nAvailable servers: {list(MCPServers.keys())}")
-            print("\n✅ MCP servers initialized successfully.\n")
-        else:
-            print("\n❌ Failed to initialize MCP clients.")
-        
-    except Exception as err:
-        print(f"Error initializing MCP clients =========>>>> {err}")
+    async def initialize():
+        try:
+            logger.info("MCP servers initialization started")
+            success = await initialize_all_mcp()
+            if success: 
+                logger.info("MCP servers initialized, available servers: %s", list(MCPServers.keys()))
+            else:
+                logger.error("Failed to initialize MCP clients")
+            
+        except Exception as err:
+            logger.exception("Error initializing MCP clients: %s", err)
+
+    router_cache.load()
+    app.mcp_startup_task = asyncio.create_task(initialize())
+
+
+@app.route("/api/v1/mcp/servers/status", methods=["GET"])
+async def servers_status():
+    """Readiness report: ready, failed, timed_out, cancelled or starting, with startup latency per server."""
+    return jsonify({"Data": MCPServerStatus, "Error": None, "Status": True}), 200
 
 
 @app.route("/api/v1/mcp/process_message", methods=["POST"])
 async def process_message():
+    # Root span of the request; its trace id is returned in Data["trace_id"]
+    with tracer.start_trace("POST /api/v1/mcp/process_message", request.headers.get("traceparent"), {"http.route": request.path, "http.request_content_length": request.content_length}):
+        data = await request.get_json(silent=True)
+        try:
+            tenant = await admission_controller.acquire(tenant_key(request.headers, data))
+        except AdmissionRejected as rejected:
+            return rejected_response(rejected)
+        try:
+            return await handle_process_message()
+        finally:
+            admission_controller.release(tenant)
+
+
+async def handle_process_message():
     try:
         data = await request.get_json()
         
@@ -73,7 +129,6 @@ async def process_message():
         
         # Extract credentials from request
         credentials = data.get("selected_server_credentials", {})
-        # print(f"\n✅ ------------------------" , credentials)
         # Validation check - pass credentials to validation
         validation_result = await client_and_server_validation(
             data, 
@@ -91,7 +146,7 @@ async def process_message():
                 "Status": False
             }), 200
             
-        print(f"\n✅ Validation Successful")
+        logger.debug("Validation successful")
         
         # Execution - pass credentials to execution
         generated_payload = validation_result["payload"]
@@ -104,7 +159,7 @@ async def process_message():
             }
         )
         
-        print(f"\n✅ Execution Completed")
+        logger.debug("Execution completed: status=%s llm_calls=%s", execution_response.Status, execution_response.Data.get("total_llm_calls"))
         response_dict = {
             "Data": execution_response.Data,
             "Error": execution_response.Error,
@@ -113,7 +168,8 @@ async def process_message():
         return jsonify(response_dict), 200
     
     except Exception as error:
-        print(f"Error ========>>>>> {error}")
+        logger.exception("Error processing request: %s", error)
+        gateway_metrics.record_error("request", error)
         return jsonify({
             "Data": None,
             "Error": str(error),
@@ -121,53 +177,72 @@ async def process_message():
         }), 500
 
 
-class CustomStreamHandler:
-    def __init__(self, response_queue: asyncio.Queue):
-        self.response_queue = response_queue
-    
-    async def on_data(self, chunk: str):
-        """Send data chunk to the stream"""
-        await self.response_queue.put(f"data: {chunk}\n\n")
-    
-    async def on_end(self):
-        """Send completion message and end the stream"""
-        completion_data = {
-            "Data": None,
-            "Error": None,
-            "Status": True,
-            "StreamingStatus": "COMPLETED",
-            "Action": "NO-ACTION"
-        }
-        await self.response_queue.put(f"data: {json.dumps(completion_data)}\n\n")
-        await self.response_queue.put(None)  # Signal end of stream
-    
-    async def on_error(self, error: Exception):
-        """Send error message and end the stream"""
-        print(f"Streaming Error: {error}")
-        error_data = {"error": str(error)}
-        await self.response_queue.put(f"data: {json.dumps(error_data)}\n\n")
-        await self.response_queue.put(None)  # Signal end of stream
-
-async def stream_generator(response_queue: asyncio.Queue):
-    """Generator function for streaming responses"""
-    while True:
-        try:
-            # Wait for data with a timeout to prevent hanging
-            data = await asyncio.wait_for(response_queue.get(), timeout=30.0)
-            if data is None:  # End of stream signal
-                break
-            yield data
-        except asyncio.TimeoutError:
-            # Send keepalive or break on timeout
-            break
-        except Exception as e:
-            print(f"Stream generator error: {e}")
-            break
+@app.route("/api/v1/mcp/tools/invalidate", methods=["POST"])
+async def invalidate_tool_catalog():
+    """Drop cached tool catalogs so they are rebuilt from list_tools() on next use."""
+    data = await request.get_json(silent=True) or {}
+    server_name = data.get("server_name")
+    if server_name and server_name not in MCPServers:
+        return jsonify({"Data": None, "Error": "Invalid Server", "Status": False}), 200
+
+    tool_catalog.invalidate(server_name)
+    return jsonify({"Data": tool_catalog.stats(), "Error": None, "Status": True}), 200
+
+
+@app.route("/api/v1/mcp/conversations/<conversation_id>", methods=["DELETE"])
+async def delete_conversation(conversation_id: str):
+    """Body: the credentials the conversation was created with (client_details.api_key or selected_server_credentials)."""
+    owner = credentials_key(await request.get_json(silent=True))
+    if owner is None:
+        return jsonify({"Data": None, "Error": "Credentials are required", "Status": False}), 401
+    # Conversations of other credentials are reported as not found
+    if not conversation_store.drop(owner, conversation_id):
+        return jsonify({"Data": None, "Error": f"Conversation {conversation_id} not found", "Status": False}), 404
+    return jsonify({"Data": {"conversation_id": conversation_id}, "Error": None, "Status": True}), 200
+
+
+@app.route("/api/v1/mcp/tool_results/<ref_id>", methods=["GET"])
+async def get_tool_result(ref_id: str):
+    """Full result of a tool call whose output was shortened for the LLM (result_ref)."""
+    entry = result_store.get(ref_id)
+    if entry is None:
+        return jsonify({"Data": None, "Error": f"Tool result {ref_id} not found or expired", "Status": False}), 404
+    return jsonify({"Data": entry, "Error": None, "Status": True}), 200
+
+
+@app.route("/metrics", methods=["GET"])
+async def metrics():
+    """Prometheus exposition of the gateway metrics (see src/metrics.py)."""
+    body, content_type = gateway_metrics.render()
+    return Response(body, status=200, content_type=content_type)
+
+
+@app.route("/api/v1/mcp/stats", methods=["GET"])
+async def gateway_stats():
+    return jsonify({
+        "Data": {
+            "tool_catalog": tool_catalog.stats(),
+            "session_pools": {name: pool.stats() for name, pool in MCPServers.items()},
+            "servers_status": MCPServerStatus,
+            "routing": routing_stats.stats(),
+            "router_cache": router_cache.stats(),
+            "streaming": stream_metrics.stats(),
+            "conversations": conversation_store.stats(),
+            "tool_result_store": result_store.stats(),
+            "tracing": tracer.stats(),
+            "admission": admission_controller.stats(),
+            "llm_resilience": llm_resilience.stats(),
+            "azure_deployment_pool": azure_deployment_pool.stats()
+        },
+        "Error": None,
+        "Status": True
+    }), 200
+
 
 @app.route('/api/v1/mcp/process_message_stream', methods=['POST'])
 async def process_message_stream():
-    # Create a queue for streaming responses
-    response_queue = asyncio.Queue()
+    # Create a bounded queue for streaming responses
+    response_queue = new_stream_queue()
     custom_stream_handler = CustomStreamHandler(response_queue)
     
     try:
@@ -179,10 +254,18 @@ async def process_message_stream():
         # Modify client details
         if 'client_details' not in data:
             data['client_details'] = {}
-        data['client_details']['is_stream'] = False
+        data['client_details']['is_stream'] = True
         
+        traceparent = request.headers.get("traceparent")
+        route = request.path
+        content_length = request.content_length
+
         # Start streaming response
         async def generate_response():
+            with tracer.start_trace("POST /api/v1/mcp/process_message_stream", traceparent, {"http.route": route, "http.request_content_length": content_length}):
+                await run_stream()
+
+        async def run_stream():
             try:
                 # Send initial status
                 start_data = {
@@ -214,7 +297,7 @@ async def process_message_stream():
                 generated_payload = validation_result.get('payload')
                 execution_response = await client_and_server_execution(generated_payload, {"streamCallbacks": custom_stream_handler, "is_stream": True})
                 # =========================================== execution end ======================================================================
-                print(f"\n✅ ------------------------" , execution_response.Data)
+                logger.debug("Stream execution completed: status=%s llm_calls=%s", execution_response.Status, execution_response.Data.get("total_llm_calls"))
                 if not execution_response.Status:
                     error_data = {
                         "Data": execution_response.Data,
@@ -239,7 +322,8 @@ async def process_message_stream():
                 await custom_stream_handler.on_end()
                 
             except Exception as error:
-                print(f"Error ========>>>>> {error}")
+                logger.exception("Error processing stream: %s", error)
+                gateway_metrics.record_error("stream", error)
                 error_data = {
                     "Data": None,
                     "Error": str(error),
@@ -250,12 +334,21 @@ async def process_message_stream():
                 await custom_stream_handler.on_data(json.dumps(error_data))
                 await custom_stream_handler.on_end()
         
-        # Start the response generation in the background
-        asyncio.create_task(generate_response())
+        # Over-capacity requests get a plain 429 before any SSE is sent
+        try:
+            tenant = await admission_controller.acquire(tenant_key(request.headers, data))
+        except AdmissionRejected as rejected:
+            return rejected_response(rejected)
+
+        # Start the response generation in the background; the generator cancels it if the client goes away
+        producer = asyncio.create_task(generate_response())
+        producer.add_done_callback(lambda _: admission_controller.release(tenant))
+        # The handler cancels the producer itself if the body is never read and the queue fills up
+        custom_stream_handler.producer = producer
         
         # Return streaming response
         return Response(
-            stream_generator(response_queue),
+            stream_generator(response_queue, producer),
             mimetype='text/event-stream',
             headers={
                 'Cache-Control': 'no-cache',
@@ -266,7 +359,7 @@ async def process_message_stream():
         )
         
     except Exception as error:
-        print(f"Error ========>>>>> {error}")
+        logger.exception("Error processing request: %s", error)
         
         # Send error response immediately
         error_data = {
@@ -292,16 +385,23 @@ async def process_message_stream():
 
 @app.after_serving
 async def shutdown():
-    if app.mcp_exit_stack:
-        await app.mcp_exit_stack.__aexit__(None, None, None)
-        app.mcp_exit_stack = None
-        print("\n✅ MCP servers cleaned up on shutdown.\n")
+    if app.mcp_startup_task and not app.mcp_startup_task.done():
+        app.mcp_startup_task.cancel()
+        # Servers still starting close their own pools on cancellation; wait for that
+        with contextlib.suppress(asyncio.CancelledError):
+            await app.mcp_startup_task
+    await shutdown_all_mcp()
+    logger.info("MCP servers cleaned up on shutdown")
+    await close_all_sessions()
+    router_cache.save()
+    tracer.shutdown()
+    shutdown_logging()
     
 if __name__ == "__main__":
     # Create a config instance
     config = Config()
     # Configure bind address and port 
-    config.bind = [f"0.0.0.0:5001"]
+    config.bind = [os.getenv("MCP_GATEWAY_BIND", "0.0.0.0:5001")]
 
     # Print welcome banner
     print("╔═══════════════════════════════════════════════════════════════════════════════════════════╗")
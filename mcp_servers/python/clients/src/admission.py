@@ -0,0 +1,263 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Any, Mapping, Optional
+
+from src.client_and_server_config import AdmissionConfig
+from src.metrics import gateway_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is over capacity; run.py turns it into a 429 with Retry-After."""
+
+    def __init__(self, reason: str, retry_after: float, tenant: str):
+        super().__init__(f"Too many requests ({reason}), retry after {math.ceil(retry_after)}s")
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.tenant = tenant
+
+
+def tenant_key(headers: Mapping[str, str], payload: Optional[Dict[str, Any]], config: Dict[str, Any] = AdmissionConfig) -> str:
+    """
+    Tenant of a request: the tenant header when it can be trusted, else a
+    hash of the LLM API key, else a hash of the server credentials. Secrets
+    are never kept or exported, only their hash prefix.
+
+    The header is client-controlled: it is only used when trust_tenant_header
+    is set (a proxy in front authenticates clients and sets it) or when its
+    value is one of the configured tenants. Otherwise a client could get a
+    fresh bucket and concurrency quota by sending a new value per request.
+    """
+    tenant = headers.get(config["tenant_header"]) if config.get("tenant_header") else None
+    if tenant and (config.get("trust_tenant_header") or tenant in config["tenants"]):
+        return tenant
+    return credentials_key(payload) or "anonymous"
+
+
+def credentials_key(payload: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Hash prefix of the request's LLM api_key, else of its server credentials; None without either."""
+    payload = payload or {}
+    secret = (payload.get("client_details") or {}).get("api_key")
+    if not secret and payload.get("selected_server_credentials"):
+        secret = json.dumps(payload["selected_server_credentials"], sort_keys=True, default=str)
+    if not secret:
+        return None
+    return "key-" + hashlib.sha256(str(secret).encode("utf-8")).hexdigest()[:12]
+
+
+class TokenBucket:
+    """`rate` tokens per second up to `burst`; one token per admitted request."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, reserved: int = 0) -> float:
+        """Seconds until a token is free beyond `reserved` ones already promised; 0 when one is."""
+        self._refill()
+        needed = 1 + reserved - self.tokens
+        if needed <= 0:
+            return 0.0
+        return needed / self.rate if self.rate > 0 else 60.0
+
+    def take(self):
+        """Charge an admitted request; checked beforehand with wait_time()."""
+        self._refill()
+        self.tokens -= 1
+
+
+class TenantState:
+    def __init__(self, rate: float, burst: float, max_concurrent: int):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+
+class QueuedRequest:
+    """A request waiting for a slot; compared by identity, so each one leaves the queue exactly once."""
+
+    __slots__ = ("state",)
+
+    def __init__(self, state: TenantState):
+        self.state = state
+
+
+class AdmissionController:
+    """
+    Admission control in front of validation and execution.
+
+    A request first needs a token in its tenant's bucket (rate limit), then
+    a slot under both the global and the tenant's concurrency limit; the
+    token is only taken once the request is admitted. Without a free slot,
+    or while a queued request could take the free one, it waits in a bounded
+    queue for at most max_queue_wait_seconds. A request over its rate, facing a full queue or
+    reaching the wait deadline is rejected at once with the time after which
+    a retry is likely to succeed.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.enabled = config["enabled"]
+        self.max_concurrent = config["max_concurrent_requests"]
+        self.max_queue_size = config["max_queue_size"]
+        self.max_queue_wait = config["max_queue_wait_seconds"]
+        self._tenants: "OrderedDict[str, TenantState]" = OrderedDict()
+        # Queued requests in arrival order; a free slot goes to the first one that can use it
+        self._waiters: Deque["QueuedRequest"] = deque()
+        self._condition: Optional[asyncio.Condition] = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejections: Dict[str, int] = {"rate_limited": 0, "queue_full": 0, "queue_timeout": 0}
+
+    def _tenant(self, tenant: str) -> TenantState:
+        state = self._tenants.get(tenant)
+        if state is None:
+            limits = {**self.config["per_tenant"], **self.config["tenants"].get(tenant, {})}
+            state = TenantState(limits["rate_per_second"], limits["burst"], limits["max_concurrent"])
+            self._tenants[tenant] = state
+            self._evict_idle()
+        self._tenants.move_to_end(tenant)
+        return state
+
+    def _evict_idle(self):
+        # Forget the least recently seen tenants with nothing running or queued
+        excess = len(self._tenants) - self.config["max_tenants"]
+        for name in list(self._tenants):
+            if excess <= 0:
+                break
+            state = self._tenants[name]
+            if state.in_flight == 0 and state.waiting == 0:
+                del self._tenants[name]
+                excess -= 1
+
+    def _metric_label(self, tenant: str) -> str:
+        # Only configured tenants get their own series; Prometheus keeps every label value forever
+        return tenant if tenant in self.config["tenants"] else "other"
+
+    def _has_slot(self, state: TenantState) -> bool:
+        return self.in_flight < self.max_concurrent and state.in_flight < state.max_concurrent
+
+    def _reject(self, state: TenantState, tenant: str, reason: str, retry_after: float):
+        state.rejected += 1
+        self.rejections[reason] += 1
+        gateway_metrics.record_admission_rejection(reason)
+        logger.info("Admission rejected: tenant=%s reason=%s retry_after=%.1fs", tenant, reason, retry_after)
+        raise AdmissionRejected(reason, retry_after, tenant)
+
+    def _next_in_line(self, state: TenantState, entry: Optional["QueuedRequest"] = None) -> bool:
+        """Whether `state` may take a free slot now: no request queued ahead of `entry` could use one."""
+        if not self._has_slot(state):
+            return False
+        for waiter in self._waiters:
+            if waiter is entry:
+                return True
+            if self._has_slot(waiter.state):
+                return False
+        return True
+
+    def _admit(self, state: TenantState):
+        # The rate token is only charged here, so rejected requests do not use up the tenant's budget
+        state.bucket.take()
+        self.in_flight += 1
+        self.admitted += 1
+        state.in_flight += 1
+        state.admitted += 1
+
+    async def acquire(self, tenant: str) -> str:
+        """Wait for a slot and return the tenant to pass to release(); raises AdmissionRejected."""
+        if not self.enabled:
+            return tenant
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        state = self._tenant(tenant)
+
+        # The tenant's queued requests will each need a token too
+        wait_for_token = state.bucket.wait_time(reserved=state.waiting)
+        if wait_for_token > 0:
+            self._reject(state, tenant, "rate_limited", wait_for_token)
+
+        # A free slot goes to a queued request that can use it before a newcomer
+        if self._next_in_line(state):
+            self._admit(state)
+            gateway_metrics.observe_admission_wait(self._metric_label(tenant), 0.0)
+            return tenant
+
+        if self.waiting >= self.max_queue_size:
+            self._reject(state, tenant, "queue_full", self.max_queue_wait)
+
+        started = time.monotonic()
+        self.waiting += 1
+        state.waiting += 1
+        entry = QueuedRequest(state)
+        self._waiters.append(entry)
+        try:
+            async with self._condition:
+                await asyncio.wait_for(
+                    self._condition.wait_for(lambda: self._next_in_line(state, entry)), self.max_queue_wait
+                )
+                self._admit(state)
+                self._waiters.remove(entry)
+                if self._waiters and self.in_flight < self.max_concurrent:
+                    # Slots left: let the other waiters (including newcomers queued behind us) check again
+                    self._condition.notify_all()
+        except asyncio.TimeoutError:
+            gateway_metrics.observe_admission_wait(self._metric_label(tenant), time.monotonic() - started)
+            self._reject(state, tenant, "queue_timeout", self.max_queue_wait)
+        finally:
+            self.waiting -= 1
+            state.waiting -= 1
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+                if self._condition is not None and self.in_flight < self.max_concurrent:
+                    # Requests queued behind a timed-out one may be able to run now
+                    asyncio.ensure_future(self._notify())
+
+        gateway_metrics.observe_admission_wait(self._metric_label(tenant), time.monotonic() - started)
+        return tenant
+
+    def release(self, tenant: str):
+        if not self.enabled:
+            return
+        state = self._tenants.get(tenant)
+        self.in_flight -= 1
+        if state is not None:
+            state.in_flight -= 1
+        if self._condition is not None and self.waiting:
+            asyncio.ensure_future(self._notify())
+
+    async def _notify(self):
+        async with self._condition:
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejections": dict(self.rejections),
+            "tenants": len(self._tenants),
+            "max_concurrent_requests": self.max_concurrent,
+            "max_queue_size": self.max_queue_size,
+        }
+
+
+# Global admission controller used by run.py
+admission_controller = AdmissionController(AdmissionConfig)
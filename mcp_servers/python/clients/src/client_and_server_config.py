@@ -1,8 +1,27 @@
-ClientsConfig =[
-    "MCP_CLIENT_AZURE_AI",
-    "MCP_CLIENT_OPENAI",
-	"MCP_CLIENT_GEMINI"
-]
+import json
+import os
+
+# Supported clients. "resilience" overrides keys of LlmResilienceConfig for that client.
+ClientsConfig = {
+	"MCP_CLIENT_AZURE_AI": {
+		# Azure deployments answer short 429 bursts with Retry-After; wait them out
+		"resilience": {"max_retries": 4, "max_retry_after_seconds": 20},
+		# Optional deployment pool (src/llm/deployment_pool.py). When set, calls are spread
+		# over these deployments instead of the endpoint/deployment_id of the request
+		# (unless the request sets "use_deployment_pool": False). Keys are read from
+		# api_key_env, falling back to the request's api_key. e.g.
+		#   {"name": "eastus", "endpoint": "https://eastus.openai.azure.com", "deployment_id": "gpt-4o",
+		#    "api_version": "2024-02-01", "api_key_env": "AZURE_OPENAI_KEY_EASTUS"}
+		"deployments": [],
+		"deployment_pool": {
+			"latency_ewma_alpha": 0.3,          # weight of the newest latency sample
+			"quota_window_seconds": 60,         # rate-limit headers older than this are ignored
+			"default_latency_seconds": 1.0      # assumed latency of a deployment not called yet
+		}
+	},
+	"MCP_CLIENT_OPENAI": {},
+	"MCP_CLIENT_GEMINI": {}
+}
 ServersConfig = [
 	{
 		"server_name": "MCP-GSUITE",
@@ -12,7 +31,10 @@ ServersConfig = [
 			"../servers/MCP-GSUITE/mcp-gsuite",
 			"run",
 			"mcp-gsuite"
-		]
+		],
+		# Google client calls are synchronous, so run one call per process
+		"pool_size": 2,
+		"max_in_flight_per_session": 1
 	},
 	{
 		"server_name": "DOCKERHUB",
@@ -62,4 +84,205 @@ ServersConfig = [
 			"mcp-dart"
 		]
 	}
-]
\ No newline at end of file
+]
+
+# MCP_SERVERS_CONFIG_FILE points to a JSON list of entries shaped like
+# ServersConfig that replaces it (benchmarks/stubs, local setups).
+if os.getenv("MCP_SERVERS_CONFIG_FILE"):
+	with open(os.environ["MCP_SERVERS_CONFIG_FILE"]) as servers_config_file:
+		ServersConfig = json.load(servers_config_file)
+
+# Defaults for the per-server pools of MCP stdio sessions (src/session_pool.py).
+# Any key can be overridden on a single ServersConfig entry.
+MCPSessionPoolConfig = {
+	"pool_size": 1,                     # server processes / sessions started per server
+	"max_in_flight_per_session": 4,     # concurrent tool calls allowed on one session
+	"max_waiters": 100,                 # callers allowed to queue when every session is busy
+	"lease_timeout": 60,                # seconds a caller waits for a session before failing
+	"replace_base_delay": 1,            # first retry delay after a failed session replacement, doubled per failure
+	"replace_max_delay": 30             # cap of that delay
+}
+
+# Gateway startup: every server is started concurrently and becomes usable as
+# soon as it is ready. startup_timeout can be overridden per ServersConfig entry.
+MCPStartupConfig = {
+	"startup_timeout": 120              # seconds allowed for uv run + initialize + list_tools
+}
+
+# Tool calls returned in one LLM turn are dispatched concurrently, bounded per server
+ToolExecutionConfig = {
+	"max_concurrent_tool_calls_per_server": 4
+}
+
+# Budgets of the provider-agnostic agent loop, identical for every client
+AgentLoopConfig = {
+	"max_iterations": 5,            # tool-calling LLM calls per request
+	"max_total_tokens": 200000,     # tokens across all LLM calls of a request
+	"max_duration_seconds": 300     # wall-clock time of the tool-calling loop
+}
+
+# How tools are selected before the tool-calling LLM call (src/tool_router.py).
+#   two_stage       - router LLM call picks the tools, then the tool-calling call
+#   single_stage    - skip the router and send every tool of the server
+#   local_prefilter - pick tools with a local lexical index, router LLM only when ambiguous
+# Overridable per ServersConfig entry ("routing_mode") and per request (client_details["routing_mode"]).
+RoutingConfig = {
+	"default_mode": "two_stage",
+	"prefilter_min_score": 1.0,     # BM25 score the best tool needs to be picked locally
+	"prefilter_margin": 1.5,        # best score must beat the runner-up by this factor
+	"prefilter_max_tools": 3        # tools sent to the tool-calling call when picked locally
+}
+
+# Cache of router (tool selection) decisions (src/router_cache.py), keyed by
+# normalized input + server + tool catalog version.
+RouterCacheConfig = {
+	"enabled": True,
+	"max_entries": 1024,            # least recently used entries are evicted beyond this
+	"ttl_seconds": 3600,            # decisions older than this are recomputed
+	"persist_path": None,           # e.g. "router_cache.json" to keep the cache across restarts
+	"persist_every": 50             # new entries between two writes of persist_path
+}
+
+# Server-side chat histories keyed by conversation_id (src/conversation_store.py)
+ConversationConfig = {
+	"max_conversations": 1000,      # least recently used conversations are dropped beyond this
+	"ttl_seconds": 3600,            # idle conversations are dropped after this
+	"max_history_tokens": 8000,     # estimated tokens of history sent to the LLM
+	"max_messages": 50,             # newest messages kept in the history sent to the LLM
+	"keep_full_tool_results": 3     # newest tool results kept in full, older ones are stubbed
+}
+
+# Budgets applied to tool results before they reach the LLM and the stream
+# (src/tool_result_shaper.py). per_tool entries override keys of default;
+# "fields" lists the record fields kept when a list of records is shortened.
+ToolResultBudgets = {
+	"default": {
+		"max_bytes": 16000,
+		"max_tokens": 4000,
+		"max_list_items": 10,
+		"max_string_chars": 2000
+	},
+	"per_tool": {
+		"query_gmail_emails": {
+			"fields": ["id", "threadId", "subject", "from", "to", "date", "snippet"]
+		},
+		"list_my_repositories": {
+			"fields": ["name", "namespace", "description", "is_private", "star_count", "pull_count", "last_updated"]
+		},
+		"query_database": {
+			"max_list_items": 5,
+			"fields": ["id", "url", "created_time", "last_edited_time", "properties"]
+		},
+		"get_quickbooks_invoices": {
+			"fields": ["Id", "DocNumber", "TxnDate", "DueDate", "TotalAmt", "Balance", "CustomerRef"]
+		}
+	},
+	"result_store_max_entries": 500,        # full results kept for /api/v1/mcp/tool_results/<ref_id>
+	"result_store_max_bytes": 50000000,
+	"result_store_ttl_seconds": 3600
+}
+
+# Logging of the gateway (src/logging_config.py). Records go through a queue
+# and are written by a background thread; values of redact_keys are masked.
+LoggingConfig = {
+	"level": "INFO",                # root level
+	"levels": {                     # per-module overrides, e.g. "src.client_and_server_execution": "DEBUG"
+		"src.llm": "INFO",
+		"hypercorn.access": "WARNING"
+	},
+	"format": "text",               # "text" or "json" (one JSON object per line)
+	"file": None,                   # optional log file in addition to stdout
+	"redact_keys": [
+		"server_credentials", "__credentials__", "selected_server_credentials", "api_key",
+		"authorization", "access_token", "refresh_token", "client_secret", "token", "password"
+	]
+}
+
+# Per-request tracing (src/tracing.py). Spans are exported as OTLP/JSON either
+# to a local JSONL file or to an OTLP/HTTP collector. A request carrying a W3C
+# traceparent header follows that header's sampled flag instead of sample_ratio.
+TracingConfig = {
+	"enabled": True,
+	"sample_ratio": 0.0,                        # share of requests traced; 0 keeps tracing off
+	"exporter": "file",                         # "file", "otlp" or None
+	"file_path": "traces.jsonl",
+	"otlp_endpoint": "http://localhost:4318",   # /v1/traces is appended
+	"service_name": "mcp-gateway"
+}
+
+# Admission control in front of validation and execution (src/admission.py).
+# Tenants are identified by a hash of the LLM api_key, else of the server
+# credentials. tenant_header is only honoured for the ids listed in "tenants",
+# or for any value when trust_tenant_header is set because a proxy in front
+# authenticates clients and sets the header. "tenants" overrides per_tenant
+# for given tenant ids; only they get their own admission wait metric series.
+AdmissionConfig = {
+	"enabled": True,
+	"max_concurrent_requests": 64,      # requests validated/executed at once, all tenants together
+	"max_queue_size": 200,              # requests allowed to wait for a slot
+	"max_queue_wait_seconds": 10,       # wait after which a queued request gets a 429
+	"tenant_header": "X-Tenant-Id",
+	"trust_tenant_header": False,
+	"per_tenant": {
+		"max_concurrent": 8,            # requests of one tenant running at once
+		"rate_per_second": 5,           # sustained admitted requests per second
+		"burst": 20                     # requests admitted back to back before the rate applies
+	},
+	"tenants": {},                      # e.g. {"acme": {"max_concurrent": 32, "rate_per_second": 20, "burst": 50}}
+	"max_tenants": 10000                # idle tenants forgotten beyond this
+}
+
+# Prometheus metrics served on /metrics (src/metrics.py). Bucket bounds are seconds.
+MetricsConfig = {
+	"enabled": True,
+	"request_buckets": [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300],
+	"llm_buckets": [0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120],
+	"tool_buckets": [0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60],
+	"admission_buckets": [0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+}
+
+# SSE pipeline of /api/v1/mcp/process_message_stream (src/streaming.py)
+StreamingConfig = {
+	"queue_max_size": 100,          # events buffered per stream before producers wait
+	"keepalive_interval": 15,       # seconds of silence before an SSE keepalive comment
+	"max_stream_duration": 600,     # seconds before the stream is ended with an error
+	"put_timeout": 60               # seconds a producer waits on a full queue before the stream is abandoned
+}
+
+# Retries and circuit breakers around LLM provider calls (src/llm/resilience.py).
+# Breakers are kept per provider and deployment/model.
+LlmResilienceConfig = {
+	"enabled": True,
+	"max_retries": 3,                   # retries of one LLM call
+	"max_retries_per_request": 6,       # retries across all LLM calls of a gateway request
+	"base_delay_seconds": 0.5,          # backoff is uniform in [0, min(max_delay, base * 2^attempt)]
+	"max_delay_seconds": 8,
+	"respect_retry_after": True,        # Retry-After / retry-after-ms replace the backoff delay
+	"max_retry_after_seconds": 10,      # longer Retry-After values fail the call at once
+	"retry_statuses": [408, 409, 429, 500, 502, 503, 504],
+	"quota_statuses": [429],            # retried, but not counted by the breaker: breakers are shared by
+	                                    # all callers, and one api_key running out of quota must not open
+	                                    # the circuit for the others
+	"failure_threshold": 5,             # consecutive failures that open a breaker
+	"open_seconds": 30,                 # calls fail fast for this long once open
+	"half_open_max_calls": 1            # probe calls allowed after open_seconds
+}
+
+# Base URLs of the hosted LLM APIs; Azure uses the endpoint sent in client_details.
+# Overridable through the environment, e.g. to point at benchmarks/stubs/stub_llm_server.py.
+LlmEndpointsConfig = {
+	"openai_base_url": os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
+	"gemini_base_url": os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta")
+}
+
+# Shared async HTTP engine used by the LLM processors (src/llm/http_client.py).
+# One keep-alive connection pool is kept per provider endpoint (scheme + host).
+LlmHttpConfig = {
+	"pool_limit": 100,              # max open connections per provider endpoint
+	"pool_limit_per_host": 50,      # max open connections to a single host
+	"keepalive_timeout": 30,        # seconds an idle connection is kept for reuse
+	"dns_cache_ttl": 300,           # seconds resolved addresses are cached
+	"connect_timeout": 10,          # seconds to acquire a pooled connection and connect
+	"read_timeout": 60,             # seconds allowed between two reads of the response
+	"total_timeout": 120            # seconds for the whole request/response cycle
+}
@@ -1,18 +1,43 @@
 import json
+import time
+import hashlib
+import asyncio
 import logging
-from typing import Any, Dict, List, Optional
-
-# Assuming these are your imported modules/classes for MCP clients and Azure LLM calls
-from src.llm.azureopenai import azure_openai_processor  # your async LLM call function
-from src.llm.openai import openai_processor  # your async LLM call function
-from src.server_connection import MCPServers  # MCP clients dict or class with call_tool method
-from src.llm.gemini import gemini_processor 
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from src.llm.provider_adapters import ProviderAdapters, ProviderAdapter
+from src.llm.resilience import start_retry_budget
+from src.server_connection import MCPServers  # MCP session pools keyed by server name
+from src.client_and_server_config import ToolExecutionConfig, AgentLoopConfig
+from src.tool_catalog import tool_catalog
+from src.tool_router import (
+    LexicalToolIndex,
+    prefilter_tools,
+    resolve_routing_mode,
+    estimate_tokens,
+    routing_stats,
+)
+from src.router_cache import router_cache
+from src.conversation_store import conversation_store, Conversation
+from src.admission import credentials_key
+from src.tool_result_shaper import shape_tool_result, ShapedToolResult
+from src.tool_result import ToolResult, to_jsonable, dumps
+from src.tracing import tracer
+from src.metrics import gateway_metrics
+
+logger = logging.getLogger(__name__)
+
+# Output tokens of a typical router answer (<function_call>...<selected_tools>...)
+ROUTER_ANSWER_TOKENS = 30
 
 
 class ClientAndServerExecutionResponse:
     def __init__(self):
         self.Data = {
+            "conversation_id": None,
+            "trace_id": None,
             "total_llm_calls": 0,
+            "router_cache": None,
             "total_tokens": 0,
             "total_input_tokens": 0,
             "total_output_tokens": 0,
@@ -20,12 +45,116 @@ class ClientAndServerExecutionResponse:
             "llm_responses_arr": [],
             "messages": [],
             "output_type": "text",
-            "executed_tool_calls": []
+            "executed_tool_calls": [],
+            "routing": None
         }
         self.Error: Optional[str] = None
         self.Status: bool = False
 
 
+class AgentBudget:
+    """Iteration, token and wall-clock limits applied identically to every provider."""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.max_iterations = config["max_iterations"]
+        self.max_total_tokens = config["max_total_tokens"]
+        self.max_duration_seconds = config["max_duration_seconds"]
+        self.started = time.monotonic()
+
+    def exceeded(self, result: ClientAndServerExecutionResponse, iteration: int) -> Optional[str]:
+        if iteration >= self.max_iterations:
+            return f"Agent loop stopped: maximum of {self.max_iterations} tool-calling iterations reached"
+        if result.Data["total_tokens"] >= self.max_total_tokens:
+            return f"Agent loop stopped: token budget of {self.max_total_tokens} exhausted"
+        if time.monotonic() - self.started >= self.max_duration_seconds:
+            return f"Agent loop stopped: time budget of {self.max_duration_seconds}s exhausted"
+        return None
+
+
+async def notify(streaming_callback: Optional[Any], data: Any, action: str = "NOTIFICATION"):
+    if streaming_callback and streaming_callback.get("is_stream"):
+        await streaming_callback["streamCallbacks"].on_data(json.dumps({
+            "Data": data,
+            "Error": None,
+            "Status": True,
+            "StreamingStatus": "IN-PROGRESS",
+            "Action": action
+        }))
+
+
+def delta_forwarder(streaming_callback: Optional[Any]) -> Optional[Callable[[str], Awaitable[None]]]:
+    """Callback that forwards streamed LLM text as MESSAGE_CHUNK events, or None when not streaming."""
+    if not (streaming_callback and streaming_callback.get("is_stream")):
+        return None
+
+    async def on_delta(text: str):
+        await notify(streaming_callback, text, "MESSAGE_CHUNK")
+
+    return on_delta
+
+
+async def call_llm(adapter: ProviderAdapter, client_details: Dict[str, Any], phase: str, on_delta: Optional[Callable[[str], Awaitable[None]]] = None):
+    """One LLM call inside an llm.<phase> span carrying provider, model, token counts and payload size."""
+    started = time.perf_counter()
+    with tracer.start_span(f"llm.{phase}") as span:
+        if span.is_recording:
+            span.set_attributes({
+                "gen_ai.system": adapter.provider,
+                "gen_ai.request.model": client_details.get("deployment_id") or client_details.get("chat_model"),
+                "llm.phase": phase,
+                "llm.streamed": on_delta is not None,
+                "llm.tools_sent": len(client_details.get("tools") or []),
+                "payload.request_bytes": len(dumps(client_details.get("chat_history") or [])) + len(client_details.get("prompt") or ""),
+            })
+        try:
+            response = await adapter.complete(client_details, on_delta)
+        except Exception as err:
+            gateway_metrics.observe_llm_call(adapter.provider, phase, False, time.perf_counter() - started)
+            gateway_metrics.record_error("llm", err)
+            raise
+
+        usage = adapter.extract_usage(response.Data) if response.Status else {"total_input_tokens": 0, "total_output_tokens": 0}
+        gateway_metrics.observe_llm_call(
+            adapter.provider, phase, response.Status, time.perf_counter() - started,
+            usage["total_input_tokens"], usage["total_output_tokens"]
+        )
+        if not response.Status:
+            gateway_metrics.record_error("llm", response.Error)
+        if span.is_recording:
+            if response.Status:
+                span.set_attributes({
+                    "gen_ai.usage.input_tokens": usage["total_input_tokens"],
+                    "gen_ai.usage.output_tokens": usage["total_output_tokens"],
+                })
+            else:
+                span.record_error(response.Error)
+        return response
+
+
+def record_llm_response(result: ClientAndServerExecutionResponse, adapter: ProviderAdapter, llm_data: Dict[str, Any]):
+    """Add one LLM call's usage and raw response to the execution result."""
+    usage = adapter.extract_usage(llm_data)
+    result.Data["total_llm_calls"] += 1
+    result.Data["total_tokens"] += usage["total_tokens"]
+    result.Data["total_input_tokens"] += usage["total_input_tokens"]
+    result.Data["total_output_tokens"] += usage["total_output_tokens"]
+    result.Data["final_llm_response"] = llm_data.get("final_llm_response")
+    result.Data["llm_responses_arr"].append(llm_data.get("final_llm_response"))
+
+
+def catalog_version(selected_servers: List[str], available_tools: List[Dict[str, Any]]) -> str:
+    """Version of the tool set a router decision was made against."""
+    versions = []
+    for server in selected_servers:
+        entry = tool_catalog.peek(server)
+        if entry is None:
+            # Tools not served from the catalog: fingerprint the names actually offered
+            names = sorted(tool.get("function", {}).get("name", "") for tool in available_tools)
+            return hashlib.sha256(json.dumps(names).encode("utf-8")).hexdigest()[:16]
+        versions.append(entry["version"])
+    return ",".join(versions)
+
+
 async def client_and_server_execution(payload: Dict[str, Any], streaming_callback: Optional[Any] = None) -> ClientAndServerExecutionResponse:
     try:
         result = ClientAndServerExecutionResponse()
@@ -36,38 +165,43 @@ async def client_and_server_execution(payload: Dict[str, Any], streaming_callbac
         selected_servers = payload.get("selected_servers", [])
         selected_server = selected_servers[0] if selected_servers else ""
 
-        # Debug prints
-        print(f"DEBUG: ===== START OF EXECUTION =====")
-        print(f"DEBUG: Full payload keys: {list(payload.keys())}")
-        print(f"DEBUG: selected_server_credentials: {selected_server_credentials}")
-        print(f"DEBUG: selected_server_credentials type: {type(selected_server_credentials)}")
-        print(f"DEBUG: selected_server: {selected_server}")
-        print(f"DEBUG: selected_client: {selected_client}")
-        if selected_server_credentials and selected_server in selected_server_credentials:
-            print(f"DEBUG: QUICKBOOKS credentials: {selected_server_credentials.get(selected_server, {})}")
-            print(f"DEBUG: QUICKBOOKS credentials keys: {list(selected_server_credentials.get(selected_server, {}).keys())}")
-        else:
-            print(f"DEBUG: No credentials found for {selected_server}")
-            print(f"DEBUG: Available server keys: {list(selected_server_credentials.keys()) if selected_server_credentials else 'None'}")
-        print(f"DEBUG: ===== END OF INITIAL DEBUG =====")
-
-        # Prepare chat history
-        input_content = client_details.get("input", "")
-        if "chat_history" in client_details:
-            client_details["chat_history"].append({"role": "user", "content": input_content})
-        else:
-            client_details["chat_history"] = [{"role": "user", "content": input_content}]
+        logger.debug(
+            "Execution started: client=%s server=%s payload_keys=%s credentials_for=%s",
+            selected_client, selected_server, list(payload.keys()), list((selected_server_credentials or {}).keys())
+        )
+
+        adapter = ProviderAdapters.get(selected_client)
+        if adapter is None:
+            result.Error = "Invalid Client"
+            return result
+        # LLM retries of this request share one budget (src/llm/resilience.py)
+        start_retry_budget(selected_client)
 
-        temp_tools = json.dumps(client_details.get("tools", []))
+        # Prepare chat history: stored server-side, clients only send the new turn
+        input_content = client_details.get("input", "")
+        conversation = conversation_store.open(
+            credentials_key(payload) or "anonymous", client_details.get("conversation_id"), client_details.get("chat_history")
+        )
+        conversation.append("user", input_content)
+        client_details["chat_history"] = conversation.history()
+        result.Data["conversation_id"] = conversation.id
+        result.Data["trace_id"] = tracer.current_span().trace_id
+
+        budget = AgentBudget(AgentLoopConfig)
+        available_tools = client_details.get("tools", [])
         temp_prompt = client_details.get("prompt", "")
 
+        # Tool name -> schema index, built once per request
+        tool_index = {tool.get("function", {}).get("name"): tool for tool in available_tools}
+
         # Extract tool call details for prompt
-        tool_call_details_arr = []
-        for tool in client_details.get("tools", []):
-            tool_call_details_arr.append({
+        tool_call_details_arr = [
+            {
                 "function_name": tool.get("function", {}).get("name", ""),
                 "function_description": tool.get("function", {}).get("description", ""),
-            })
+            }
+            for tool in available_tools
+        ]
 
         tools_getting_agent_prompt = f"""
         You are an {selected_server} AI assistant that analyzes user requests and determines the require tool calls from available tools.
@@ -81,839 +215,190 @@ async def client_and_server_execution(payload: Dict[str, Any], streaming_callbac
         Use exact tool names from available tools. List all relevant tools ordered by relevance.
         """
 
-        client_details["prompt"] = tools_getting_agent_prompt
-        client_details["tools"] = []
-
-        if selected_client == "MCP_CLIENT_AZURE_AI":
-
-            # Initial LLM call
-            initial_llm_response = await azure_openai_processor(client_details)
-            if not initial_llm_response.Status:
-                result.Error = initial_llm_response.Error
-                result.Status = initial_llm_response.Status
-                return result
-            extracted_result = extract_data_from_response(initial_llm_response.Data.get("messages", [{}])[0] if initial_llm_response.Data else "")
-            
-            result.Data["total_llm_calls"] += 1
-            result.Data["total_tokens"] += initial_llm_response.Data.get("total_tokens", 0)
-            result.Data["total_input_tokens"] += initial_llm_response.Data.get("total_input_tokens", 0)
-            result.Data["total_output_tokens"] += initial_llm_response.Data.get("total_output_tokens", 0)
-            result.Data["final_llm_response"] = initial_llm_response.Data.get("final_llm_response")
-            result.Data["llm_responses_arr"].append(initial_llm_response.Data.get("final_llm_response"))
-
-            if streaming_callback and streaming_callback.get("is_stream"):
-                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                    "Data": "Optimized Token LLM call Successfully Completed",
-                    "Error": None,
-                    "Status": True,
-                    "StreamingStatus": "IN-PROGRESS",
-                    "Action": "NOTIFICATION"
-                }))
-            
-            if extracted_result["isFunctionCall"]:
-                final_tool_calls = []
-                selected_tools = extracted_result["selectedTools"]
-                parsed_tools = json.loads(temp_tools)
-
-                for tool_name in selected_tools:
-                    matching_tool = next((t for t in parsed_tools if t.get("function", {}).get("name") == tool_name), None)
-                    if matching_tool:
-                        final_tool_calls.append(matching_tool)
-
-                client_details["prompt"] = f"Use the available tools to respond to the user's request: {temp_prompt}. The server_credentials parameter is automatically provided and should not be included in your tool calls."
-                client_details["tools"] = final_tool_calls
-                
-
-                # Loop to handle multiple LLM calls and tool executions
-                while True:
-                    response = await azure_openai_processor(client_details)
-                    if not response.Status:
-                        result.Error = response.Error
-                        result.Status = response.Status
-                        return result
-
-                    result.Data["total_llm_calls"] += 1
-                    result.Data["total_tokens"] += response.Data.get("total_tokens", 0)
-                    result.Data["total_input_tokens"] += response.Data.get("total_input_tokens", 0)
-                    result.Data["total_output_tokens"] += response.Data.get("total_output_tokens", 0)
-                    result.Data["final_llm_response"] = response.Data.get("final_llm_response")
-                    result.Data["llm_responses_arr"].append(response.Data.get("final_llm_response"))
-
-                    if response.Data.get("output_type") == "text":
-                        result.Data["messages"].extend(response.Data.get("messages", []))
-                        result.Data["output_type"] = response.Data.get("output_type", "")
-                        result.Error = response.Error
-                        result.Status = response.Status
-
-                        for message in response.Data.get("messages", []):
-                            if streaming_callback and streaming_callback.get("is_stream"):
-                                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                    "Data": message,
-                                    "Error": None,
-                                    "Status": True,
-                                    "StreamingStatus": "IN-PROGRESS",
-                                    "Action": "MESSAGE"
-                                }))
-                        return result
-
-                    if streaming_callback and streaming_callback.get("is_stream"):
-                        await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                            "Data": "Tool Calls Started",
-                            "Error": None,
-                            "Status": True,
-                            "StreamingStatus": "IN-PROGRESS",
-                            "Action": "NOTIFICATION"
-                        }))
-
-                    for tool in response.Data.get("final_llm_response", {}).get("choices", [{}])[0].get("message", {}).get("tool_calls", []):
-                        
-                        tool_name = tool.get("function", {}).get("name")
-                        args = json.loads(tool.get("function", {}).get("arguments", "{}"))
-
-                        print(f"DEBUG: ===== TOOL CALL DEBUG =====")
-                        print(f"DEBUG: Tool name: {tool_name}")
-                        print(f"DEBUG: Original args: {args}")
-                        print(f"DEBUG: Selected server: {selected_server}")
-                        print(f"DEBUG: Available credentials keys: {list(selected_server_credentials.keys()) if selected_server_credentials else 'None'}")
-                        print(f"DEBUG: Server credentials for {selected_server}: {selected_server_credentials.get(selected_server, {}) if selected_server_credentials else 'None'}")
-
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": f"{selected_server} MCP server {tool_name} call initiated",
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "NOTIFICATION"
-                            }))
-
-                        tool_call_result = await call_and_execute_tool(selected_server, selected_server_credentials, tool_name, args)
-
-                        print(f"DEBUG: Tool call result: {tool_call_result}")
-                        print(f"DEBUG: ===== END TOOL CALL DEBUG =====")
-
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": f"{selected_server} MCP server {tool_name} call result  : {json.dumps(tool_call_result)}",
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "NOTIFICATION"
-                            }))
-
-                        result.Data["executed_tool_calls"].append({
-                            "id": tool.get("id"),
-                            "name": tool_name,
-                            "arguments": args,
-                            "result": tool_call_result,
-                        })
-
-                        tool_call_content_data = f"Executed tool: {tool_name} and the result is: {json.dumps(tool_call_result)}"
-                        client_details["chat_history"].append({
-                            "role": "assistant",
-                            "content": tool_call_content_data,
-                        })
-
-            else:
-                # No function call, normal response case
-                client_details["prompt"] = f"{temp_prompt}. Available tools: {json.dumps(tool_call_details_arr)}"
+        routing_mode = resolve_routing_mode(client_details, selected_server)
+        routing = {
+            "mode": routing_mode,
+            "router_llm_called": False,
+            "selected_tools": [],
+            "routing_latency_ms": 0.0,
+            "router_tokens": 0,
+            "estimated_tokens_saved": 0,
+        }
+        with tracer.start_span("router") as router_span:
+            routing_started = time.perf_counter()
+
+            extracted_result = None
+            if routing_mode == "single_stage":
+                extracted_result = {"isFunctionCall": True, "selectedTools": list(tool_index)}
+            elif routing_mode == "local_prefilter":
+                lexical_indexes = []
+                for server in selected_servers:
+                    entry = tool_catalog.peek(server)
+                    if entry is not None:
+                        lexical_indexes.append(entry["lexical_index"])
+                if not lexical_indexes:
+                    # Tools supplied without a cached catalog: index them on the fly
+                    lexical_indexes.append(LexicalToolIndex(available_tools))
+                prefiltered_tools = prefilter_tools(input_content, lexical_indexes)
+                if prefiltered_tools:
+                    extracted_result = {"isFunctionCall": True, "selectedTools": prefiltered_tools}
+
+            cached_decision = None
+            if extracted_result is None:
+                # chat_history ends with the current input; the turns before it are part of the key
+                cache_key = router_cache.make_key(
+                    input_content, selected_server, catalog_version(selected_servers, available_tools),
+                    client_details["chat_history"][:-1]
+                )
+                cached_decision = router_cache.get(cache_key)
+
+            if cached_decision is not None:
+                extracted_result = cached_decision["decision"]
+                routing["estimated_tokens_saved"] = cached_decision["router_tokens"]
+            elif extracted_result is None:
+                client_details["prompt"] = tools_getting_agent_prompt
                 client_details["tools"] = []
 
-                normal_response = await azure_openai_processor(client_details)
-                result.Data["total_llm_calls"] += 1
-                result.Data["total_tokens"] += normal_response.Data.get("total_tokens", 0)
-                result.Data["total_input_tokens"] += normal_response.Data.get("total_input_tokens", 0)
-                result.Data["total_output_tokens"] += normal_response.Data.get("total_output_tokens", 0)
-                result.Data["final_llm_response"] = normal_response.Data.get("final_llm_response")
-                result.Data["llm_responses_arr"].append(normal_response.Data.get("final_llm_response"))
-
-                result.Data["output_type"] = normal_response.Data.get("output_type", "")
-                result.Error = normal_response.Error
-                result.Status = normal_response.Status
-
-                content = normal_response.Data.get("final_llm_response", {}).get("choices", [{}])[0].get("message", {}).get("content")
-                if not normal_response.Status or (content is not None and content != ""):
-                    result.Data["messages"] = normal_response.Data.get("messages", [])
-                    for message in normal_response.Data.get("messages", []):
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": message,
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "MESSAGE"
-                            }))
+                # Initial (tool selection) LLM call, never streamed: its tagged answer is parsed, not shown
+                initial_llm_response = await call_llm(adapter, client_details, "router")
+                if not initial_llm_response.Status:
+                    result.Error = initial_llm_response.Error
+                    result.Status = initial_llm_response.Status
                     return result
-
-                if len(normal_response.Data.get("final_llm_response", {}).get("choices", [{}])[0].get("message", {}).get("tool_calls", [])) > 0:
-                    # Repeat the tool calling loop as in the TS code
-                    final_tool_calls = []
-                    selected_tools = extracted_result["selectedTools"]
-                    parsed_tools = json.loads(temp_tools)
-                    for tool_name in selected_tools:
-                        matching_tool = next((t for t in parsed_tools if t.get("function", {}).get("name") == tool_name), None)
-                        if matching_tool:
-                            final_tool_calls.append(matching_tool)
-
-                    client_details["prompt"] = f"Use the available tools to respond to the user's request: {temp_prompt}. The server_credentials parameter is automatically provided and should not be included in your tool calls."
-                    client_details["tools"] = final_tool_calls
-
-                    while True:
-                        response = await azure_openai_processor(client_details)
-                        if not response.Status:
-                            result.Error = response.Error
-                            result.Status = response.Status
-                            return result
-
-                        result.Data["total_llm_calls"] += 1
-                        result.Data["total_tokens"] += response.Data.get("total_tokens", 0)
-                        result.Data["total_input_tokens"] += response.Data.get("total_input_tokens", 0)
-                        result.Data["total_output_tokens"] += response.Data.get("total_output_tokens", 0)
-                        result.Data["final_llm_response"] = response.Data.get("final_llm_response")
-                        result.Data["llm_responses_arr"].append(response.Data.get("final_llm_response"))
-
-                        if response.Data.get("output_type") == "text":
-                            result.Data["messages"].extend(response.Data.get("messages", []))
-                            result.Data["output_type"] = response.Data.get("output_type", "")
-                            result.Error = response.Error
-                            result.Status = response.Status
-
-                            for message in response.Data.get("messages", []):
-                                if streaming_callback and streaming_callback.get("is_stream"):
-                                    await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                        "Data": message,
-                                        "Error": None,
-                                        "Status": True,
-                                        "StreamingStatus": "IN-PROGRESS",
-                                        "Action": "MESSAGE"
-                                    }))
-                            return result
-
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": "Tool Calls Started",
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "NOTIFICATION"
-                            }))
-
-                        for tool in response.Data.get("final_llm_response", {}).get("choices", [{}])[0].get("message", {}).get("tool_calls", []):
-                            tool_name = tool.get("function", {}).get("name")
-                            args = json.loads(tool.get("function", {}).get("arguments", "{}"))
-
-                            if streaming_callback and streaming_callback.get("is_stream"):
-                                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                    "Data": f"{selected_server} MCP server {tool_name} call initiated",
-                                    "Error": None,
-                                    "Status": True,
-                                    "StreamingStatus": "IN-PROGRESS",
-                                    "Action": "NOTIFICATION"
-                                }))
-
-                            tool_call_result = await call_and_execute_tool(selected_server, selected_server_credentials, tool_name, args)
-
-                            if streaming_callback and streaming_callback.get("is_stream"):
-                                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                    "Data": f"{selected_server} MCP server {tool_name} call result  : {json.dumps(tool_call_result)}",
-                                    "Error": None,
-                                    "Status": True,
-                                    "StreamingStatus": "IN-PROGRESS",
-                                    "Action": "NOTIFICATION"
-                                }))
-
-                            result.Data["executed_tool_calls"].append({
-                                "id": tool.get("id"),
-                                "name": tool_name,
-                                "arguments": args,
-                                "result": tool_call_result,
-                            })
-
-                            tool_call_content_data = f"Executed tool: {tool_name} and the result is: {json.dumps(tool_call_result)}"
-                            client_details["chat_history"].append({
-                                "role": "assistant",
-                                "content": tool_call_content_data,
-                            })
-        
-        elif selected_client == "MCP_CLIENT_OPENAI":
-
-            # Initial LLM call
-            initial_llm_response = await openai_processor(client_details)
-            if not initial_llm_response.Status:
-                result.Error = initial_llm_response.Error
-                result.Status = initial_llm_response.Status
-                return result
-            extracted_result = extract_data_from_response(initial_llm_response.Data.get("messages", [{}])[0] if initial_llm_response.Data else "")
-            
-            result.Data["total_llm_calls"] += 1
-            result.Data["total_tokens"] += initial_llm_response.Data.get("total_tokens", 0)
-            result.Data["total_input_tokens"] += initial_llm_response.Data.get("total_input_tokens", 0)
-            result.Data["total_output_tokens"] += initial_llm_response.Data.get("total_output_tokens", 0)
-            result.Data["final_llm_response"] = initial_llm_response.Data.get("final_llm_response")
-            result.Data["llm_responses_arr"].append(initial_llm_response.Data.get("final_llm_response"))
-
-            if streaming_callback and streaming_callback.get("is_stream"):
-                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                    "Data": "Optimized Token LLM call Successfully Completed",
-                    "Error": None,
-                    "Status": True,
-                    "StreamingStatus": "IN-PROGRESS",
-                    "Action": "NOTIFICATION"
-                }))
-            
-            if extracted_result["isFunctionCall"]:
-                final_tool_calls = []
-                selected_tools = extracted_result["selectedTools"]
-                parsed_tools = json.loads(temp_tools)
-
-                for tool_name in selected_tools:
-                    matching_tool = next((t for t in parsed_tools if t.get("function", {}).get("name") == tool_name), None)
-                    if matching_tool:
-                        final_tool_calls.append(matching_tool)
-
-                client_details["prompt"] = f"Use the available tools to respond to the user's request: {temp_prompt}. The server_credentials parameter is automatically provided and should not be included in your tool calls."
-                client_details["tools"] = final_tool_calls
-                
-
-                # Loop to handle multiple LLM calls and tool executions
-                while True:
-                    response = await openai_processor(client_details)
-                    if not response.Status:
-                        result.Error = response.Error
-                        result.Status = response.Status
-                        return result
-
-                    result.Data["total_llm_calls"] += 1
-                    result.Data["total_tokens"] += response.Data.get("total_tokens", 0)
-                    result.Data["total_input_tokens"] += response.Data.get("total_input_tokens", 0)
-                    result.Data["total_output_tokens"] += response.Data.get("total_output_tokens", 0)
-                    result.Data["final_llm_response"] = response.Data.get("final_llm_response")
-                    result.Data["llm_responses_arr"].append(response.Data.get("final_llm_response"))
-
-                    if response.Data.get("output_type") == "text":
-                        result.Data["messages"].extend(response.Data.get("messages", []))
-                        result.Data["output_type"] = response.Data.get("output_type", "")
-                        result.Error = response.Error
-                        result.Status = response.Status
-
-                        for message in response.Data.get("messages", []):
-                            if streaming_callback and streaming_callback.get("is_stream"):
-                                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                    "Data": message,
-                                    "Error": None,
-                                    "Status": True,
-                                    "StreamingStatus": "IN-PROGRESS",
-                                    "Action": "MESSAGE"
-                                }))
-                        return result
-
-                    if streaming_callback and streaming_callback.get("is_stream"):
-                        await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                            "Data": "Tool Calls Started",
-                            "Error": None,
-                            "Status": True,
-                            "StreamingStatus": "IN-PROGRESS",
-                            "Action": "NOTIFICATION"
-                        }))
-
-                    for tool in response.Data.get("final_llm_response", {}).get("choices", [{}])[0].get("message", {}).get("tool_calls", []):
-                        
-                        tool_name = tool.get("function", {}).get("name")
-                        args = json.loads(tool.get("function", {}).get("arguments", "{}"))
-
-                        print(f"DEBUG: ===== TOOL CALL DEBUG =====")
-                        print(f"DEBUG: Tool name: {tool_name}")
-                        print(f"DEBUG: Original args: {args}")
-                        print(f"DEBUG: Selected server: {selected_server}")
-                        print(f"DEBUG: Available credentials keys: {list(selected_server_credentials.keys()) if selected_server_credentials else 'None'}")
-                        print(f"DEBUG: Server credentials for {selected_server}: {selected_server_credentials.get(selected_server, {}) if selected_server_credentials else 'None'}")
-
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": f"{selected_server} MCP server {tool_name} call initiated",
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "NOTIFICATION"
-                            }))
-
-                        tool_call_result = await call_and_execute_tool(selected_server, selected_server_credentials, tool_name, args)
-
-                        print(f"DEBUG: Tool call result: {tool_call_result}")
-                        print(f"DEBUG: ===== END TOOL CALL DEBUG =====")
-
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": f"{selected_server} MCP server {tool_name} call result  : {json.dumps(tool_call_result)}",
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "NOTIFICATION"
-                            }))
-
-                        result.Data["executed_tool_calls"].append({
-                            "id": tool.get("id"),
-                            "name": tool_name,
-                            "arguments": args,
-                            "result": tool_call_result,
-                        })
-
-                        tool_call_content_data = f"Executed tool: {tool_name} and the result is: {json.dumps(tool_call_result)}"
-                        client_details["chat_history"].append({
-                            "role": "assistant",
-                            "content": tool_call_content_data,
-                        })
-
+                extracted_result = extract_data_from_response(initial_llm_response.Data.get("messages", [""])[0] if initial_llm_response.Data else "")
+                record_llm_response(result, adapter, initial_llm_response.Data)
+                routing["router_llm_called"] = True
+                routing["router_tokens"] = adapter.extract_usage(initial_llm_response.Data)["total_tokens"]
+                router_cache.put(cache_key, extracted_result, routing["router_tokens"])
             else:
-                # No function call, normal response case
-                client_details["prompt"] = f"{temp_prompt}. Available tools: {json.dumps(tool_call_details_arr)}"
-                client_details["tools"] = []
+                # Input side of the skipped router call plus its short tagged answer
+                routing["estimated_tokens_saved"] = estimate_tokens(
+                    tools_getting_agent_prompt + json.dumps(client_details["chat_history"])
+                ) + ROUTER_ANSWER_TOKENS
+
+            routing["selected_tools"] = extracted_result["selectedTools"]
+            routing["routing_latency_ms"] = round((time.perf_counter() - routing_started) * 1000, 3)
+            result.Data["routing"] = routing
+            routing_stats.record(routing)
+            router_span.set_attributes({
+                "routing.mode": routing_mode,
+                "routing.router_llm_called": routing["router_llm_called"],
+                "routing.cache_hit": cached_decision is not None,
+                "routing.selected_tools": len(routing["selected_tools"]),
+            })
+        result.Data["router_cache"] = router_cache.report(
+            hit=cached_decision is not None,
+            saved_tokens=cached_decision["router_tokens"] if cached_decision else 0
+        )
 
-                normal_response = await openai_processor(client_details)
-                result.Data["total_llm_calls"] += 1
-                result.Data["total_tokens"] += normal_response.Data.get("total_tokens", 0)
-                result.Data["total_input_tokens"] += normal_response.Data.get("total_input_tokens", 0)
-                result.Data["total_output_tokens"] += normal_response.Data.get("total_output_tokens", 0)
-                result.Data["final_llm_response"] = normal_response.Data.get("final_llm_response")
-                result.Data["llm_responses_arr"].append(normal_response.Data.get("final_llm_response"))
+        await notify(streaming_callback, "Optimized Token LLM call Successfully Completed")
 
-                result.Data["output_type"] = normal_response.Data.get("output_type", "")
-                result.Error = normal_response.Error
-                result.Status = normal_response.Status
+        selected_tool_schemas = [tool_index[name] for name in extracted_result["selectedTools"] if name in tool_index]
+        tool_calling_prompt = f"Use the available tools to respond to the user's request: {temp_prompt}. The server_credentials parameter is automatically provided and should not be included in your tool calls."
 
-                content = normal_response.Data.get("final_llm_response", {}).get("choices", [{}])[0].get("message", {}).get("content")
-                if not normal_response.Status or (content is not None and content != ""):
-                    result.Data["messages"] = normal_response.Data.get("messages", [])
-                    for message in normal_response.Data.get("messages", []):
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": message,
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "MESSAGE"
-                            }))
-                    return result
+        if not extracted_result["isFunctionCall"]:
+            # No function call, normal response case
+            client_details["prompt"] = f"{temp_prompt}. Available tools: {json.dumps(tool_call_details_arr)}"
+            client_details["tools"] = []
 
-                if len(normal_response.Data.get("final_llm_response", {}).get("choices", [{}])[0].get("message", {}).get("tool_calls", [])) > 0:
-                    # Repeat the tool calling loop as in the TS code
-                    final_tool_calls = []
-                    selected_tools = extracted_result["selectedTools"]
-                    parsed_tools = json.loads(temp_tools)
-                    for tool_name in selected_tools:
-                        matching_tool = next((t for t in parsed_tools if t.get("function", {}).get("name") == tool_name), None)
-                        if matching_tool:
-                            final_tool_calls.append(matching_tool)
-
-                    client_details["prompt"] = f"Use the available tools to respond to the user's request: {temp_prompt}. The server_credentials parameter is automatically provided and should not be included in your tool calls."
-                    client_details["tools"] = final_tool_calls
-
-                    while True:
-                        response = await openai_processor(client_details)
-                        if not response.Status:
-                            result.Error = response.Error
-                            result.Status = response.Status
-                            return result
-
-                        result.Data["total_llm_calls"] += 1
-                        result.Data["total_tokens"] += response.Data.get("total_tokens", 0)
-                        result.Data["total_input_tokens"] += response.Data.get("total_input_tokens", 0)
-                        result.Data["total_output_tokens"] += response.Data.get("total_output_tokens", 0)
-                        result.Data["final_llm_response"] = response.Data.get("final_llm_response")
-                        result.Data["llm_responses_arr"].append(response.Data.get("final_llm_response"))
-
-                        if response.Data.get("output_type") == "text":
-                            result.Data["messages"].extend(response.Data.get("messages", []))
-                            result.Data["output_type"] = response.Data.get("output_type", "")
-                            result.Error = response.Error
-                            result.Status = response.Status
-
-                            for message in response.Data.get("messages", []):
-                                if streaming_callback and streaming_callback.get("is_stream"):
-                                    await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                        "Data": message,
-                                        "Error": None,
-                                        "Status": True,
-                                        "StreamingStatus": "IN-PROGRESS",
-                                        "Action": "MESSAGE"
-                                    }))
-                            return result
-
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": "Tool Calls Started",
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "NOTIFICATION"
-                            }))
-
-                        for tool in response.Data.get("final_llm_response", {}).get("choices", [{}])[0].get("message", {}).get("tool_calls", []):
-                            tool_name = tool.get("function", {}).get("name")
-                            args = json.loads(tool.get("function", {}).get("arguments", "{}"))
-
-                            if streaming_callback and streaming_callback.get("is_stream"):
-                                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                    "Data": f"{selected_server} MCP server {tool_name} call initiated",
-                                    "Error": None,
-                                    "Status": True,
-                                    "StreamingStatus": "IN-PROGRESS",
-                                    "Action": "NOTIFICATION"
-                                }))
-
-                            tool_call_result = await call_and_execute_tool(selected_server, selected_server_credentials, tool_name, args)
-
-                            if streaming_callback and streaming_callback.get("is_stream"):
-                                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                    "Data": f"{selected_server} MCP server {tool_name} call result  : {json.dumps(tool_call_result)}",
-                                    "Error": None,
-                                    "Status": True,
-                                    "StreamingStatus": "IN-PROGRESS",
-                                    "Action": "NOTIFICATION"
-                                }))
-
-                            result.Data["executed_tool_calls"].append({
-                                "id": tool.get("id"),
-                                "name": tool_name,
-                                "arguments": args,
-                                "result": tool_call_result,
-                            })
-
-                            tool_call_content_data = f"Executed tool: {tool_name} and the result is: {json.dumps(tool_call_result)}"
-                            client_details["chat_history"].append({
-                                "role": "assistant",
-                                "content": tool_call_content_data,
-                            })
-        
-        elif selected_client == "MCP_CLIENT_GEMINI":
-
-            # Initial LLM call
-            initial_llm_response = await gemini_processor(client_details)
-            print("Initial LLM response:", initial_llm_response)
-            if not initial_llm_response.Status:
-                result.Error = initial_llm_response.Error
-                result.Status = initial_llm_response.Status
-                return result
-            extracted_result = extract_data_from_response(initial_llm_response.Data.get("messages", [{}])[0] if initial_llm_response.Data else "")
-            
-            result.Data["total_llm_calls"] += 1
-            result.Data["total_tokens"] += initial_llm_response.Data.get("total_tokens", 0)
-            result.Data["total_input_tokens"] += initial_llm_response.Data.get("total_input_tokens", 0)
-            result.Data["total_output_tokens"] += initial_llm_response.Data.get("total_output_tokens", 0)
-            result.Data["final_llm_response"] = initial_llm_response.Data.get("final_llm_response")
-            result.Data["llm_responses_arr"].append(initial_llm_response.Data.get("final_llm_response"))
-
-            if streaming_callback and streaming_callback.get("is_stream"):
-                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                    "Data": "Optimized Token LLM call Successfully Completed",
-                    "Error": None,
-                    "Status": True,
-                    "StreamingStatus": "IN-PROGRESS",
-                    "Action": "NOTIFICATION"
-                }))
-            
-            if extracted_result["isFunctionCall"]:
-                final_tool_calls = []
-                selected_tools = extracted_result["selectedTools"]
-                parsed_tools = json.loads(temp_tools)
-
-                for tool_name in selected_tools:
-                    matching_tool = next((t for t in parsed_tools if t.get("function", {}).get("name") == tool_name), None)
-                    if matching_tool:
-                        final_tool_calls.append(matching_tool)
-
-                client_details["prompt"] = f"Use the available tools to respond to the user's request: {temp_prompt}. The server_credentials parameter is automatically provided and should not be included in your tool calls."
-                client_details["tools"] = final_tool_calls
-             
-
-                # Loop to handle multiple LLM calls and tool executions
-                count=1
-                while True:
-                    if count==3:
-                        result.Error = "Maximum LLM calls went into halucination"
-                        result.Status = response.Status
-                        return result
-                    
-                    if count != 1:
-                         client_details["tools"] = []
-                    
-                    response = await gemini_processor(client_details)
-                    print(response)
-                    if not response.Status:
-                        result.Error = response.Error
-                        result.Status = response.Status
-                        return result
-
-                    result.Data["total_llm_calls"] += 1
-                    result.Data["total_tokens"] += response.Data.get("total_tokens", 0)
-                    result.Data["total_input_tokens"] += response.Data.get("total_input_tokens", 0)
-                    result.Data["total_output_tokens"] += response.Data.get("total_output_tokens", 0)
-                    result.Data["final_llm_response"] = response.Data.get("final_llm_response")
-                    result.Data["llm_responses_arr"].append(response.Data.get("final_llm_response"))
-
-                    if response.Data.get("output_type") == "text":
-                        result.Data["messages"].extend(response.Data.get("messages", []))
-                        result.Data["output_type"] = response.Data.get("output_type", "")
-                        result.Error = response.Error
-                        result.Status = response.Status
-
-                        for message in response.Data.get("messages", []):
-                            if streaming_callback and streaming_callback.get("is_stream"):
-                                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                    "Data": message,
-                                    "Error": None,
-                                    "Status": True,
-                                    "StreamingStatus": "IN-PROGRESS",
-                                    "Action": "MESSAGE"
-                                }))
-                        return result
-
-                    if streaming_callback and streaming_callback.get("is_stream"):
-                        await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                            "Data": "Tool Calls Started",
-                            "Error": None,
-                            "Status": True,
-                            "StreamingStatus": "IN-PROGRESS",
-                            "Action": "NOTIFICATION"
-                        }))
-
-                    final_llm_response = response.Data.get("final_llm_response") if response.Data else None
-                    candidates = final_llm_response.get("candidates", []) if final_llm_response else []
-                    first_candidate = candidates[0] if candidates and len(candidates) > 0 else {}
-                    content = first_candidate.get("content", {}) if isinstance(first_candidate, dict) else {}
-                    parts = content.get("parts", []) if isinstance(content, dict) else []
-
-                    for tool in parts:
-
-                        tool_name = tool.get("functionCall", {}).get("name")
-                        args_raw = tool.get("functionCall", {}).get("args", {})
-
-                        if isinstance(args_raw, str):
-                            try:
-                                 args = json.loads(args_raw)
-                            except json.JSONDecodeError as e:
-                                 args = {}
-                        else:
-                            args = args_raw
-
-                        print(f"DEBUG: ===== GEMINI TOOL CALL DEBUG =====")
-                        print(f"DEBUG: Tool name: {tool_name}")
-                        print(f"DEBUG: Original args: {args}")
-                        print(f"DEBUG: Selected server: {selected_server}")
-                        print(f"DEBUG: Available credentials keys: {list(selected_server_credentials.keys()) if selected_server_credentials else 'None'}")
-                        print(f"DEBUG: Server credentials for {selected_server}: {selected_server_credentials.get(selected_server, {}) if selected_server_credentials else 'None'}")
-
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": f"{selected_server} MCP server {tool_name} call initiated",
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "NOTIFICATION"
-                            }))
-
-                        tool_call_result = await call_and_execute_tool(selected_server, selected_server_credentials, tool_name, args)
-
-                        print(f"DEBUG: Tool call result: {tool_call_result}")
-                        print(f"DEBUG: ===== END GEMINI TOOL CALL DEBUG =====")
-
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": f"{selected_server} MCP server {tool_name} call result  : {json.dumps(tool_call_result)}",
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "NOTIFICATION"
-                            }))
-
-                        result.Data["executed_tool_calls"].append({
-                            "id": tool.get("id"),
-                            "name": tool_name,
-                            "arguments": args,
-                            "result": tool_call_result,
-                        })
-
-                        tool_call_content_data = f"Executed tool: {tool_name} and the result is: {json.dumps(tool_call_result)}"
-                        client_details["chat_history"].append({
-                            "role": "model",
-                            "content": tool_call_content_data,
-                        })
-
-                    count+=1
-            else:
-                # No function call, normal response case
-                client_details["prompt"] = f"{temp_prompt}. Available tools: {json.dumps(tool_call_details_arr)}"
-                client_details["tools"] = []
-
-                normal_response = await gemini_processor(client_details)
-                result.Data["total_llm_calls"] += 1
-                result.Data["total_tokens"] += normal_response.Data.get("total_tokens", 0)
-                result.Data["total_input_tokens"] += normal_response.Data.get("total_input_tokens", 0)
-                result.Data["total_output_tokens"] += normal_response.Data.get("total_output_tokens", 0)
-                result.Data["final_llm_response"] = normal_response.Data.get("final_llm_response")
-                result.Data["llm_responses_arr"].append(normal_response.Data.get("final_llm_response"))
-
-                result.Data["output_type"] = normal_response.Data.get("output_type", "")
+            normal_response = await call_llm(adapter, client_details, "chat", delta_forwarder(streaming_callback))
+            if not normal_response.Status:
                 result.Error = normal_response.Error
                 result.Status = normal_response.Status
+                return result
+            record_llm_response(result, adapter, normal_response.Data)
+            result.Data["output_type"] = normal_response.Data.get("output_type", "")
+
+            final_llm_response = normal_response.Data.get("final_llm_response")
+            content = adapter.extract_text(final_llm_response)
+            if (content is not None and content != "") or not adapter.extract_tool_calls(final_llm_response):
+                result.Data["messages"] = normal_response.Data.get("messages", [])
+                result.Status = True
+                for message in result.Data["messages"]:
+                    conversation.append(adapter.history_role, message)
+                for message in result.Data["messages"]:
+                    await notify(streaming_callback, message, "MESSAGE")
+                return result
 
-                final_llm_response = normal_response.Data.get("final_llm_response") if normal_response.Data else None
-                candidates = final_llm_response.get("candidates", []) if final_llm_response else []
-                first_candidate = candidates[0] if candidates and len(candidates) > 0 else {}
-                content = first_candidate.get("content", {}) if isinstance(first_candidate, dict) else {}
-                parts = content.get("parts", []) if isinstance(content, dict) else []
-
-                text_content = content.get("text")
-
-                if not normal_response.Status or (text_content is not None and text_content != ""):
-                    result.Data["messages"] = normal_response.Data.get("messages", [])
-                    for message in normal_response.Data.get("messages", []):
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": message,
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "MESSAGE"
-                            }))
-                    return result
-
-                if len(parts) > 0:
-                    # Repeat the tool calling loop as in the TS code
-                    final_tool_calls = []
-                    selected_tools = extracted_result["selectedTools"]
-                    parsed_tools = json.loads(temp_tools)
-                    for tool_name in selected_tools:
-                        matching_tool = next((t for t in parsed_tools if t.get("function", {}).get("name") == tool_name), None)
-                        if matching_tool:
-                            final_tool_calls.append(matching_tool)
-
-                    client_details["prompt"] = f"Use the available tools to respond to the user's request: {temp_prompt}. The server_credentials parameter is automatically provided and should not be included in your tool calls."
-                    client_details["tools"] = final_tool_calls
-
-                    count=1
-                    while True:
-                        if count==3:
-                            result.Error = "Maximum LLM calls went into halucination"
-                            result.Status = False
-                            return result
-                    
-                        if count != 1:
-                            client_details["tools"] = []
-
-                        response = await gemini_processor(client_details)
-                        if not response.Status:
-                            result.Error = response.Error
-                            result.Status = response.Status
-                            return result
-
-                        result.Data["total_llm_calls"] += 1
-                        result.Data["total_tokens"] += response.Data.get("total_tokens", 0)
-                        result.Data["total_input_tokens"] += response.Data.get("total_input_tokens", 0)
-                        result.Data["total_output_tokens"] += response.Data.get("total_output_tokens", 0)
-                        result.Data["final_llm_response"] = response.Data.get("final_llm_response")
-                        result.Data["llm_responses_arr"].append(response.Data.get("final_llm_response"))
-
-                        if response.Data.get("output_type") == "text":
-                            result.Data["messages"].extend(response.Data.get("messages", []))
-                            result.Data["output_type"] = response.Data.get("output_type", "")
-                            result.Error = response.Error
-                            result.Status = response.Status
-
-                            for message in response.Data.get("messages", []):
-                                if streaming_callback and streaming_callback.get("is_stream"):
-                                    await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                        "Data": message,
-                                        "Error": None,
-                                        "Status": True,
-                                        "StreamingStatus": "IN-PROGRESS",
-                                        "Action": "MESSAGE"
-                                    }))
-                            return result
-
-                        if streaming_callback and streaming_callback.get("is_stream"):
-                            await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                "Data": "Tool Calls Started",
-                                "Error": None,
-                                "Status": True,
-                                "StreamingStatus": "IN-PROGRESS",
-                                "Action": "NOTIFICATION"
-                            }))
-
-                        final_llm_response = response.Data.get("final_llm_response") if response.Data else None
-                        candidates = final_llm_response.get("candidates", []) if final_llm_response else []
-                        first_candidate = candidates[0] if candidates and len(candidates) > 0 else {}
-                        content = first_candidate.get("content", {}) if isinstance(first_candidate, dict) else {}
-                        parts = content.get("parts", []) if isinstance(content, dict) else []
-
-                        for tool in parts:
-
-                            tool_name = tool.get("functionCall", {}).get("name")
-                            args_raw = tool.get("functionCall", {}).get("args", {})
-
-                            if isinstance(args_raw, str):
-                                try:
-                                    args = json.loads(args_raw)
-                                except json.JSONDecodeError as e:
-                                    args = {}
-                            else:
-                                args = args_raw
-
-                            print(f"DEBUG: ===== GEMINI TOOL CALL DEBUG =====")
-                            print(f"DEBUG: Tool name: {tool_name}")
-                            print(f"DEBUG: Original args: {args}")
-                            print(f"DEBUG: Selected server: {selected_server}")
-                            print(f"DEBUG: Available credentials keys: {list(selected_server_credentials.keys()) if selected_server_credentials else 'None'}")
-                            print(f"DEBUG: Server credentials for {selected_server}: {selected_server_credentials.get(selected_server, {}) if selected_server_credentials else 'None'}")
-
-                            if streaming_callback and streaming_callback.get("is_stream"):
-                                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                    "Data": f"{selected_server} MCP server {tool_name} call initiated",
-                                    "Error": None,
-                                    "Status": True,
-                                    "StreamingStatus": "IN-PROGRESS",
-                                    "Action": "NOTIFICATION"
-                                }))
-
-                            tool_call_result = await call_and_execute_tool(selected_server, selected_server_credentials, tool_name, args)
-
-                            print(f"DEBUG: Tool call result: {tool_call_result}")
-                            print(f"DEBUG: ===== END GEMINI TOOL CALL DEBUG =====")
-
-                            if streaming_callback and streaming_callback.get("is_stream"):
-                                await streaming_callback["streamCallbacks"].on_data(json.dumps({
-                                    "Data": f"{selected_server} MCP server {tool_name} call result  : {json.dumps(tool_call_result)}",
-                                    "Error": None,
-                                    "Status": True,
-                                    "StreamingStatus": "IN-PROGRESS",
-                                    "Action": "NOTIFICATION"
-                                }))
-
-                            result.Data["executed_tool_calls"].append({
-                                "id": tool.get("id"),
-                                "name": tool_name,
-                                "arguments": args,
-                                "result": tool_call_result,
-                            })
-
-                            tool_call_content_data = f"Executed tool: {tool_name} and the result is: {json.dumps(tool_call_result)}"
-                            client_details["chat_history"].append({
-                                "role": "model",
-                                "content": tool_call_content_data,
-                            })
-
-                        count+=1    
-
-        result.Status = True
-        return result
+        client_details["prompt"] = tool_calling_prompt
+        client_details["tools"] = selected_tool_schemas
+        return await run_tool_loop(adapter, budget, result, client_details, conversation, selected_server, selected_server_credentials, streaming_callback)
 
     except Exception as e:
-        logging.error(f"Exception in client_and_server_execution: {e}")
+        logger.exception("Exception in client_and_server_execution: %s", e)
+        gateway_metrics.record_error("execution", e)
         res = ClientAndServerExecutionResponse()
         res.Error = str(e)
         res.Status = False
         return res
 
 
+async def run_tool_loop(
+    adapter: ProviderAdapter,
+    budget: AgentBudget,
+    result: ClientAndServerExecutionResponse,
+    client_details: Dict[str, Any],
+    conversation: Conversation,
+    selected_server: str,
+    selected_server_credentials: Any,
+    streaming_callback: Optional[Any] = None
+) -> ClientAndServerExecutionResponse:
+    """Alternate LLM calls and tool executions until the model answers with text or a budget runs out."""
+    iteration = 0
+    on_delta = delta_forwarder(streaming_callback)
+
+    while True:
+        budget_error = budget.exceeded(result, iteration)
+        if budget_error:
+            result.Error = budget_error
+            result.Status = False
+            gateway_metrics.record_error("execution", "budget_exceeded")
+            return result
+
+        if iteration > 0 and adapter.tools_only_on_first_iteration:
+            client_details["tools"] = []
+
+        response = await call_llm(adapter, client_details, "tool_calling", on_delta)
+        if not response.Status:
+            result.Error = response.Error
+            result.Status = response.Status
+            return result
+        record_llm_response(result, adapter, response.Data)
+
+        tool_calls = adapter.extract_tool_calls(response.Data.get("final_llm_response"))
+        if response.Data.get("output_type") == "text" or not tool_calls:
+            result.Data["messages"].extend(response.Data.get("messages", []))
+            result.Data["output_type"] = "text"
+            result.Error = response.Error
+            result.Status = response.Status
+            for message in response.Data.get("messages", []):
+                conversation.append(adapter.history_role, message)
+            for message in response.Data.get("messages", []):
+                await notify(streaming_callback, message, "MESSAGE")
+            return result
+
+        await notify(streaming_callback, "Tool Calls Started")
+
+        # Tool calls of one turn are independent, so run them concurrently
+        tool_call_results = await execute_tool_calls(selected_server, selected_server_credentials, tool_calls, streaming_callback)
+
+        for tool_call, (tool_call_result, shaped_result) in zip(tool_calls, tool_call_results):
+            result.Data["executed_tool_calls"].append({
+                "id": tool_call["id"],
+                "name": tool_call["name"],
+                "arguments": tool_call["arguments"],
+                "result": to_jsonable(tool_call_result),
+                "result_ref": shaped_result.result_ref,
+            })
+
+            tool_call_content_data = f"Executed tool: {tool_call['name']} and the result is: {shaped_result.encoded}"
+            conversation.append(adapter.history_role, tool_call_content_data, tool_name=tool_call["name"])
+
+        # Older tool results are stubbed and the history stays within its token budget
+        client_details["chat_history"] = conversation.history()
+        iteration += 1
+
+
 def extract_data_from_response(message: Any) -> Dict[str, Any]:
 
     """Parse message content for function call info and selected tools."""
@@ -941,28 +426,64 @@ def extract_data_from_response(message: Any) -> Dict[str, Any]:
     }
 
 
+async def execute_tool_calls(
+    selected_server: str,
+    credentials: Any,
+    tool_calls: List[Dict[str, Any]],
+    streaming_callback: Optional[Any] = None
+) -> List[Tuple[Any, ShapedToolResult]]:
+    """
+    Run the tool calls of one LLM turn (as returned by
+    ProviderAdapter.extract_tool_calls) concurrently.
+
+    At most max_concurrent_tool_calls_per_server calls run at once against the
+    server. Each call yields (full result, shaped result); only the shaped one
+    is streamed and fed to the LLM. Results come back in the order of
+    `tool_calls`, and a failing call yields its error string without affecting
+    the others; so does a call whose arguments could not be parsed, without
+    reaching the server.
+    """
+    semaphore = asyncio.Semaphore(ToolExecutionConfig["max_concurrent_tool_calls_per_server"])
+
+    async def run_one(tool_call: Dict[str, Any]) -> Tuple[Any, ShapedToolResult]:
+        tool_name = tool_call["name"]
+        async with semaphore:
+            await notify(streaming_callback, f"{selected_server} MCP server {tool_name} call initiated")
+
+            if tool_call.get("error"):
+                tool_call_result = tool_call["error"]
+            else:
+                try:
+                    tool_call_result = await call_and_execute_tool(selected_server, credentials, tool_name, tool_call["arguments"])
+                except Exception as err:
+                    tool_call_result = str(err)
+
+            shaped_result = shape_tool_result(tool_name, tool_call_result)
+            await notify(streaming_callback, f"{selected_server} MCP server {tool_name} call result  : {shaped_result.encoded}")
+            return tool_call_result, shaped_result
+
+    return await asyncio.gather(*(run_one(tool_call) for tool_call in tool_calls))
+
+
 async def call_and_execute_tool(
     selected_server: str,
     credentials: Any,
     tool_name: str,
     args: Dict[str, Any]
-) -> Any:
-    """Call the MCP client tool with args and credentials, with JS-style try/catch
-       and JSON-serializable output fallback."""
-    
-    # Debug prints
-    # print(f"DEBUG: call_and_execute_tool - selected_server: {selected_server}")
-    # print(f"DEBUG: call_and_execute_tool - credentials: {credentials}")
-    # print(f"DEBUG: call_and_execute_tool - tool_name: {tool_name}")
-    # print(f"DEBUG: call_and_execute_tool - args: {args}")
-    
+) -> Union[ToolResult, str]:
+    """Call the MCP client tool with args and credentials, with JS-style try/catch.
+       Returns a ToolResult, or the error string when the call fails."""
+    logger.debug("call_and_execute_tool: server=%s tool=%s args=%s", selected_server, tool_name, args)
+
     if selected_server not in MCPServers:
         raise ValueError(f"Server {selected_server} not found in MCPServers")
     
     # pull per-server creds, defaulting to {}
     creds = credentials.get(selected_server, {})
-    # print(f"DEBUG: call_and_execute_tool - creds for {selected_server}: {creds}")
-    
+
+    # copy so the injected credentials never end up in executed_tool_calls
+    args = dict(args)
+
     # switch/case for injecting creds (Python 3.10+)
     match selected_server:
         case "MCP-GSUITE":
@@ -992,32 +513,36 @@ async def call_and_execute_tool(
         case _:
             pass
 
-    # print(f"DEBUG: call_and_execute_tool - final args: {args}")
-
-    # # Debug: Check if server is available
-    # print(f"DEBUG: Available servers in MCPServers: {list(MCPServers.keys())}")
-    # print(f"DEBUG: Looking for server: {selected_server}")
-    # print(f"DEBUG: Server found: {selected_server in MCPServers}")
+    pool = MCPServers[selected_server]
+    # Tool names come from the LLM: only the server's catalog names become metric labels
+    catalog_entry = tool_catalog.peek(selected_server)
+    tool_label = tool_name if catalog_entry is not None and tool_name in catalog_entry["index"] else "unknown"
 
-    client = MCPServers[selected_server]
-
-    try:
-        # perform the tool call
-        raw_result = await client.call_tool(tool_name, args)
-        
-        # try to JSON-serialize it
+    started = time.perf_counter()
+    with tracer.start_span("mcp.call_tool", {"mcp.server.name": selected_server, "mcp.tool.name": tool_name}) as span:
         try:
-            # this will recurse into __dict__ for any object
-            serialized = json.loads(
-                json.dumps(raw_result, default=lambda o: getattr(o, "__dict__", str(o)))
+            # lease the least-busy session of the server's pool and perform the tool call
+            async with pool.lease() as client:
+                raw_result = await client.call_tool(tool_name, args)
+
+            # typed conversion of the content blocks; encoded to JSON later, once
+            tool_call_result = ToolResult.from_mcp(raw_result)
+            if span.is_recording:
+                # the encoding is cached on the result and reused downstream
+                span.set_attributes({
+                    "mcp.tool.is_error": tool_call_result.is_error,
+                    "payload.response_bytes": len(tool_call_result.encoded()),
+                })
+            gateway_metrics.observe_tool_call(
+                selected_server, tool_label, "tool_error" if tool_call_result.is_error else "ok", time.perf_counter() - started
             )
-            tool_call_result = serialized
-        except (TypeError, ValueError):
-            # fallback to string
-            tool_call_result = str(raw_result)
-
-    except Exception as err:
-        # catch any call-tool exception and stringify it
-        tool_call_result = str(err)
+
+        except Exception as err:
+            # catch any call-tool exception and stringify it
+            logger.warning("Tool call %s on %s failed: %s", tool_name, selected_server, err)
+            span.record_error(err)
+            gateway_metrics.observe_tool_call(selected_server, tool_label, "error", time.perf_counter() - started)
+            gateway_metrics.record_error("tool", err)
+            tool_call_result = str(err)
 
     return tool_call_result
\ No newline at end of file
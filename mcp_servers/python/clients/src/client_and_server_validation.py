@@ -1,8 +1,13 @@
+import logging
 from typing import Dict, Any, Callable, Optional
 
-from src.server_connection import MCPServers
+from src.server_connection import MCPServers, MCPServerStatus
+from src.tool_catalog import tool_catalog
+from src.tracing import tracer
 from src.client_and_server_config import ServersConfig, ClientsConfig
 
+logger = logging.getLogger(__name__)
+
 
 async def client_and_server_validation(payload: Dict[str, Any], streaming_callback: Optional[Callable] = None):
     try:
@@ -11,14 +16,13 @@ async def client_and_server_validation(payload: Dict[str, Any], streaming_callba
         selected_client = payload.get("selected_client", "")
         selected_servers = payload.get("selected_servers", [])
 
-        # Debug prints
-        print(f"DEBUG: VALIDATION - selected_server_credentials: {selected_server_credentials}")
-        print(f"DEBUG: VALIDATION - selected_server_credentials type: {type(selected_server_credentials)}")
-        print(f"DEBUG: VALIDATION - selected_servers: {selected_servers}")
-        print(f"DEBUG: VALIDATION - selected_client: {selected_client}")
+        logger.debug(
+            "Validating request: client=%s servers=%s credentials_for=%s",
+            selected_client, selected_servers, list((selected_server_credentials or {}).keys())
+        )
 
         if not selected_client or not selected_servers or not selected_server_credentials or not client_details:
-            print("Invalid Request Payload")
+            logger.info("Invalid Request Payload")
             return {
                 "payload": None,
                 "error": "Invalid Request Payload",
@@ -26,8 +30,15 @@ async def client_and_server_validation(payload: Dict[str, Any], streaming_callba
             }
 
         for server in selected_servers:
+            if server not in MCPServers and MCPServerStatus.get(server, {}).get("status") == "starting":
+                logger.info("Server %s is still starting", server)
+                return {
+                    "payload": None,
+                    "error": f"Server {server} is still starting, retry shortly",
+                    "status": False
+                }
             if server not in MCPServers:
-                print("Invalid Server")
+                logger.info("Invalid Server: %s", server)
                 return {
                     "payload": None,
                     "error": "Invalid Server",
@@ -35,7 +46,7 @@ async def client_and_server_validation(payload: Dict[str, Any], streaming_callba
                 }
 
         if selected_client not in ClientsConfig:
-            print("Invalid Client")
+            logger.info("Invalid Client: %s", selected_client)
             return {
                 "payload": None,
                 "error": "Invalid Client",
@@ -43,62 +54,12 @@ async def client_and_server_validation(payload: Dict[str, Any], streaming_callba
             }
 
         tools_arr = []
-        for server in selected_servers:
-   
-            resource = await MCPServers[server].list_tools()
-            if resource:
-                for tool in resource.tools:
-                    # Debug the tool object to understand its structure
-                    print(f"DEBUG: Tool {tool.name} attributes: {dir(tool)}")
-                    print(f"DEBUG: Tool {tool.name} inputSchema: {getattr(tool, 'inputSchema', 'NOT_FOUND')}")
-                    print(f"DEBUG: Tool {tool.name} parameters: {getattr(tool, 'parameters', 'NOT_FOUND')}")
-                    print(f"DEBUG: Tool {tool.name} __dict__: {getattr(tool, '__dict__', 'NO_DICT')}")
-                    
-                    # Try different ways to access the schema
-                    schema = None
-                    if hasattr(tool, 'inputSchema') and tool.inputSchema:
-                        schema = tool.inputSchema
-                    elif hasattr(tool, 'parameters') and tool.parameters:
-                        schema = tool.parameters
-                    elif hasattr(tool, '__dict__') and tool.__dict__:
-                        # Look for schema in the tool's dictionary
-                        for key, value in tool.__dict__.items():
-                            if 'schema' in key.lower() or 'param' in key.lower():
-                                print(f"DEBUG: Found potential schema in {key}: {value}")
-                                if isinstance(value, dict) and 'properties' in value:
-                                    schema = value
-                                    break
-                    else:
-                        # Fallback to empty schema
-                        schema = {
-                            "type": "object",
-                            "properties": {},
-                            "required": []
-                        }
-                    
-                    # Ensure server_credentials parameter is included in the schema
-                    if schema and isinstance(schema, dict):
-                        if 'properties' not in schema:
-                            schema['properties'] = {}
-                        if 'server_credentials' not in schema['properties']:
-                            schema['properties']['server_credentials'] = {
-                                "type": "object",
-                                "description": "Server credentials (automatically provided)"
-                            }
-                        if 'required' not in schema:
-                            schema['required'] = []
-                        if 'server_credentials' not in schema['required']:
-                            schema['required'].append('server_credentials')
-                    
-                    tool_dict = {
-                        "type": "function",
-                        "function": {
-                            "name": tool.name,
-                            "description": getattr(tool, "description", f"Tool for {tool.name}"),
-                            "parameters": schema
-                        }
-                    }
-                    tools_arr.append(tool_dict)
+        with tracer.start_span("validation.list_tools", {"mcp.servers": selected_servers}) as span:
+            for server in selected_servers:
+                # Converted schemas come from the catalog built at startup, so no
+                # list_tools() round-trip or schema rewriting happens per request
+                tools_arr.extend(await tool_catalog.get_tools(server, MCPServers[server]))
+            span.set_attribute("mcp.tools.count", len(tools_arr))
 
         client_details["tools"] = tools_arr
 
@@ -108,9 +69,6 @@ async def client_and_server_validation(payload: Dict[str, Any], streaming_callba
             "selected_server_credentials": selected_server_credentials,
             "client_details": client_details
         }
-        
-        print(f"DEBUG: VALIDATION - Final payload keys: {list(final_payload.keys())}")
-        print(f"DEBUG: VALIDATION - Final selected_server_credentials: {final_payload['selected_server_credentials']}")
 
         return {
             "payload": final_payload,
@@ -119,7 +77,7 @@ async def client_and_server_validation(payload: Dict[str, Any], streaming_callba
         }
 
     except Exception as err:
-        print("Error initializing MCP ==========>>>>", err)
+        logger.exception("Error validating request: %s", err)
         return {
             "payload": None,
             "error": str(err),
@@ -0,0 +1,126 @@
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+from src.client_and_server_config import ConversationConfig
+from src.tool_router import estimate_tokens
+
+
+def compact_history(entries: List[Dict[str, Any]], config: Dict[str, Any]) -> List[Dict[str, str]]:
+    """
+    Apply the truncation policies to a conversation and return LLM chat messages.
+
+    1. Only the last keep_full_tool_results tool results keep their content;
+       older ones are replaced by a one-line stub naming the tool.
+    2. Only the last max_messages messages are kept.
+    3. While the estimate is above max_history_tokens, the oldest tool result
+       is dropped first, then the oldest message. The newest message is
+       always kept.
+    """
+    tool_positions = [i for i, entry in enumerate(entries) if entry.get("tool_name")]
+    keep_full = config["keep_full_tool_results"]
+    full_positions = set(tool_positions[-keep_full:]) if keep_full > 0 else set()
+
+    messages = []
+    for i, entry in enumerate(entries):
+        content = entry["content"]
+        if entry.get("tool_name") and i not in full_positions:
+            content = f"Executed tool: {entry['tool_name']} (older result omitted, {len(entry['content'])} characters)"
+        messages.append((entry.get("tool_name") is not None, {"role": entry["role"], "content": content}))
+
+    messages = messages[-config["max_messages"]:]
+
+    total_tokens = sum(estimate_tokens(message["content"]) for _, message in messages)
+    while total_tokens > config["max_history_tokens"] and len(messages) > 1:
+        drop_at = next((i for i, (is_tool, _) in enumerate(messages[:-1]) if is_tool), 0)
+        total_tokens -= estimate_tokens(messages.pop(drop_at)[1]["content"])
+
+    return [message for _, message in messages]
+
+
+class Conversation:
+    """History of one conversation, stored once in compact form."""
+
+    def __init__(self, conversation_id: str, owner: str, config: Dict[str, Any]):
+        self.id = conversation_id
+        self.owner = owner
+        self.config = config
+        self.entries: List[Dict[str, Any]] = []
+        self.updated_at = time.monotonic()
+        self._history: Optional[List[Dict[str, str]]] = None
+
+    def append(self, role: str, content: str, tool_name: Optional[str] = None):
+        self.entries.append({"role": role, "content": content or "", "tool_name": tool_name})
+        self.updated_at = time.monotonic()
+        self._history = None
+
+    def history(self) -> List[Dict[str, str]]:
+        """Compacted chat messages; rebuilt only after an append, so repeated calls are free."""
+        if self._history is None:
+            self._history = compact_history(self.entries, self.config)
+        return self._history
+
+
+class ConversationStore:
+    """
+    Server-side conversation histories keyed by owner and conversation_id.
+
+    Clients send only the new turn plus the conversation_id returned by the
+    previous response. The owner is the hash of the request's credentials
+    (admission.credentials_key), so a conversation_id only reaches the
+    history stored for the same credentials; the same id sent with other
+    credentials starts a separate conversation. The least recently used
+    conversations are dropped beyond max_conversations, and idle ones after
+    ttl_seconds.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self._conversations: "OrderedDict[tuple, Conversation]" = OrderedDict()
+        self.evictions = 0
+
+    def open(self, owner: str, conversation_id: Optional[str] = None, seed_history: Optional[List[Any]] = None) -> Conversation:
+        """
+        Return the owner's stored conversation, or start one seeded with the
+        chat_history the client sent (for clients that still send it).
+        """
+        self._expire()
+        conversation = self._conversations.get((owner, conversation_id)) if conversation_id else None
+        if conversation is not None:
+            self._conversations.move_to_end((owner, conversation.id))
+            return conversation
+
+        conversation = Conversation(conversation_id or uuid.uuid4().hex, owner, self.config)
+        for message in seed_history or []:
+            if isinstance(message, dict):
+                conversation.append(message.get("role", "user"), message.get("content", ""))
+            else:
+                conversation.append(message.role, message.content)
+        self._conversations[(owner, conversation.id)] = conversation
+        while len(self._conversations) > self.config["max_conversations"]:
+            self._conversations.popitem(last=False)
+            self.evictions += 1
+        return conversation
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.config["ttl_seconds"]
+        while self._conversations:
+            oldest = next(iter(self._conversations.values()))
+            if oldest.updated_at > cutoff:
+                break
+            self._conversations.popitem(last=False)
+            self.evictions += 1
+
+    def drop(self, owner: str, conversation_id: str) -> bool:
+        return self._conversations.pop((owner, conversation_id), None) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "conversations": len(self._conversations),
+            "evictions": self.evictions,
+        }
+
+
+# Global conversation store used by client_and_server_execution
+conversation_store = ConversationStore(ConversationConfig)
@@ -1,12 +1,13 @@
-import requests
+import asyncio
 import json
+import aiohttp
 from typing import Dict, List, Any, Optional, Union
 from dataclasses import dataclass, field, asdict
 
-@dataclass
-class ChatMessage:
-    role: str
-    content: str
+from src.llm.http_client import post_json, LlmHttpError, describe_transport_error
+from src.llm.streaming import collect_chat_completions_stream, DeltaCallback
+from src.llm.resilience import llm_resilience, StreamGuard
+from src.llm.deployment_pool import azure_deployment_pool
 
 @dataclass
 class SuccessResponseDataFormat:
@@ -37,14 +38,14 @@ class AzureAndOpenAiChatCompletionParams:
     vision_model: str = ''
     speech_model: str = ''
     speech_to_text: str = ''
-    chat_history: List[ChatMessage] = field(default_factory=list)
+    chat_history: List[Dict[str, str]] = field(default_factory=list)
     tools: List[Dict[str, Any]] = field(default_factory=list)
     temperature: float = 0.1
     max_tokens: int = 1000
     forced_tool_calls: Optional[Any] = None
     tool_choice: str = 'auto'
 
-async def azure_openai_processor(data: Dict[str, Any]) -> LlmResponseStruct:
+async def azure_openai_processor(data: Dict[str, Any], on_delta: Optional[DeltaCallback] = None) -> LlmResponseStruct:
     """ 
     Main Azure OpenAI Processor function
     """
@@ -61,8 +62,7 @@ async def azure_openai_processor(data: Dict[str, Any]) -> LlmResponseStruct:
             vision_model=data.get('vision_model', ''),
             speech_model=data.get('speech_model', ''),
             speech_to_text=data.get('speech_to_text', ''),
-            chat_history=[ChatMessage(**msg) if isinstance(msg, dict) else msg 
-                         for msg in data.get('chat_history', [])],
+            chat_history=data.get('chat_history', []),
             tools=data.get('tools', []),
             temperature=data.get('temperature', 0.1),
             max_tokens=data.get('max_tokens', 1000),
@@ -77,15 +77,17 @@ async def azure_openai_processor(data: Dict[str, Any]) -> LlmResponseStruct:
         elif params.input_type == 'audio':
             selected_model = params.speech_model
 
+        use_pool = azure_deployment_pool.enabled and data.get('use_deployment_pool', True)
+
         # Basic validation
-        if not params.api_key:
+        if not params.api_key and not use_pool:
             return LlmResponseStruct(Data=None, Error=Exception("OpenAI API Key is required"), Status=False)
         if params.max_tokens <= 0:
             return LlmResponseStruct(Data=None, Error=Exception("Max tokens must be > 0"), Status=False)
 
         # Build messages array
-        messages_arr = [{"role": "system", "content": params.prompt}]
-        messages_arr += [{"role": m.role, "content": m.content} for m in params.chat_history]
+        # chat_history already holds {"role", "content"} dicts, so it is used as is
+        messages_arr = [{"role": "system", "content": params.prompt}, *params.chat_history]
 
         # Prepare request payload
         payload = {
@@ -101,15 +103,38 @@ async def azure_openai_processor(data: Dict[str, Any]) -> LlmResponseStruct:
         # print(f"payload: {payload}")
 
         # Send request
-        endpoint = data.get('endpoint', '')
-        deployment_id = data.get('deployment_id', '')
-        api_version = data.get('api_version', '')
-        url = f"{endpoint}/openai/deployments/{deployment_id}/chat/completions?api-version={api_version}"
-        headers = {'Content-Type': 'application/json', 'Authorization': f'Bearer {params.api_key}'}
-
-        resp = requests.post(url, headers=headers, json=payload, timeout=60)
-        resp.raise_for_status()
-        response_data = resp.json()
+        guard = StreamGuard(on_delta) if params.is_stream and on_delta is not None else None
+        include_usage = data.get('stream_include_usage', True)
+
+        async def send(url: str, api_key: str, response_headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+            headers = {'Content-Type': 'application/json', 'Authorization': f'Bearer {api_key}'}
+            if guard is not None:
+                return await collect_chat_completions_stream(url, headers, payload, guard, include_usage=include_usage, response_headers=response_headers)
+            return await post_json(url, headers, payload, response_headers)
+
+        can_retry = (lambda: not guard.emitted) if guard is not None else (lambda: True)
+        if use_pool:
+            # Spread over the configured deployments; the pool fails over between
+            # them and the "pool" breaker/retries cover the case where all fail
+            response_data = await llm_resilience.call(
+                "MCP_CLIENT_AZURE_AI", "azure_openai", "azure_openai:pool",
+                lambda: azure_deployment_pool.call(
+                    lambda deployment, response_headers: send(deployment.url(), deployment.api_key(params.api_key), response_headers),
+                    can_retry
+                ),
+                can_retry=can_retry
+            )
+        else:
+            endpoint = data.get('endpoint', '')
+            deployment_id = data.get('deployment_id', '')
+            api_version = data.get('api_version', '')
+            url = f"{endpoint}/openai/deployments/{deployment_id}/chat/completions?api-version={api_version}"
+            # Retries and the circuit breaker are per deployment
+            response_data = await llm_resilience.call(
+                "MCP_CLIENT_AZURE_AI", "azure_openai", f"azure_openai:{endpoint}/{deployment_id}",
+                lambda: send(url, params.api_key),
+                can_retry=can_retry
+            )
 
         # Detect tool calls
         choices = response_data.get('choices', [])
@@ -137,16 +162,11 @@ async def azure_openai_processor(data: Dict[str, Any]) -> LlmResponseStruct:
         # Return as dict to avoid subscript errors
         return LlmResponseStruct(Data=asdict(final_format), Error=None, Status=True)
 
-    except requests.exceptions.RequestException as req_err:
-        err_data = None
-        if hasattr(req_err, 'response') and req_err.response is not None:
-            try:
-                err_data = req_err.response.json()
-            except ValueError:
-                err_data = req_err.response.text
-        else:
-            err_data = str(req_err)
-        return LlmResponseStruct(Data=None, Error=err_data, Status=False)
+    except LlmHttpError as http_err:
+        return LlmResponseStruct(Data=None, Error=http_err.data, Status=False)
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as req_err:
+        return LlmResponseStruct(Data=None, Error=describe_transport_error(req_err), Status=False)
 
     except Exception as err:
         return LlmResponseStruct(Data=None, Error=err, Status=False)
@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Any, Awaitable, Callable, List, Mapping, Optional, TypeVar
+
+import aiohttp
+
+from src.client_and_server_config import ClientsConfig
+from src.llm.http_client import LlmHttpError
+from src.llm.resilience import CircuitOpenError, client_policy, is_quota_error, llm_resilience, parse_retry_after, retry_reason
+from src.metrics import gateway_metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLIENT_NAME = "MCP_CLIENT_AZURE_AI"
+
+
+def _int_header(headers: Mapping[str, str], name: str) -> Optional[int]:
+    value = headers.get(name)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class AzureDeployment:
+    """One Azure OpenAI deployment of the pool with its quota, latency and health state."""
+
+    def __init__(self, entry: Dict[str, Any]):
+        self.endpoint = entry["endpoint"].rstrip("/")
+        self.deployment_id = entry["deployment_id"]
+        self.api_version = entry["api_version"]
+        self.api_key_env = entry.get("api_key_env")
+        self.name = entry.get("name") or f"{self.endpoint}/{self.deployment_id}"
+        # Same breaker key as a single-deployment call to this deployment
+        self.breaker_key = f"azure_openai:{self.endpoint}/{self.deployment_id}"
+        self.remaining_tokens: Optional[int] = None
+        self.remaining_requests: Optional[int] = None
+        self.max_remaining_tokens = 0
+        self.quota_seen_at = 0.0
+        self.latency_ewma: Optional[float] = None
+        self.cooldown_until = 0.0
+        self.consecutive_failures = 0
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+
+    def url(self) -> str:
+        return f"{self.endpoint}/openai/deployments/{self.deployment_id}/chat/completions?api-version={self.api_version}"
+
+    def api_key(self, fallback: str) -> str:
+        return (os.getenv(self.api_key_env) if self.api_key_env else None) or fallback
+
+    def observe_headers(self, headers: Mapping[str, str]):
+        """Track the x-ratelimit-remaining-* headers Azure sends with every answer."""
+        lowered = {key.lower(): value for key, value in (headers or {}).items()}
+        tokens = _int_header(lowered, "x-ratelimit-remaining-tokens")
+        requests = _int_header(lowered, "x-ratelimit-remaining-requests")
+        if tokens is None and requests is None:
+            return
+        self.remaining_tokens = tokens
+        self.remaining_requests = requests
+        if tokens is not None:
+            # The largest remaining value seen approximates the deployment's TPM limit
+            self.max_remaining_tokens = max(self.max_remaining_tokens, tokens)
+        self.quota_seen_at = time.monotonic()
+
+    def quota_fraction(self, now: float, window: float) -> float:
+        """Share of the quota left; 1.0 when unknown or older than one rate-limit window."""
+        if not self.quota_seen_at or now - self.quota_seen_at > window:
+            return 1.0
+        if self.remaining_requests == 0:
+            return 0.0
+        if self.remaining_tokens is None or not self.max_remaining_tokens:
+            return 1.0
+        return self.remaining_tokens / self.max_remaining_tokens
+
+    def record_success(self, seconds: float, alpha: float):
+        self.calls += 1
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.latency_ewma = seconds if self.latency_ewma is None else alpha * seconds + (1 - alpha) * self.latency_ewma
+
+    def record_failure(self, cooldown: float):
+        self.calls += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.cooldown_until = time.monotonic() + cooldown
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "name": self.name,
+            "remaining_tokens": self.remaining_tokens,
+            "remaining_requests": self.remaining_requests,
+            "latency_ewma_seconds": round(self.latency_ewma, 4) if self.latency_ewma is not None else None,
+            "cooling_down_seconds": round(max(0.0, self.cooldown_until - now), 2),
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "failures": self.failures,
+        }
+
+
+class AzureDeploymentPool:
+    """
+    Routes MCP_CLIENT_AZURE_AI calls across the deployments configured in
+    ClientsConfig, so throughput adds up across their separate TPM quotas.
+
+    Deployments are ranked by remaining quota (from the rate-limit headers of
+    their last answer) divided by recent latency (EWMA) and current load.
+    A 429, a 5xx or a transport error puts the deployment in cooldown (its
+    Retry-After, else the retry backoff) and the call fails over to the next
+    one at once; deployments whose circuit breaker is open are skipped. A 429
+    only cools the deployment down when it is called with its own key
+    (api_key_env), whose quota all callers share; it never counts against the
+    breaker.
+    Cooling deployments are only tried once every healthy one has failed.
+    """
+
+    def __init__(self, client_config: Dict[str, Any]):
+        pool_config = client_config.get("deployment_pool", {})
+        self.deployments = [AzureDeployment(entry) for entry in client_config.get("deployments", [])]
+        self.alpha = pool_config.get("latency_ewma_alpha", 0.3)
+        self.quota_window = pool_config.get("quota_window_seconds", 60)
+        self.default_latency = pool_config.get("default_latency_seconds", 1.0)
+        self.failovers = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.deployments)
+
+    def score(self, deployment: AzureDeployment, now: float) -> float:
+        latency = deployment.latency_ewma or self.default_latency
+        # A small floor keeps an exhausted deployment ahead of one that is cooling down
+        return (0.01 + deployment.quota_fraction(now, self.quota_window)) / (latency * (1 + deployment.in_flight))
+
+    def ranked(self) -> List[AzureDeployment]:
+        now = time.monotonic()
+        ready = [d for d in self.deployments if d.cooldown_until <= now]
+        cooling = [d for d in self.deployments if d.cooldown_until > now]
+        ready.sort(key=lambda d: self.score(d, now), reverse=True)
+        cooling.sort(key=lambda d: d.cooldown_until)
+        return ready + cooling
+
+    async def call(
+        self,
+        send: Callable[[AzureDeployment, Dict[str, str]], Awaitable[T]],
+        can_retry: Callable[[], bool] = lambda: True,
+    ) -> T:
+        """
+        Run `send(deployment, response_headers)` on the best deployment, failing
+        over to the next one on retryable errors. The last error is raised when
+        every deployment failed.
+        """
+        policy = client_policy(CLIENT_NAME)
+        last_error: Optional[Exception] = None
+        for deployment in self.ranked():
+            if last_error is not None:
+                if not can_retry():
+                    break
+                self.failovers += 1
+                gateway_metrics.record_llm_retry("azure_openai", "failover")
+                logger.info("Failing over to Azure deployment %s", deployment.name)
+
+            breaker = llm_resilience.breaker(deployment.breaker_key, policy)
+            try:
+                breaker.before_call()
+            except CircuitOpenError as err:
+                last_error = err
+                continue
+
+            response_headers: Dict[str, str] = {}
+            started = time.perf_counter()
+            deployment.in_flight += 1
+            try:
+                result = await send(deployment, response_headers)
+            except (LlmHttpError, aiohttp.ClientError, asyncio.TimeoutError) as err:
+                deployment.observe_headers(response_headers)
+                if retry_reason(err, policy) is None:
+                    breaker.record_success()
+                    raise
+                if is_quota_error(err, policy):
+                    breaker.release_probe()
+                    if not deployment.api_key_env:
+                        # The caller's own api_key ran out of quota: fail over, but leave the
+                        # deployment available to other callers
+                        logger.warning("Azure deployment %s: caller over quota (%s), failing over", deployment.name, err)
+                        last_error = err
+                        continue
+                else:
+                    breaker.record_failure()
+                cooldown = parse_retry_after(err.headers) if isinstance(err, LlmHttpError) else None
+                if cooldown is None:
+                    cooldown = min(policy["max_delay_seconds"], policy["base_delay_seconds"] * (2 ** deployment.consecutive_failures))
+                deployment.record_failure(cooldown)
+                logger.warning("Azure deployment %s failed (%s), cooling down %.1fs", deployment.name, err, cooldown)
+                last_error = err
+                continue
+            except BaseException as err:
+                # Cancelled or unexpected: no failover, but the breaker's probe slot is given back
+                breaker.record_interrupted(err)
+                raise
+            finally:
+                deployment.in_flight -= 1
+
+            breaker.record_success()
+            deployment.observe_headers(response_headers)
+            deployment.record_success(time.perf_counter() - started, self.alpha)
+            return result
+
+        raise last_error
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "failovers": self.failovers,
+            "deployments": [deployment.stats() for deployment in self.deployments],
+        }
+
+
+# Global pool of the Azure client; empty (disabled) unless deployments are configured
+azure_deployment_pool = AzureDeploymentPool(ClientsConfig.get(CLIENT_NAME) or {})
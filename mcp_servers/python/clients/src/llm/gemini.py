@@ -1,12 +1,13 @@
-import requests
+import asyncio
 import json
+import aiohttp
 from typing import Dict, List, Any, Optional, Union
 from dataclasses import dataclass, field, asdict
 
-@dataclass
-class ChatMessage:
-    role: str
-    content: str
+from src.llm.http_client import post_json, LlmHttpError, describe_transport_error
+from src.llm.streaming import collect_gemini_stream, DeltaCallback
+from src.llm.resilience import llm_resilience, StreamGuard
+from src.client_and_server_config import LlmEndpointsConfig
 
 @dataclass
 class SuccessResponseDataFormat:
@@ -36,14 +37,14 @@ class GeminiChatCompletionParams:
     chat_model: str = 'gemini-2.0-pro'
     vision_model: str = 'gemini-pro-vision'
     speech_model: str = ''
-    chat_history: List[ChatMessage] = field(default_factory=list)
+    chat_history: List[Dict[str, str]] = field(default_factory=list)
     tools: List[Dict[str, Any]] = field(default_factory=list)
     temperature: float = 0.1
     max_tokens: int = 1000
     forced_tool_calls: Optional[Any] = None
     tool_choice: str = 'auto'
 
-async def gemini_processor(data: Dict[str, Any]) -> LlmResponseStruct:
+async def gemini_processor(data: Dict[str, Any], on_delta: Optional[DeltaCallback] = None) -> LlmResponseStruct:
     """Gemini LLM Processor"""
     try:
         # Parse parameters
@@ -57,8 +58,7 @@ async def gemini_processor(data: Dict[str, Any]) -> LlmResponseStruct:
             chat_model=data.get('chat_model', 'gemini-2.0-pro'),
             vision_model=data.get('vision_model', 'gemini-pro-vision'),
             speech_model=data.get('speech_model', ''),
-            chat_history=[ChatMessage(**msg) if isinstance(msg, dict) else msg
-                          for msg in data.get('chat_history', [])],
+            chat_history=data.get('chat_history', []),
             tools=data.get('tools', []),
             temperature=data.get('temperature', 0.1),
             max_tokens=data.get('max_tokens', 1000),
@@ -81,10 +81,10 @@ async def gemini_processor(data: Dict[str, Any]) -> LlmResponseStruct:
         # Build chat contents
         chat_contents = []
         for msg in params.chat_history:
-            if msg.role in ['user', 'model']:
+            if msg["role"] in ['user', 'model']:
                 chat_contents.append({
-                    "role": msg.role,
-                    "parts": [{"text": msg.content}]
+                    "role": msg["role"],
+                    "parts": [{"text": msg["content"]}]
                 })
 
         chat_contents.append({
@@ -141,12 +141,23 @@ async def gemini_processor(data: Dict[str, Any]) -> LlmResponseStruct:
             payload["tools"] = [{"functionDeclarations": function_declarations}]
 
         # Send request
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{selected_model}:generateContent?key={params.api_key}"
         headers = {'Content-Type': 'application/json'}
-        response = requests.post(url, headers=headers, json=payload, timeout=60)
-        response.raise_for_status()
-
-        response_data = response.json()
+        base_url = LlmEndpointsConfig["gemini_base_url"].rstrip("/")
+        breaker_key = f"gemini:{selected_model}"
+        if params.is_stream and on_delta is not None:
+            url = f"{base_url}/models/{selected_model}:streamGenerateContent?alt=sse&key={params.api_key}"
+            guard = StreamGuard(on_delta)
+            response_data = await llm_resilience.call(
+                "MCP_CLIENT_GEMINI", "gemini", breaker_key,
+                lambda: collect_gemini_stream(url, headers, payload, guard),
+                can_retry=lambda: not guard.emitted
+            )
+        else:
+            url = f"{base_url}/models/{selected_model}:generateContent?key={params.api_key}"
+            response_data = await llm_resilience.call(
+                "MCP_CLIENT_GEMINI", "gemini", breaker_key,
+                lambda: post_json(url, headers, payload)
+            )
 
         message_content = response_data.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
         tool_call = response_data.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("functionCall", None)
@@ -167,16 +178,11 @@ async def gemini_processor(data: Dict[str, Any]) -> LlmResponseStruct:
 
         return LlmResponseStruct(Data=asdict(final_format), Error=None, Status=True)
 
-    except requests.exceptions.RequestException as req_err:
-        err_data = None
-        if hasattr(req_err, 'response') and req_err.response is not None:
-            try:
-                err_data = req_err.response.json()
-            except ValueError:
-                err_data = req_err.response.text
-        else:
-            err_data = str(req_err)
-        return LlmResponseStruct(Data=None, Error=err_data, Status=False)
+    except LlmHttpError as http_err:
+        return LlmResponseStruct(Data=None, Error=http_err.data, Status=False)
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as req_err:
+        return LlmResponseStruct(Data=None, Error=describe_transport_error(req_err), Status=False)
 
     except Exception as err:
         return LlmResponseStruct(Data=None, Error=err, Status=False)
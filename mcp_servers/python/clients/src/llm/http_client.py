@@ -0,0 +1,118 @@
+import json
+import aiohttp
+from typing import Dict, Any, Optional, AsyncIterator
+from urllib.parse import urlsplit
+
+from src.client_and_server_config import LlmHttpConfig
+
+
+class LlmHttpError(Exception):
+    """Raised when a provider answers with a non 2xx status code."""
+
+    def __init__(self, status: int, data: Any, headers: Optional[Dict[str, str]] = None):
+        super().__init__(f"LLM provider returned HTTP {status}")
+        self.status = status
+        self.data = data
+        self.headers = headers or {}
+
+
+# One pooled aiohttp session per provider endpoint (scheme + host), so TLS
+# connections are reused across LLM calls instead of being set up per request.
+_sessions: Dict[str, aiohttp.ClientSession] = {}
+
+
+def _endpoint_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_session(url: str) -> aiohttp.ClientSession:
+    """Return the keep-alive session for the endpoint serving `url`, creating it on first use."""
+    key = _endpoint_key(url)
+    session = _sessions.get(key)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=LlmHttpConfig["pool_limit"],
+            limit_per_host=LlmHttpConfig["pool_limit_per_host"],
+            keepalive_timeout=LlmHttpConfig["keepalive_timeout"],
+            ttl_dns_cache=LlmHttpConfig["dns_cache_ttl"],
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=LlmHttpConfig["total_timeout"],
+            connect=LlmHttpConfig["connect_timeout"],
+            sock_read=LlmHttpConfig["read_timeout"],
+        )
+        session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        _sessions[key] = session
+    return session
+
+
+async def post_json(url: str, headers: Dict[str, str], payload: Dict[str, Any], response_headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    POST `payload` as JSON and return the decoded JSON body. When given,
+    `response_headers` is filled with the response headers (rate-limit state).
+
+    Raises LlmHttpError for non 2xx answers, aiohttp.ClientError for transport
+    failures and asyncio.TimeoutError when one of the configured timeouts expires.
+    """
+    session = get_session(url)
+    async with session.post(url, headers=headers, json=payload) as resp:
+        if response_headers is not None:
+            response_headers.update(resp.headers)
+        if resp.status >= 400:
+            try:
+                err_data = await resp.json(content_type=None)
+            except ValueError:
+                err_data = await resp.text()
+            raise LlmHttpError(resp.status, err_data, dict(resp.headers))
+        return await resp.json(content_type=None)
+
+
+async def stream_sse(url: str, headers: Dict[str, str], payload: Dict[str, Any], response_headers: Optional[Dict[str, str]] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    POST `payload` and yield the JSON object of every server-sent event as it arrives.
+
+    The OpenAI "[DONE]" sentinel ends the stream. Errors and `response_headers`
+    are handled like post_json.
+    """
+    session = get_session(url)
+    async with session.post(url, headers=headers, json=payload) as resp:
+        if response_headers is not None:
+            response_headers.update(resp.headers)
+        if resp.status >= 400:
+            try:
+                err_data = await resp.json(content_type=None)
+            except ValueError:
+                err_data = await resp.text()
+            raise LlmHttpError(resp.status, err_data, dict(resp.headers))
+
+        data_lines = []
+        async for raw_line in resp.content:
+            line = raw_line.decode("utf-8").rstrip("\r\n")
+            if line.startswith("data:"):
+                data_lines.append(line[5:].lstrip())
+                continue
+            if line or not data_lines:
+                # Comments, event/id fields, or a blank line with nothing buffered
+                continue
+            event_data = "\n".join(data_lines)
+            data_lines = []
+            if event_data == "[DONE]":
+                return
+            yield json.loads(event_data)
+
+        if data_lines and data_lines != ["[DONE]"]:
+            yield json.loads("\n".join(data_lines))
+
+
+def describe_transport_error(err: Exception) -> str:
+    """asyncio.TimeoutError has an empty message, so fall back to the class name."""
+    return str(err) or err.__class__.__name__
+
+
+async def close_all_sessions():
+    """Close every pooled provider session (called on gateway shutdown)."""
+    for key in list(_sessions.keys()):
+        session = _sessions.pop(key)
+        if not session.closed:
+            await session.close()
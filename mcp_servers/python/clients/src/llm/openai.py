@@ -1,12 +1,13 @@
-import requests
+import asyncio
 import json
+import aiohttp
 from typing import Dict, List, Any, Optional, Union
 from dataclasses import dataclass, field, asdict
 
-@dataclass
-class ChatMessage:
-    role: str
-    content: str
+from src.llm.http_client import post_json, LlmHttpError, describe_transport_error
+from src.llm.streaming import collect_chat_completions_stream, DeltaCallback
+from src.llm.resilience import llm_resilience, StreamGuard
+from src.client_and_server_config import LlmEndpointsConfig
 
 @dataclass
 class SuccessResponseDataFormat:
@@ -37,14 +38,14 @@ class AzureAndOpenAiChatCompletionParams:
     vision_model: str = ''
     speech_model: str = ''
     speech_to_text: str = ''
-    chat_history: List[ChatMessage] = field(default_factory=list)
+    chat_history: List[Dict[str, str]] = field(default_factory=list)
     tools: List[Dict[str, Any]] = field(default_factory=list)
     temperature: float = 0.1
     max_tokens: int = 1000
     forced_tool_calls: Optional[Any] = None
     tool_choice: str = 'auto'
 
-async def openai_processor(data: Dict[str, Any]) -> LlmResponseStruct:
+async def openai_processor(data: Dict[str, Any], on_delta: Optional[DeltaCallback] = None) -> LlmResponseStruct:
     """ 
     Main OpenAI Processor function
     """
@@ -61,8 +62,7 @@ async def openai_processor(data: Dict[str, Any]) -> LlmResponseStruct:
             vision_model=data.get('vision_model', ''),
             speech_model=data.get('speech_model', ''),
             speech_to_text=data.get('speech_to_text', ''),
-            chat_history=[ChatMessage(**msg) if isinstance(msg, dict) else msg 
-                         for msg in data.get('chat_history', [])],
+            chat_history=data.get('chat_history', []),
             tools=data.get('tools', []),
             temperature=data.get('temperature', 0.1),
             max_tokens=data.get('max_tokens', 1000),
@@ -84,8 +84,8 @@ async def openai_processor(data: Dict[str, Any]) -> LlmResponseStruct:
             return LlmResponseStruct(Data=None, Error=Exception("Max tokens must be > 0"), Status=False)
 
         # Build messages array
-        messages_arr = [{"role": "system", "content": params.prompt}]
-        messages_arr += [{"role": m.role, "content": m.content} for m in params.chat_history]
+        # chat_history already holds {"role", "content"} dicts, so it is used as is
+        messages_arr = [{"role": "system", "content": params.prompt}, *params.chat_history]
 
         # Prepare request payload
         payload = {
@@ -101,12 +101,22 @@ async def openai_processor(data: Dict[str, Any]) -> LlmResponseStruct:
         # print(f"payload: {payload}")
 
         # Send request
-        url = f"https://api.openai.com/v1/chat/completions"
+        url = f"{LlmEndpointsConfig['openai_base_url'].rstrip('/')}/chat/completions"
         headers = {'Content-Type': 'application/json', 'Authorization': f'Bearer {params.api_key}'}
 
-        resp = requests.post(url, headers=headers, json=payload, timeout=60)
-        resp.raise_for_status()
-        response_data = resp.json()
+        breaker_key = f"openai:{selected_model}"
+        if params.is_stream and on_delta is not None:
+            guard = StreamGuard(on_delta)
+            response_data = await llm_resilience.call(
+                "MCP_CLIENT_OPENAI", "openai", breaker_key,
+                lambda: collect_chat_completions_stream(url, headers, payload, guard),
+                can_retry=lambda: not guard.emitted
+            )
+        else:
+            response_data = await llm_resilience.call(
+                "MCP_CLIENT_OPENAI", "openai", breaker_key,
+                lambda: post_json(url, headers, payload)
+            )
 
         # Detect tool calls
         choices = response_data.get('choices', [])
@@ -134,16 +144,11 @@ async def openai_processor(data: Dict[str, Any]) -> LlmResponseStruct:
         # Return as dict to avoid subscript errors
         return LlmResponseStruct(Data=asdict(final_format), Error=None, Status=True)
 
-    except requests.exceptions.RequestException as req_err:
-        err_data = None
-        if hasattr(req_err, 'response') and req_err.response is not None:
-            try:
-                err_data = req_err.response.json()
-            except ValueError:
-                err_data = req_err.response.text
-        else:
-            err_data = str(req_err)
-        return LlmResponseStruct(Data=None, Error=err_data, Status=False)
+    except LlmHttpError as http_err:
+        return LlmResponseStruct(Data=None, Error=http_err.data, Status=False)
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as req_err:
+        return LlmResponseStruct(Data=None, Error=describe_transport_error(req_err), Status=False)
 
     except Exception as err:
         return LlmResponseStruct(Data=None, Error=err, Status=False)
@@ -0,0 +1,133 @@
+import json
+from typing import Dict, List, Any, Optional
+
+from src.llm.azureopenai import azure_openai_processor, LlmResponseStruct
+from src.llm.openai import openai_processor
+from src.llm.gemini import gemini_processor
+from src.llm.streaming import DeltaCallback
+
+
+def parse_arguments(raw: str) -> Dict[str, Any]:
+    """Tool call arguments sent as a JSON string; ValueError unless they are a JSON object."""
+    arguments = json.loads(raw)
+    if not isinstance(arguments, dict):
+        raise ValueError(f"expected a JSON object, got {type(arguments).__name__}")
+    return arguments
+
+
+class ProviderAdapter:
+    """
+    What the agent loop needs to know about one LLM provider.
+
+    Request building and sending stay in the provider's processor; the adapter
+    turns the provider's raw response into the provider-neutral shapes the loop
+    works with (tool calls, text, usage).
+    """
+
+    # gen_ai.system reported on LLM spans
+    provider = ""
+    # Role used when tool results are appended to chat_history
+    history_role = "assistant"
+    # Send tools only on the first tool-calling iteration (stops Gemini re-calling tools)
+    tools_only_on_first_iteration = False
+
+    async def complete(self, client_details: Dict[str, Any], on_delta: Optional[DeltaCallback] = None) -> LlmResponseStruct:
+        """Run one LLM call; with on_delta (and is_stream set) the response text is streamed to it."""
+        raise NotImplementedError()
+
+    def extract_tool_calls(self, raw_response: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Return the tool calls of a response as [{"id", "name", "arguments"}].
+        A call whose arguments cannot be parsed gets empty arguments and an
+        "error"; it fails on its own instead of failing the whole turn.
+        """
+        raise NotImplementedError()
+
+    def extract_text(self, raw_response: Optional[Dict[str, Any]]) -> Optional[str]:
+        raise NotImplementedError()
+
+    def extract_usage(self, llm_data: Dict[str, Any]) -> Dict[str, int]:
+        return {
+            "total_tokens": llm_data.get("total_tokens", 0),
+            "total_input_tokens": llm_data.get("total_input_tokens", 0),
+            "total_output_tokens": llm_data.get("total_output_tokens", 0),
+        }
+
+
+class OpenAIChatCompletionsAdapter(ProviderAdapter):
+    """Shared parsing for the OpenAI chat completions format (OpenAI and Azure OpenAI)."""
+
+    def _first_message(self, raw_response: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        choices = (raw_response or {}).get("choices") or [{}]
+        return choices[0].get("message") or {}
+
+    def extract_tool_calls(self, raw_response):
+        tool_calls = []
+        for tool in self._first_message(raw_response).get("tool_calls") or []:
+            function = tool.get("function", {})
+            tool_call = {"id": tool.get("id"), "name": function.get("name"), "arguments": {}}
+            try:
+                tool_call["arguments"] = parse_arguments(function.get("arguments") or "{}")
+            except ValueError as err:
+                tool_call["error"] = f"Invalid arguments for tool {function.get('name')}: {err}"
+            tool_calls.append(tool_call)
+        return tool_calls
+
+    def extract_text(self, raw_response):
+        return self._first_message(raw_response).get("content")
+
+
+class AzureOpenAIAdapter(OpenAIChatCompletionsAdapter):
+    provider = "azure_openai"
+
+    async def complete(self, client_details, on_delta=None):
+        return await azure_openai_processor(client_details, on_delta)
+
+
+class OpenAIAdapter(OpenAIChatCompletionsAdapter):
+    provider = "openai"
+
+    async def complete(self, client_details, on_delta=None):
+        return await openai_processor(client_details, on_delta)
+
+
+class GeminiAdapter(ProviderAdapter):
+    provider = "gemini"
+    history_role = "model"
+    tools_only_on_first_iteration = True
+
+    def _parts(self, raw_response: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        candidates = (raw_response or {}).get("candidates") or [{}]
+        content = candidates[0].get("content") or {}
+        return content.get("parts") or []
+
+    async def complete(self, client_details, on_delta=None):
+        return await gemini_processor(client_details, on_delta)
+
+    def extract_tool_calls(self, raw_response):
+        tool_calls = []
+        for part in self._parts(raw_response):
+            function_call = part.get("functionCall")
+            if not function_call:
+                continue
+            tool_call = {"id": part.get("id"), "name": function_call.get("name"), "arguments": {}}
+            args = function_call.get("args") or {}
+            try:
+                # Older responses carry args as a JSON string
+                tool_call["arguments"] = parse_arguments(args) if isinstance(args, str) else args
+            except ValueError as err:
+                tool_call["error"] = f"Invalid arguments for tool {function_call.get('name')}: {err}"
+            tool_calls.append(tool_call)
+        return tool_calls
+
+    def extract_text(self, raw_response):
+        texts = [part["text"] for part in self._parts(raw_response) if part.get("text")]
+        return "".join(texts) if texts else None
+
+
+# Adapter per entry of ClientsConfig
+ProviderAdapters: Dict[str, ProviderAdapter] = {
+    "MCP_CLIENT_AZURE_AI": AzureOpenAIAdapter(),
+    "MCP_CLIENT_OPENAI": OpenAIAdapter(),
+    "MCP_CLIENT_GEMINI": GeminiAdapter(),
+}
@@ -0,0 +1,283 @@
+import asyncio
+import contextvars
+import logging
+import math
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Awaitable, Callable, Mapping, Optional, TypeVar
+
+import aiohttp
+
+from src.client_and_server_config import ClientsConfig, LlmResilienceConfig
+from src.llm.http_client import LlmHttpError
+from src.llm.streaming import DeltaCallback
+from src.metrics import gateway_metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Retries still allowed for the current gateway request (shared by its LLM calls)
+_retry_budget: contextvars.ContextVar = contextvars.ContextVar("llm_retry_budget", default=None)
+
+
+def client_policy(client_name: str) -> Dict[str, Any]:
+    """LlmResilienceConfig with the client's overrides from ClientsConfig applied."""
+    return {**LlmResilienceConfig, **(ClientsConfig.get(client_name) or {}).get("resilience", {})}
+
+
+def start_retry_budget(client_name: str):
+    """Called once per gateway request; every LLM call of the request then draws from one budget."""
+    _retry_budget.set([client_policy(client_name)["max_retries_per_request"]])
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds requested by retry-after-ms, or Retry-After as seconds or an HTTP date."""
+    lowered = {key.lower(): value for key, value in (headers or {}).items()}
+    if "retry-after-ms" in lowered:
+        try:
+            return max(0.0, float(lowered["retry-after-ms"]) / 1000)
+        except ValueError:
+            pass
+    value = lowered.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_quota_error(err: Exception, policy: Dict[str, Any]) -> bool:
+    """A quota answer (429) is about the caller's api_key, not about the provider's health."""
+    return isinstance(err, LlmHttpError) and err.status in policy["quota_statuses"]
+
+
+def retry_reason(err: Exception, policy: Dict[str, Any]) -> Optional[str]:
+    """Why `err` is worth retrying (or failing over), or None for errors the provider will repeat."""
+    if isinstance(err, LlmHttpError):
+        return f"http_{err.status}" if err.status in policy["retry_statuses"] else None
+    if isinstance(err, (aiohttp.ClientError, asyncio.TimeoutError)):
+        return err.__class__.__name__
+    return None
+
+
+class CircuitOpenError(LlmHttpError):
+    """Raised without calling the provider while its circuit breaker is open."""
+
+    def __init__(self, key: str, retry_after: float):
+        seconds = max(1, math.ceil(retry_after))
+        data = {"error": {"code": "circuit_open", "message": f"LLM provider {key} is unavailable, retry after {seconds}s"}}
+        super().__init__(503, data, {"Retry-After": str(seconds)})
+        self.key = key
+
+
+class CircuitBreaker:
+    """
+    Per provider/deployment breaker.
+
+    closed    - calls go through; failure_threshold consecutive failures open it
+    open      - calls fail at once with CircuitOpenError for open_seconds
+    half_open - up to half_open_max_calls probe calls; a success closes it,
+                a failure opens it again
+
+    Breakers are keyed by provider and model/deployment and shared by every
+    caller, whatever their api_key; quota errors are therefore kept out of
+    them (release_probe) and only retried.
+    """
+
+    def __init__(self, key: str, policy: Dict[str, Any]):
+        self.key = key
+        self.failure_threshold = policy["failure_threshold"]
+        self.open_seconds = policy["open_seconds"]
+        self.half_open_max_calls = policy["half_open_max_calls"]
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.times_opened = 0
+        self.short_circuited = 0
+
+    def before_call(self):
+        if self.state == "open":
+            remaining = self.opened_at + self.open_seconds - time.monotonic()
+            if remaining > 0:
+                self.short_circuited += 1
+                raise CircuitOpenError(self.key, remaining)
+            self.state = "half_open"
+            self.half_open_calls = 0
+        if self.state == "half_open":
+            if self.half_open_calls >= self.half_open_max_calls:
+                self.short_circuited += 1
+                raise CircuitOpenError(self.key, self.open_seconds)
+            self.half_open_calls += 1
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        if self.state != "closed":
+            logger.info("Circuit breaker %s closed", self.key)
+        self.state = "closed"
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+                logger.warning("Circuit breaker %s opened after %d failures", self.key, self.consecutive_failures)
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def record_interrupted(self, err: BaseException):
+        """
+        Outcome of a call that ended in neither a provider answer nor a known
+        provider error. Unexpected exceptions count as failures; a cancelled
+        call (client disconnect, shutdown) says nothing about the provider and
+        only gives its half-open probe slot back. Either way the slot taken by
+        before_call() is released, so the breaker cannot stay half_open.
+        """
+        if isinstance(err, Exception):
+            self.record_failure()
+        else:
+            self.release_probe()
+
+    def release_probe(self):
+        """Neither success nor failure: give back the half-open probe slot taken by before_call()."""
+        if self.state == "half_open" and self.half_open_calls > 0:
+            self.half_open_calls -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "short_circuited": self.short_circuited,
+        }
+
+
+class StreamGuard:
+    """Wraps on_delta; a streamed call is only retried while nothing reached the client."""
+
+    def __init__(self, on_delta: DeltaCallback):
+        self.on_delta = on_delta
+        self.emitted = False
+
+    async def __call__(self, text: str):
+        self.emitted = True
+        await self.on_delta(text)
+
+
+class LlmResilience:
+    """
+    Retries with jittered exponential backoff and per provider/deployment
+    circuit breakers around the provider HTTP calls of src/llm.
+
+    Retried: transport errors, timeouts and the statuses in retry_statuses.
+    A Retry-After (or retry-after-ms) header replaces the backoff delay; when
+    it asks for more than max_retry_after_seconds the error is returned at
+    once. Retries are capped per call and per gateway request. Quota errors
+    (quota_statuses) are retried but not counted against the breaker; other
+    client errors (4xx) are neither retried nor counted.
+    """
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.retries = 0
+        self.gave_up = 0
+
+    def breaker(self, key: str, policy: Dict[str, Any]) -> CircuitBreaker:
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(key, policy)
+            self._breakers[key] = breaker
+        return breaker
+
+    @staticmethod
+    def backoff(policy: Dict[str, Any], attempt: int) -> float:
+        # "full jitter": uniform in [0, min(max_delay, base * 2^attempt)]
+        return random.uniform(0, min(policy["max_delay_seconds"], policy["base_delay_seconds"] * (2 ** attempt)))
+
+    @staticmethod
+    def _take_retry() -> bool:
+        budget = _retry_budget.get()
+        if budget is None:
+            return True
+        if budget[0] <= 0:
+            return False
+        budget[0] -= 1
+        return True
+
+    async def call(
+        self,
+        client_name: str,
+        provider: str,
+        breaker_key: str,
+        send: Callable[[], Awaitable[T]],
+        can_retry: Callable[[], bool] = lambda: True,
+    ) -> T:
+        """Run `send` (one provider HTTP call) under the client's retry policy and the key's breaker."""
+        policy = client_policy(client_name)
+        if not policy["enabled"]:
+            return await send()
+        breaker = self.breaker(breaker_key, policy)
+        attempt = 0
+        while True:
+            breaker.before_call()
+            try:
+                result = await send()
+            except (LlmHttpError, aiohttp.ClientError, asyncio.TimeoutError) as err:
+                reason = retry_reason(err, policy)
+                if reason is None:
+                    # The provider is healthy, the request is not
+                    breaker.record_success()
+                    raise
+                if is_quota_error(err, policy):
+                    breaker.release_probe()
+                else:
+                    breaker.record_failure()
+                delay = None
+                if isinstance(err, LlmHttpError) and policy["respect_retry_after"]:
+                    delay = parse_retry_after(err.headers)
+                error = err
+            except BaseException as err:
+                breaker.record_interrupted(err)
+                raise
+            else:
+                breaker.record_success()
+                return result
+
+            if delay is None:
+                delay = self.backoff(policy, attempt)
+            if (
+                attempt >= policy["max_retries"]
+                or delay > policy["max_retry_after_seconds"]
+                or breaker.state == "open"
+                or not can_retry()
+                or not self._take_retry()
+            ):
+                self.gave_up += 1
+                raise error
+
+            attempt += 1
+            self.retries += 1
+            gateway_metrics.record_llm_retry(provider, reason)
+            logger.info("Retrying %s call (%s), attempt %d in %.2fs", breaker_key, reason, attempt, delay)
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "retries": self.retries,
+            "gave_up": self.gave_up,
+            "circuit_breakers": {key: breaker.stats() for key, breaker in self._breakers.items()},
+        }
+
+    def breaker_states(self) -> Dict[str, str]:
+        return {key: breaker.state for key, breaker in self._breakers.items()}
+
+
+# Global resilience layer shared by the LLM processors
+llm_resilience = LlmResilience()
@@ -0,0 +1,122 @@
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+from src.llm.http_client import stream_sse
+
+# Receives each piece of response text as soon as the provider sends it
+DeltaCallback = Callable[[str], Awaitable[None]]
+
+
+async def collect_chat_completions_stream(
+    url: str,
+    headers: Dict[str, str],
+    payload: Dict[str, Any],
+    on_delta: DeltaCallback,
+    include_usage: bool = True,
+    response_headers: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Stream an OpenAI / Azure OpenAI chat completion.
+
+    Text deltas are forwarded to on_delta as they arrive and tool-call deltas
+    are assembled by index. The return value has the shape of a non-streamed
+    response, so callers parse both the same way.
+    """
+    payload = dict(payload, stream=True)
+    if include_usage:
+        payload["stream_options"] = {"include_usage": True}
+
+    content_parts: List[str] = []
+    tool_calls: Dict[int, Dict[str, Any]] = {}
+    finish_reason = None
+    usage: Dict[str, Any] = {}
+    response_meta: Dict[str, Any] = {}
+
+    async for chunk in stream_sse(url, headers, payload, response_headers):
+        if not response_meta and chunk.get("id"):
+            response_meta = {key: chunk.get(key) for key in ("id", "created", "model")}
+        if chunk.get("usage"):
+            usage = chunk["usage"]
+
+        for choice in chunk.get("choices") or []:
+            delta = choice.get("delta") or {}
+            text = delta.get("content")
+            if text:
+                content_parts.append(text)
+                await on_delta(text)
+
+            for tool_delta in delta.get("tool_calls") or []:
+                tool_call = tool_calls.setdefault(tool_delta.get("index", 0), {
+                    "id": None,
+                    "type": "function",
+                    "function": {"name": "", "arguments": ""},
+                })
+                if tool_delta.get("id"):
+                    tool_call["id"] = tool_delta["id"]
+                function_delta = tool_delta.get("function") or {}
+                if function_delta.get("name"):
+                    tool_call["function"]["name"] += function_delta["name"]
+                if function_delta.get("arguments"):
+                    tool_call["function"]["arguments"] += function_delta["arguments"]
+
+            if choice.get("finish_reason"):
+                finish_reason = choice["finish_reason"]
+
+    message: Dict[str, Any] = {
+        "role": "assistant",
+        "content": "".join(content_parts) if content_parts else None,
+    }
+    if tool_calls:
+        message["tool_calls"] = [tool_calls[index] for index in sorted(tool_calls)]
+
+    return {
+        **response_meta,
+        "object": "chat.completion",
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+        "usage": usage,
+    }
+
+
+async def collect_gemini_stream(
+    url: str,
+    headers: Dict[str, str],
+    payload: Dict[str, Any],
+    on_delta: DeltaCallback
+) -> Dict[str, Any]:
+    """
+    Stream a Gemini streamGenerateContent (alt=sse) response.
+
+    Text parts are forwarded to on_delta and merged; function calls arrive
+    whole in a chunk and are kept as they are. Returns a generateContent shaped
+    response.
+    """
+    parts: List[Dict[str, Any]] = []
+    text_parts: List[str] = []
+    finish_reason: Optional[str] = None
+    usage: Dict[str, Any] = {}
+
+    async for chunk in stream_sse(url, headers, payload):
+        if chunk.get("usageMetadata"):
+            usage = chunk["usageMetadata"]
+        candidates = chunk.get("candidates") or []
+        if not candidates:
+            continue
+        candidate = candidates[0]
+        for part in (candidate.get("content") or {}).get("parts") or []:
+            if part.get("text"):
+                text_parts.append(part["text"])
+                await on_delta(part["text"])
+            else:
+                parts.append(part)
+        if candidate.get("finishReason"):
+            finish_reason = candidate["finishReason"]
+
+    if text_parts:
+        parts.insert(0, {"text": "".join(text_parts)})
+
+    return {
+        "candidates": [{
+            "content": {"role": "model", "parts": parts},
+            "finishReason": finish_reason,
+        }],
+        "usageMetadata": usage,
+    }
@@ -0,0 +1,148 @@
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import sys
+from typing import Dict, Any, Optional
+
+REDACTED = "***"
+
+# Filled from LoggingConfig["redact_keys"] by configure_logging
+_redact_keys = {"server_credentials", "__credentials__", "api_key", "authorization"}
+_redact_text_re: Optional[re.Pattern] = None
+
+
+def _build_text_pattern(keys) -> re.Pattern:
+    # key: value / key=value in already formatted text (f-strings, reprs); one nesting level of {...}
+    names = "|".join(re.escape(key) for key in sorted(keys, key=len, reverse=True))
+    return re.compile(
+        r"(['\"]?(?:" + names + r")['\"]?\s*[:=]\s*)(\{(?:[^{}]|\{[^{}]*\})*\}|'[^']*'|\"[^\"]*\"|[^\s,}]+)",
+        re.IGNORECASE,
+    )
+
+
+def redact(value: Any) -> Any:
+    """Copy of `value` with every secret key's value masked, at any depth."""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if isinstance(key, str) and key.lower() in _redact_keys else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return type(value)(redact(item) for item in value)
+    return value
+
+
+def redact_text(text: str) -> str:
+    if _redact_text_re is None:
+        return text
+    return _redact_text_re.sub(lambda match: match.group(1) + REDACTED, text)
+
+
+class RedactionFilter(logging.Filter):
+    """Mask secrets in log arguments (structurally) and in pre-formatted messages."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.args:
+            if isinstance(record.args, dict):
+                record.args = redact(record.args)
+            else:
+                record.args = tuple(redact(arg) for arg in record.args)
+        elif isinstance(record.msg, str):
+            record.msg = redact_text(record.msg)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg and any `extra` fields."""
+
+    _RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in self._RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(redact(entry), default=str)
+
+
+class DeferredFormatQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener's handlers.
+
+    The stdlib prepare() formats the record on the logging thread and drops
+    exc_info, which both puts the formatting back on the event loop and
+    leaves JsonFormatter without the exception. Here only the message is
+    bound to its arguments (they may change after the call returns); the
+    traceback goes to the listener with the record.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(config: Dict[str, Any]) -> logging.handlers.QueueListener:
+    """
+    Route every log record through a queue so formatting of the output
+    (including tracebacks) and the stdout/file I/O happen on a listener
+    thread, off the event loop.
+
+    `config` is LoggingConfig: root level, per-logger levels, text or json
+    format, optional file, and the keys whose values are redacted.
+    """
+    global _listener, _redact_keys, _redact_text_re
+    if _listener is not None:
+        return _listener
+
+    _redact_keys = {key.lower() for key in config["redact_keys"]}
+    _redact_text_re = _build_text_pattern(_redact_keys)
+
+    if config["format"] == "json":
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s", "%Y-%m-%d %H:%M:%S")
+
+    output_handlers = [logging.StreamHandler(sys.stdout)]
+    if config.get("file"):
+        output_handlers.append(logging.FileHandler(config["file"]))
+    for handler in output_handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = DeferredFormatQueueHandler(log_queue)
+    queue_handler.addFilter(RedactionFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(config["level"])
+    for name, level in config.get("levels", {}).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *output_handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,226 @@
+import logging
+import re
+from typing import Dict, Any, Callable, Iterable
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, ProcessCollector, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import GaugeMetricFamily
+
+from src.client_and_server_config import MetricsConfig
+
+logger = logging.getLogger(__name__)
+
+# error_class values passed as strings; anything else (provider messages, transport
+# error text, HTML bodies) would leak into labels and grow them without bound
+ERROR_CLASSES = {"budget_exceeded", "provider_error"}
+_HTTP_ERROR_CLASS = re.compile(r"^http_[1-5][0-9]{2}$")
+
+
+class GatewayStateCollector:
+    """
+    Gauges read at scrape time from the objects that already track them
+    (session pools, server readiness, SSE and trace export queues), so the hot
+    path does not have to keep a second copy up to date.
+    """
+
+    def __init__(self):
+        self._sources: Dict[str, Callable[[], Any]] = {}
+
+    def register(self, name: str, source: Callable[[], Any]):
+        self._sources[name] = source
+
+    def _read(self, name: str, default: Any) -> Any:
+        source = self._sources.get(name)
+        if source is None:
+            return default
+        try:
+            return source()
+        except Exception as err:
+            logger.debug("Metrics source %s failed: %s", name, err)
+            return default
+
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        server_up = GaugeMetricFamily("mcp_gateway_mcp_server_up", "1 when the MCP server finished startup and is serving", labels=["server"])
+        for server, status in self._read("server_status", {}).items():
+            server_up.add_metric([server], 1.0 if status.get("status") == "ready" else 0.0)
+
+        sessions_alive = GaugeMetricFamily("mcp_gateway_mcp_sessions_alive", "Live sessions in the server's pool", labels=["server"])
+        sessions_size = GaugeMetricFamily("mcp_gateway_mcp_sessions_configured", "Configured pool size of the server", labels=["server"])
+        sessions_in_flight = GaugeMetricFamily("mcp_gateway_mcp_tool_calls_in_flight", "Tool calls running on the server's sessions", labels=["server"])
+        for server, stats in self._read("session_pools", {}).items():
+            sessions_alive.add_metric([server], stats["alive"])
+            sessions_size.add_metric([server], stats["size"])
+            sessions_in_flight.add_metric([server], stats["in_flight"])
+
+        queue_depth = GaugeMetricFamily("mcp_gateway_queue_depth", "Items waiting in an internal queue", labels=["queue", "server"])
+        for server, stats in self._read("session_pools", {}).items():
+            queue_depth.add_metric(["session_lease", server], stats["waiters"])
+        queue_depth.add_metric(["sse_events", ""], self._read("sse_queue_depth", 0))
+        queue_depth.add_metric(["trace_export", ""], self._read("trace_queue_depth", 0))
+        queue_depth.add_metric(["admission", ""], self._read("admission_queue_depth", 0))
+
+        breaker_open = GaugeMetricFamily("mcp_gateway_llm_circuit_open", "1 while the LLM circuit breaker is open or half open", labels=["breaker"])
+        for key, state in self._read("circuit_breakers", {}).items():
+            breaker_open.add_metric([key], 0.0 if state == "closed" else 1.0)
+
+        deployment_tokens = GaugeMetricFamily("mcp_gateway_azure_deployment_remaining_tokens", "Remaining tokens reported by the deployment's last answer", labels=["deployment"])
+        deployment_latency = GaugeMetricFamily("mcp_gateway_azure_deployment_latency_ewma_seconds", "Recent latency (EWMA) of the deployment", labels=["deployment"])
+        deployment_healthy = GaugeMetricFamily("mcp_gateway_azure_deployment_healthy", "0 while the deployment is cooling down after a failure", labels=["deployment"])
+        for deployment in self._read("azure_deployments", []):
+            if deployment["remaining_tokens"] is not None:
+                deployment_tokens.add_metric([deployment["name"]], deployment["remaining_tokens"])
+            if deployment["latency_ewma_seconds"] is not None:
+                deployment_latency.add_metric([deployment["name"]], deployment["latency_ewma_seconds"])
+            deployment_healthy.add_metric([deployment["name"]], 0.0 if deployment["cooling_down_seconds"] else 1.0)
+
+        active_streams = GaugeMetricFamily("mcp_gateway_active_streams", "Open SSE streams")
+        active_streams.add_metric([], self._read("active_streams", 0))
+
+        return [server_up, sessions_alive, sessions_size, sessions_in_flight, queue_depth, breaker_open,
+                deployment_tokens, deployment_latency, deployment_healthy, active_streams]
+
+
+class GatewayMetrics:
+    """
+    Prometheus metrics of the gateway, served by run.py on /metrics.
+
+    Metrics live in their own registry so only gateway metrics (plus the
+    process collector) are exported. Label values are bounded: routes are URL
+    rules rather than paths, tool names outside the server's tool catalog are
+    recorded as "unknown" by the caller, and error classes are mapped by
+    error_class().
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.enabled = config["enabled"]
+        self.registry = CollectorRegistry()
+        ProcessCollector(registry=self.registry)
+        self.state = GatewayStateCollector()
+        self.registry.register(self.state)
+
+        self.request_latency = Histogram(
+            "mcp_gateway_request_duration_seconds",
+            "Gateway request latency until the response (or the first byte of a stream) is returned",
+            ["route", "method", "status"],
+            buckets=config["request_buckets"],
+            registry=self.registry,
+        )
+        self.requests_in_flight = Gauge(
+            "mcp_gateway_requests_in_flight",
+            "Requests currently being handled",
+            ["route"],
+            registry=self.registry,
+        )
+        self.stream_duration = Histogram(
+            "mcp_gateway_stream_duration_seconds",
+            "Duration of SSE streams by outcome",
+            ["outcome"],
+            buckets=config["request_buckets"],
+            registry=self.registry,
+        )
+        self.llm_latency = Histogram(
+            "mcp_gateway_llm_request_duration_seconds",
+            "Latency of one LLM call",
+            ["provider", "phase", "status"],
+            buckets=config["llm_buckets"],
+            registry=self.registry,
+        )
+        self.llm_tokens = Counter(
+            "mcp_gateway_llm_tokens",
+            "Tokens reported by the LLM providers",
+            ["provider", "direction"],
+            registry=self.registry,
+        )
+        self.tool_latency = Histogram(
+            "mcp_gateway_tool_call_duration_seconds",
+            "Latency of one MCP tool call, including the wait for a session",
+            ["server", "tool", "status"],
+            buckets=config["tool_buckets"],
+            registry=self.registry,
+        )
+        self.llm_retries = Counter(
+            "mcp_gateway_llm_retries",
+            "Retried LLM calls by provider and reason",
+            ["provider", "reason"],
+            registry=self.registry,
+        )
+        self.admission_wait = Histogram(
+            "mcp_gateway_admission_wait_seconds",
+            "Time a request waited for an admission slot, by configured tenant (\"other\" for the rest)",
+            ["tenant"],
+            buckets=config["admission_buckets"],
+            registry=self.registry,
+        )
+        self.admission_rejections = Counter(
+            "mcp_gateway_admission_rejections",
+            "Requests answered with 429, by reason",
+            ["reason"],
+            registry=self.registry,
+        )
+        self.errors = Counter(
+            "mcp_gateway_errors",
+            "Errors by component and class",
+            ["component", "error_class"],
+            registry=self.registry,
+        )
+
+    def record_llm_retry(self, provider: str, reason: str):
+        if self.enabled:
+            self.llm_retries.labels(provider, reason).inc()
+
+    def observe_admission_wait(self, tenant: str, seconds: float):
+        if self.enabled:
+            self.admission_wait.labels(tenant).observe(seconds)
+
+    def record_admission_rejection(self, reason: str):
+        if self.enabled:
+            self.admission_rejections.labels(reason).inc()
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float):
+        if self.enabled:
+            self.request_latency.labels(route, method, str(status)).observe(seconds)
+
+    def observe_stream(self, outcome: str, seconds: float):
+        if self.enabled:
+            self.stream_duration.labels(outcome).observe(seconds)
+
+    def observe_llm_call(self, provider: str, phase: str, ok: bool, seconds: float, input_tokens: int = 0, output_tokens: int = 0):
+        if not self.enabled:
+            return
+        self.llm_latency.labels(provider, phase, "ok" if ok else "error").observe(seconds)
+        if input_tokens:
+            self.llm_tokens.labels(provider, "in").inc(input_tokens)
+        if output_tokens:
+            self.llm_tokens.labels(provider, "out").inc(output_tokens)
+
+    def observe_tool_call(self, server: str, tool: str, status: str, seconds: float):
+        if self.enabled:
+            self.tool_latency.labels(server, tool, status).observe(seconds)
+
+    @staticmethod
+    def error_class(error: Any) -> str:
+        """
+        Bounded label for an error: http_<status> for HTTP errors, the class
+        name of other exceptions, a string from ERROR_CLASSES or http_<status>
+        as is, and provider_error for everything else.
+        """
+        if isinstance(error, BaseException):
+            status = getattr(error, "status", None)
+            if isinstance(status, int) and 100 <= status <= 599:
+                return f"http_{status}"
+            return error.__class__.__name__
+        if isinstance(error, str) and (error in ERROR_CLASSES or _HTTP_ERROR_CLASS.match(error)):
+            return error
+        return "provider_error"
+
+    def record_error(self, component: str, error: Any):
+        """Count an error; `error` is an exception, an error class name or a provider error payload."""
+        if self.enabled:
+            self.errors.labels(component, self.error_class(error)).inc()
+
+    def render(self) -> tuple:
+        """Body and content type of the /metrics response."""
+        return generate_latest(self.registry), CONTENT_TYPE_LATEST
+
+
+# Global metrics used by run.py, execution and the SSE pipeline
+gateway_metrics = GatewayMetrics(MetricsConfig)
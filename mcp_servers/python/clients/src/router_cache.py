@@ -0,0 +1,157 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+from src.client_and_server_config import RouterCacheConfig
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " .,!?;:'\"`"
+
+
+def normalize_input(text: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation so near-identical inputs share a key."""
+    return _WHITESPACE_RE.sub(" ", (text or "").lower()).strip(_EDGE_PUNCTUATION)
+
+
+class RouterDecisionCache:
+    """
+    LRU + TTL cache of router decisions (extract_data_from_response results).
+
+    Keys hash the normalized user input, the conversation turns before it (the
+    router sees them, so "yes, do that" is only answered from the same
+    context), the selected server and the version of the server's tool
+    catalog, so a catalog change never serves a stale selection. With a persist_path the cache is loaded at startup, written every
+    persist_every new entries and again on shutdown.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.enabled = config["enabled"]
+        self.max_entries = config["max_entries"]
+        self.ttl_seconds = config["ttl_seconds"]
+        self.persist_path = config.get("persist_path")
+        self.persist_every = config["persist_every"]
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._puts_since_save = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_tokens = 0
+
+    @staticmethod
+    def make_key(user_input: str, server_name: str, catalog_version: str, prior_turns: Optional[List[Dict[str, Any]]] = None) -> str:
+        context = json.dumps([[turn.get("role"), turn.get("content")] for turn in prior_turns or []], default=str)
+        raw = "\x1f".join((normalize_input(user_input), server_name, catalog_version, context))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return {"decision", "router_tokens"} for a live entry, or None."""
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is not None and entry["expires_at"] <= time.time():
+            del self._entries[key]
+            self.evictions += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self.saved_tokens += entry["router_tokens"]
+        return {
+            "decision": {
+                "isFunctionCall": entry["decision"]["isFunctionCall"],
+                "selectedTools": list(entry["decision"]["selectedTools"]),
+            },
+            "router_tokens": entry["router_tokens"],
+        }
+
+    def put(self, key: str, decision: Dict[str, Any], router_tokens: int):
+        if not self.enabled:
+            return
+        self._entries[key] = {
+            "decision": {
+                "isFunctionCall": decision["isFunctionCall"],
+                "selectedTools": list(decision["selectedTools"]),
+            },
+            "router_tokens": router_tokens,
+            "expires_at": time.time() + self.ttl_seconds,
+        }
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+        self._puts_since_save += 1
+        if self.persist_path and self._puts_since_save >= self.persist_every:
+            self.save()
+
+    def clear(self):
+        self._entries.clear()
+
+    def load(self):
+        """Warm the cache from persist_path, skipping entries that expired while the gateway was down."""
+        if not (self.enabled and self.persist_path and os.path.exists(self.persist_path)):
+            return
+        try:
+            with open(self.persist_path, "r") as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as err:
+            logger.warning("Error loading router cache from %s: %s", self.persist_path, err)
+            return
+        now = time.time()
+        for key, entry in stored.get("entries", []):
+            if entry.get("expires_at", 0) > now:
+                self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        logger.info("Router cache: loaded %d entries from %s", len(self._entries), self.persist_path)
+
+    def save(self):
+        if not (self.enabled and self.persist_path):
+            return
+        tmp_path = f"{self.persist_path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"entries": list(self._entries.items())}, f)
+            os.replace(tmp_path, self.persist_path)
+            self._puts_since_save = 0
+        except OSError as err:
+            logger.warning("Error saving router cache to %s: %s", self.persist_path, err)
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return round(self.hits / lookups, 4) if lookups else 0.0
+
+    def report(self, hit: bool, saved_tokens: int) -> Dict[str, Any]:
+        """Per-request block returned in Data["router_cache"]."""
+        return {
+            "hit": hit,
+            "hit_rate": self.hit_rate(),
+            "evictions": self.evictions,
+            "saved_tokens": saved_tokens,
+            "total_saved_tokens": self.saved_tokens,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate(),
+            "evictions": self.evictions,
+            "saved_tokens": self.saved_tokens,
+        }
+
+
+# Global router decision cache used by client_and_server_execution
+router_cache = RouterDecisionCache(RouterCacheConfig)
@@ -1,13 +1,16 @@
 import os
+import time
 import asyncio
+import logging
 import warnings
 from typing import Dict, Any
 
-from contextlib import AsyncExitStack
-from src.client_and_server_config import ServersConfig
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
-from mcp import ClientSession, StdioServerParameters
+from src.client_and_server_config import ServersConfig, MCPSessionPoolConfig, MCPStartupConfig
+from src.tool_catalog import tool_catalog
+from src.session_pool import MCPSessionPool
+from mcp import types
+
+logger = logging.getLogger(__name__)
 
 # Suppress warnings about unclosed transports
 warnings.filterwarnings("ignore", category=ResourceWarning, message="unclosed transport .*")
@@ -16,57 +19,89 @@ warnings.filterwarnings("ignore", category=ResourceWarning, message="unclosed tr
 # Suppress specific ResourceWarning related to unclosed transport
 warnings.filterwarnings("ignore", category=ResourceWarning, message="unclosed transport .*")
 
-# Global session store
-MCPServers: Dict[str, ClientSession] = {}
+# Global session pool store, one pool per ready server
+MCPServers: Dict[str, MCPSessionPool] = {}
+
+# Readiness report per configured server: status is starting, ready, failed, timed_out or cancelled
+MCPServerStatus: Dict[str, Dict[str, Any]] = {}
+
+
+def tool_list_changed_handler(server_name: str):
+    """Build a message handler that drops the server's cached tool catalog on tools/list_changed."""
+    async def handler(message: Any):
+        notification = getattr(message, "root", message)
+        if isinstance(notification, types.ToolListChangedNotification):
+            logger.info("Tool list changed for %s, invalidating catalog", server_name)
+            tool_catalog.invalidate(server_name)
+    return handler
+
+
+async def initialize_mcp_server(server: Dict[str, Any]):
+    """Start one server's session pool and catalog, recording its readiness in MCPServerStatus"""
+    server_name = server["server_name"]
+    startup_timeout = float(server.get("startup_timeout", MCPStartupConfig["startup_timeout"]))
+    status = {"status": "starting", "startup_latency": None, "error": None}
+    MCPServerStatus[server_name] = status
+    started = time.perf_counter()
+
+    # Optional directory existence check
+    if "--directory" in server["args"]:
+        dir_index = server["args"].index("--directory")
+        if dir_index + 1 < len(server["args"]):
+            absolute_path = os.path.abspath(server["args"][dir_index + 1])
+            if not os.path.exists(absolute_path):
+                logger.warning("%s: directory %s does not exist", server_name, absolute_path)
+
+    pool = MCPSessionPool(server, MCPSessionPoolConfig, message_handler=tool_list_changed_handler(server_name))
 
+    async def start_pool():
+        await pool.start()
+        # Confirm connection and build the tool catalog
+        return await tool_catalog.refresh(server_name, pool)
 
-async def initialize_all_mcp(exit_stack):
-    """Initialize all MCP clients based on server configuration"""
+    ready = False
+    try:
+        catalog_entry = await asyncio.wait_for(start_pool(), startup_timeout)
+        status["startup_latency"] = round(time.perf_counter() - started, 3)
+        # Register the pool only once it can serve requests
+        MCPServers[server_name] = pool
+        ready = True
+        status["status"] = "ready"
+        logger.info("Connected to %s with tools: %s", server_name, list(catalog_entry["index"].keys()))
+    except asyncio.CancelledError:
+        # Gateway shutdown while starting: the pool is not in MCPServers, so shutdown_all_mcp() won't close it
+        status["status"] = "cancelled"
+        raise
+    except Exception as err:
+        status["startup_latency"] = round(time.perf_counter() - started, 3)
+        if isinstance(err, asyncio.TimeoutError):
+            status["status"] = "timed_out"
+            status["error"] = f"Startup exceeded {startup_timeout}s"
+        else:
+            status["status"] = "failed"
+            status["error"] = str(err)
+        logger.error("Error initializing %s mcp server: %s", server_name, status["error"])
+    finally:
+        if not ready:
+            await pool.close()
+
+
+async def initialize_all_mcp():
+    """Initialize all MCP servers concurrently; each becomes usable as soon as it is ready"""
     for server in ServersConfig:
-        try:
-            print(f"\n================= Initializing {server['server_name']} mcp server start ===============")
-            print(f"Server name        : {server['server_name']}")
-            print(f"Server command     : {server['command']}")
-            print(f"Server args        : {server['args']}")
-            print(f"cwd                : {os.getcwd()}")
-
-            # Optional directory existence check
-            if "--directory" in server["args"]:
-                dir_index = server["args"].index("--directory")
-                if dir_index + 1 < len(server["args"]):
-                    relative_path = server["args"][dir_index + 1]
-                    absolute_path = os.path.abspath(relative_path)
-                    print(f"Relative path      : {relative_path}")
-                    print(f"Absolute path      : {absolute_path}")
-                    print(f"Path exists        : {os.path.exists(absolute_path)}")
-
-            # Start stdio client
-            server_params = StdioServerParameters(command=server["command"], args=server["args"])
-            stdio_transport = await exit_stack.enter_async_context(stdio_client(server_params))
-            stdio, write = stdio_transport
-
-            session = await exit_stack.enter_async_context(ClientSession(stdio, write))
-            await session.initialize()
-
-
-            # Save session globally
-            MCPServers[server["server_name"]] = session
-
-            # Confirm connection
-            tools_response = await session.list_tools()
-            tool_names = [tool.name for tool in tools_response.tools]
-            print(f"Connected to {server['server_name']} with tools: {tool_names}")
-            
-            # Debug: Check if QuickBooks server is connected
-            if server["server_name"] == "QUICKBOOKS":
-                print(f"DEBUG: QuickBooks server connected successfully")
-                print(f"DEBUG: Available QuickBooks tools: {tool_names}")
-                print(f"DEBUG: QuickBooks session object: {session}")
-            
-            print(f"\n================= Initializing {server['server_name']} mcp server end ===============")
-
-        except Exception as err:
-            print(f"Error initializing {server['server_name']} mcp server =========>>>> {err}")
-            continue
-
-    return True
\ No newline at end of file
+        MCPServerStatus[server["server_name"]] = {"status": "starting", "startup_latency": None, "error": None}
+
+    await asyncio.gather(*(initialize_mcp_server(server) for server in ServersConfig))
+
+    logger.info("MCP servers readiness report")
+    for server_name, status in MCPServerStatus.items():
+        logger.info("%-20s %-10s %ss %s", server_name, status["status"], status["startup_latency"], status["error"] or "")
+
+    return any(status["status"] == "ready" for status in MCPServerStatus.values())
+
+
+async def shutdown_all_mcp():
+    """Stop every session pool and its server processes"""
+    pools = list(MCPServers.values())
+    MCPServers.clear()
+    await asyncio.gather(*(pool.close() for pool in pools), return_exceptions=True)
@@ -0,0 +1,275 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional, Callable
+
+import anyio
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.shared.exceptions import McpError
+
+logger = logging.getLogger(__name__)
+
+
+class PoolBusyError(Exception):
+    """Raised when every session of a server is busy and the wait queue is full or timed out."""
+
+
+# Errors that mean the stdio pipe / server process behind a session is gone
+_TRANSPORT_ERRORS = (
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    BrokenPipeError,
+    ConnectionError,
+)
+
+
+def is_transport_error(err: BaseException) -> bool:
+    if isinstance(err, _TRANSPORT_ERRORS):
+        return True
+    return isinstance(err, McpError) and "connection closed" in str(err).lower()
+
+
+class PooledSession:
+    """
+    One stdio server process and its ClientSession.
+
+    The stdio and session contexts are entered and exited by a dedicated owner
+    task, so a session can be started or closed from any request without
+    crossing anyio cancel scopes. Messages from the server are relayed by the
+    owner task too, so the end of its stdout (the process exited, even while
+    the session is idle) marks the session dead and calls on_exit.
+    """
+
+    def __init__(self, server_name: str, index: int, params: StdioServerParameters, message_handler: Optional[Callable] = None,
+                 on_exit: Optional[Callable[["PooledSession"], None]] = None):
+        self.server_name = server_name
+        self.index = index
+        self.params = params
+        self.message_handler = message_handler
+        self.on_exit = on_exit
+        self.session: Optional[ClientSession] = None
+        self.in_flight = 0
+        self.alive = False
+        self.error: Optional[BaseException] = None
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        try:
+            async with stdio_client(self.params) as (stdio, write):
+                relay_send, relay_receive = anyio.create_memory_object_stream(0)
+                async with anyio.create_task_group() as tg:
+                    tg.start_soon(self._relay, stdio, relay_send)
+                    async with ClientSession(relay_receive, write, message_handler=self.message_handler) as session:
+                        await session.initialize()
+                        self.session = session
+                        self.alive = True
+                        self._ready.set()
+                        await self._stop.wait()
+                    tg.cancel_scope.cancel()
+        except Exception as err:
+            self.error = err
+        finally:
+            self.alive = False
+            self._ready.set()
+
+    async def _relay(self, stdio, relay_send):
+        try:
+            async with relay_send:
+                async for message in stdio:
+                    await relay_send.send(message)
+        except (anyio.BrokenResourceError, anyio.ClosedResourceError):
+            # The session side closed first: a normal shutdown
+            return
+        if self._stop.is_set():
+            return
+        # stdout ended while nobody asked the session to stop: the server process is gone
+        logger.warning("%s session %d: server process exited", self.server_name, self.index)
+        was_alive = self.alive
+        self.alive = False
+        self._stop.set()
+        if was_alive and self.on_exit is not None:
+            self.on_exit(self)
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+        await self._ready.wait()
+        if not self.alive:
+            raise self.error or RuntimeError(f"{self.server_name} session {self.index} failed to start")
+
+    async def close(self, timeout: float = 10.0):
+        self._stop.set()
+        if self._task is None:
+            return
+        if not self._ready.is_set():
+            # Still starting: nothing to drain, abort the spawn
+            self._task.cancel()
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self._task.cancel()
+        except Exception:
+            pass
+
+
+class MCPSessionPool:
+    """
+    Pool of stdio sessions for one entry of ServersConfig.
+
+    Leases go to the alive session with the fewest in-flight calls. When every
+    session is at max_in_flight_per_session, callers wait in a bounded queue
+    (max_waiters) for at most lease_timeout seconds before PoolBusyError is
+    raised. A session whose transport fails or whose server process exits is
+    replaced in the background; failed replacements are retried with
+    exponential backoff (replace_base_delay up to replace_max_delay) until
+    one starts or the pool is closed.
+    """
+
+    def __init__(self, server_config: Dict[str, Any], pool_config: Dict[str, Any], message_handler: Optional[Callable] = None):
+        self.server_name = server_config["server_name"]
+        self.params = StdioServerParameters(command=server_config["command"], args=server_config["args"])
+        self.size = max(1, int(server_config.get("pool_size", pool_config["pool_size"])))
+        self.max_in_flight_per_session = max(1, int(server_config.get("max_in_flight_per_session", pool_config["max_in_flight_per_session"])))
+        self.max_waiters = int(server_config.get("max_waiters", pool_config["max_waiters"]))
+        self.lease_timeout = float(server_config.get("lease_timeout", pool_config["lease_timeout"]))
+        self.replace_base_delay = float(pool_config["replace_base_delay"])
+        self.replace_max_delay = float(pool_config["replace_max_delay"])
+        self.message_handler = message_handler
+        self.sessions: List[PooledSession] = []
+        self.waiters = 0
+        self.replacements = 0
+        self.replace_failures = 0
+        self._replacing: Dict[int, asyncio.Task] = {}
+        self._closed = False
+        self._condition = asyncio.Condition()
+
+    def _new_member(self, index: int) -> PooledSession:
+        return PooledSession(self.server_name, index, self.params, self.message_handler, on_exit=self._on_member_exit)
+
+    def _on_member_exit(self, member: PooledSession):
+        if not self._closed and member.index < len(self.sessions) and self.sessions[member.index] is member:
+            self._schedule_replacement(member)
+
+    async def start(self):
+        """Start every session concurrently; succeed when at least one is alive."""
+        self.sessions = [self._new_member(i) for i in range(self.size)]
+        results = await asyncio.gather(*(member.start() for member in self.sessions), return_exceptions=True)
+        if not any(member.alive for member in self.sessions):
+            errors = [r for r in results if isinstance(r, BaseException)]
+            await self.close()
+            raise errors[0] if errors else RuntimeError(f"No session of {self.server_name} could be started")
+        for member in self.sessions:
+            if not member.alive:
+                self._schedule_replacement(member)
+
+    async def close(self):
+        self._closed = True
+        replacing = list(self._replacing.values())
+        for task in replacing:
+            task.cancel()
+        await asyncio.gather(*replacing, return_exceptions=True)
+        await asyncio.gather(*(member.close() for member in self.sessions), return_exceptions=True)
+        self.sessions = []
+
+    def _pick(self) -> Optional[PooledSession]:
+        candidates = [m for m in self.sessions if m.alive and m.in_flight < self.max_in_flight_per_session]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda m: m.in_flight)
+
+    async def _acquire(self) -> PooledSession:
+        async with self._condition:
+            member = self._pick()
+            if member is None:
+                if self.waiters >= self.max_waiters:
+                    raise PoolBusyError(f"{self.server_name} session pool is saturated ({self.waiters} waiting)")
+                self.waiters += 1
+                try:
+                    await asyncio.wait_for(self._condition.wait_for(lambda: self._pick() is not None), self.lease_timeout)
+                except asyncio.TimeoutError:
+                    raise PoolBusyError(f"Timed out after {self.lease_timeout}s waiting for a {self.server_name} session")
+                finally:
+                    self.waiters -= 1
+                member = self._pick()
+            member.in_flight += 1
+            return member
+
+    async def _release(self, member: PooledSession):
+        async with self._condition:
+            member.in_flight -= 1
+            self._condition.notify()
+
+    @asynccontextmanager
+    async def lease(self):
+        """Check out the least-busy session for the duration of the block."""
+        member = await self._acquire()
+        try:
+            yield member.session
+        except BaseException as err:
+            if is_transport_error(err):
+                member.alive = False
+                self._schedule_replacement(member)
+            raise
+        finally:
+            await self._release(member)
+
+    def _schedule_replacement(self, member: PooledSession):
+        if self._closed or member.index in self._replacing:
+            return
+        self._replacing[member.index] = asyncio.create_task(self._replace(member))
+
+    async def _replace(self, dead: PooledSession):
+        delay = self.replace_base_delay
+        try:
+            await dead.close()
+            while not self._closed:
+                logger.warning("Replacing %s session %d", self.server_name, dead.index)
+                replacement = self._new_member(dead.index)
+                try:
+                    await replacement.start()
+                except asyncio.CancelledError:
+                    await replacement.close()
+                    raise
+                except Exception as err:
+                    self.replace_failures += 1
+                    logger.error("Error replacing %s session %d, retrying in %.1fs: %s", self.server_name, dead.index, delay, err)
+                    await replacement.close()
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.replace_max_delay)
+                    continue
+                if self._closed:
+                    await replacement.close()
+                    return
+                async with self._condition:
+                    self.sessions[dead.index] = replacement
+                    self.replacements += 1
+                    self._replacing.pop(dead.index, None)
+                    self._condition.notify_all()
+                if not replacement.alive:
+                    # Exited between start() and taking its place: its on_exit found the old member
+                    self._schedule_replacement(replacement)
+                return
+        finally:
+            if self._replacing.get(dead.index) is asyncio.current_task():
+                del self._replacing[dead.index]
+
+    async def list_tools(self):
+        async with self.lease() as session:
+            return await session.list_tools()
+
+    async def call_tool(self, tool_name: str, args: Dict[str, Any]):
+        async with self.lease() as session:
+            return await session.call_tool(tool_name, args)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "alive": sum(1 for m in self.sessions if m.alive),
+            "in_flight": sum(m.in_flight for m in self.sessions),
+            "waiters": self.waiters,
+            "replacements": self.replacements,
+            "replace_failures": self.replace_failures,
+        }
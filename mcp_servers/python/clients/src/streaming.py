@@ -0,0 +1,167 @@
+import asyncio
+import json
+import logging
+import time
+import weakref
+from typing import Dict, Any, Optional
+
+from src.client_and_server_config import StreamingConfig
+from src.metrics import gateway_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class StreamMetrics:
+    """Totals for the SSE endpoint: durations, queue high-water mark and client aborts."""
+
+    def __init__(self):
+        self.streams_started = 0
+        self.streams_completed = 0
+        self.client_aborts = 0
+        self.timeouts = 0
+        # Producers cancelled because nobody read their full queue (client gone before or while reading)
+        self.abandoned = 0
+        self.active_streams = 0
+        self.keepalives_sent = 0
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+        self.queue_high_water_mark = 0
+        # Queues of the open streams, for the current queue depth
+        self.queues: "weakref.WeakSet[asyncio.Queue]" = weakref.WeakSet()
+
+    def observe_queue(self, depth: int):
+        if depth > self.queue_high_water_mark:
+            self.queue_high_water_mark = depth
+
+    def queued_events(self) -> int:
+        return sum(q.qsize() for q in list(self.queues))
+
+    def stats(self) -> Dict[str, Any]:
+        finished = self.streams_completed + self.client_aborts + self.timeouts
+        return {
+            "streams_started": self.streams_started,
+            "streams_completed": self.streams_completed,
+            "client_aborts": self.client_aborts,
+            "timeouts": self.timeouts,
+            "abandoned": self.abandoned,
+            "active_streams": self.active_streams,
+            "keepalives_sent": self.keepalives_sent,
+            "avg_duration_seconds": round(self.total_duration / finished, 3) if finished else 0.0,
+            "max_duration_seconds": round(self.max_duration, 3),
+            "queue_high_water_mark": self.queue_high_water_mark,
+            "queue_max_size": StreamingConfig["queue_max_size"],
+        }
+
+
+stream_metrics = StreamMetrics()
+
+
+def new_stream_queue() -> asyncio.Queue:
+    """Bounded queue: a producer that gets ahead of a slow client waits in put()."""
+    response_queue = asyncio.Queue(maxsize=StreamingConfig["queue_max_size"])
+    stream_metrics.queues.add(response_queue)
+    return response_queue
+
+
+class CustomStreamHandler:
+    def __init__(self, response_queue: asyncio.Queue):
+        self.response_queue = response_queue
+        # Task producing the stream, cancelled when nobody drains the queue
+        self.producer: Optional[asyncio.Task] = None
+
+    async def _put(self, item: Optional[str]):
+        try:
+            await asyncio.wait_for(self.response_queue.put(item), StreamingConfig["put_timeout"])
+        except asyncio.TimeoutError:
+            # The response body was never iterated (client left before it started) or the
+            # client stopped reading; stream_generator's cleanup may never run, so stop here
+            stream_metrics.abandoned += 1
+            logger.warning("SSE queue full for %ss, abandoning the stream", StreamingConfig["put_timeout"])
+            if self.producer is not None and not self.producer.done():
+                self.producer.cancel()
+            raise asyncio.CancelledError()
+        stream_metrics.observe_queue(self.response_queue.qsize())
+
+    async def on_data(self, chunk: str):
+        """Send data chunk to the stream"""
+        await self._put(f"data: {chunk}\n\n")
+
+    async def on_end(self):
+        """Send completion message and end the stream"""
+        completion_data = {
+            "Data": None,
+            "Error": None,
+            "Status": True,
+            "StreamingStatus": "COMPLETED",
+            "Action": "NO-ACTION"
+        }
+        await self._put(f"data: {json.dumps(completion_data)}\n\n")
+        await self._put(None)  # Signal end of stream
+
+    async def on_error(self, error: Exception):
+        """Send error message and end the stream"""
+        logger.error("Streaming Error: %s", error)
+        error_data = {"error": str(error)}
+        await self._put(f"data: {json.dumps(error_data)}\n\n")
+        await self._put(None)  # Signal end of stream
+
+
+async def stream_generator(response_queue: asyncio.Queue, producer: Optional[asyncio.Task] = None):
+    """
+    Yield queued SSE events until the producer signals the end of the stream.
+
+    While nothing is queued (e.g. during a long tool call) an SSE comment is
+    sent every keepalive_interval seconds so proxies and clients keep the
+    connection open. If the client disconnects, or the stream runs longer than
+    max_stream_duration, the producer task is cancelled so no LLM or tool work
+    is left running.
+    """
+    keepalive_interval = StreamingConfig["keepalive_interval"]
+    deadline = time.monotonic() + StreamingConfig["max_stream_duration"]
+    started = time.monotonic()
+    outcome = "aborted"
+    stream_metrics.streams_started += 1
+    stream_metrics.active_streams += 1
+
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                outcome = "timed_out"
+                error_data = {
+                    "Data": None,
+                    "Error": f"Stream exceeded {StreamingConfig['max_stream_duration']}s",
+                    "Status": False,
+                    "StreamingStatus": "ERROR",
+                    "Action": "ERROR"
+                }
+                yield f"data: {json.dumps(error_data)}\n\n"
+                break
+            try:
+                data = await asyncio.wait_for(response_queue.get(), timeout=min(keepalive_interval, remaining))
+            except asyncio.TimeoutError:
+                if producer is not None and producer.done() and response_queue.empty():
+                    # Producer abandoned the stream (see CustomStreamHandler._put)
+                    break
+                stream_metrics.keepalives_sent += 1
+                yield ": keepalive\n\n"
+                continue
+            if data is None:  # End of stream signal
+                outcome = "completed"
+                break
+            yield data
+    finally:
+        if producer is not None and not producer.done():
+            producer.cancel()
+
+        duration = time.monotonic() - started
+        stream_metrics.active_streams -= 1
+        stream_metrics.total_duration += duration
+        stream_metrics.max_duration = max(stream_metrics.max_duration, duration)
+        gateway_metrics.observe_stream(outcome, duration)
+        if outcome == "completed":
+            stream_metrics.streams_completed += 1
+        elif outcome == "timed_out":
+            stream_metrics.timeouts += 1
+        else:
+            stream_metrics.client_aborts += 1
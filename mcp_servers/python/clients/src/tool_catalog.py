@@ -0,0 +1,135 @@
+import asyncio
+import copy
+import hashlib
+import json
+from typing import Dict, Any, List, Optional
+
+from src.tool_router import LexicalToolIndex
+
+
+SERVER_CREDENTIALS_PROPERTY = {
+    "type": "object",
+    "description": "Server credentials (automatically provided)"
+}
+
+
+def build_function_schema(tool: Any) -> Dict[str, Any]:
+    """Convert an MCP Tool into the OpenAI-style function definition sent to the LLMs."""
+    schema = (
+        getattr(tool, "inputSchema", None)
+        or getattr(tool, "input_schema", None)
+        or getattr(tool, "parameters", None)
+    )
+    if isinstance(schema, dict):
+        # Copy so the session's Tool objects are never mutated
+        schema = copy.deepcopy(schema)
+    else:
+        schema = {"type": "object", "properties": {}, "required": []}
+
+    # Ensure server_credentials parameter is included in the schema
+    schema.setdefault("properties", {})
+    schema["properties"].setdefault("server_credentials", dict(SERVER_CREDENTIALS_PROPERTY))
+    schema.setdefault("required", [])
+    if "server_credentials" not in schema["required"]:
+        schema["required"].append("server_credentials")
+
+    return {
+        "type": "function",
+        "function": {
+            "name": tool.name,
+            "description": getattr(tool, "description", None) or f"Tool for {tool.name}",
+            "parameters": schema
+        }
+    }
+
+
+class ToolCatalog:
+    """
+    Per-server cache of converted tool definitions.
+
+    Entries are built once when the server is initialized and rebuilt only after
+    the server sends notifications/tools/list_changed or the catalog is
+    invalidated explicitly. Concurrent misses for one server share a single
+    list_tools call. The cached dicts are shared between requests and must be
+    treated as read-only by callers.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        # In-flight refresh per server, awaited by every miss while it runs
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        # Bumped by invalidate() so a refresh started before it does not store its stale result
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    async def refresh(self, server_name: str, session: Any) -> Dict[str, Any]:
+        """Fetch the tool list from the server and rebuild its catalog entry."""
+        generation = self._generations.get(server_name, 0)
+        response = await session.list_tools()
+        tools = [build_function_schema(tool) for tool in response.tools] if response else []
+        entry = {
+            "tools": tools,
+            "index": {tool["function"]["name"]: tool for tool in tools},
+            "version": hashlib.sha256(json.dumps(tools, sort_keys=True).encode("utf-8")).hexdigest()[:16],
+            # Precomputed here so local_prefilter routing costs nothing per request
+            "lexical_index": LexicalToolIndex(tools),
+        }
+        if self._generations.get(server_name, 0) == generation:
+            self._entries[server_name] = entry
+        self.refreshes += 1
+        return entry
+
+    async def get_entry(self, server_name: str, session: Any) -> Dict[str, Any]:
+        entry = self._entries.get(server_name)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        task = self._refreshing.get(server_name)
+        if task is None:
+            task = asyncio.ensure_future(self.refresh(server_name, session))
+            self._refreshing[server_name] = task
+            task.add_done_callback(lambda done: self._refresh_done(server_name, done))
+        # Shielded: one cancelled request must not cancel the refresh the others wait for
+        return await asyncio.shield(task)
+
+    def _refresh_done(self, server_name: str, task: asyncio.Task):
+        if self._refreshing.get(server_name) is task:
+            del self._refreshing[server_name]
+        if not task.cancelled():
+            # Retrieved here so a refresh whose waiters were all cancelled does not log "never retrieved"
+            task.exception()
+
+    async def get_tools(self, server_name: str, session: Any) -> List[Dict[str, Any]]:
+        entry = await self.get_entry(server_name, session)
+        return entry["tools"]
+
+    def peek(self, server_name: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry without refreshing or touching the hit counters."""
+        return self._entries.get(server_name)
+
+    def invalidate(self, server_name: Optional[str] = None):
+        """Drop one server's entry (or every entry) so the next lookup refreshes it."""
+        names = list(set(self._entries) | set(self._refreshing)) if server_name is None else [server_name]
+        for name in names:
+            self._entries.pop(name, None)
+            # Later misses start a new refresh instead of waiting for one that may predate the change
+            self._refreshing.pop(name, None)
+            self._generations[name] = self._generations.get(name, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "servers": {
+                name: {"tools": len(entry["tools"]), "version": entry["version"]}
+                for name, entry in self._entries.items()
+            }
+        }
+
+
+# Global tool catalog shared by server_connection, validation and execution
+tool_catalog = ToolCatalog()
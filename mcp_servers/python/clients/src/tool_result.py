@@ -0,0 +1,99 @@
+import json
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
+
+try:
+    import orjson
+except ImportError:  # optional speed-up, the stdlib encoder is used without it
+    orjson = None
+
+
+def dumps(value: Any) -> str:
+    """Encode to a JSON string with orjson when available; unknown objects become strings."""
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(value, default=str)
+
+
+def loads(text: str) -> Any:
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _content_block(block: Any) -> Dict[str, Any]:
+    """Convert one MCP content block (TextContent, ImageContent, EmbeddedResource, ...) to a plain dict."""
+    block_type = getattr(block, "type", None)
+    if block_type == "text":
+        return {"type": "text", "text": block.text}
+    if block_type in ("image", "audio"):
+        return {"type": block_type, "data": block.data, "mimeType": getattr(block, "mimeType", None) or getattr(block, "mime_type", None)}
+    if block_type == "resource":
+        resource = block.resource
+        converted = {
+            "uri": str(resource.uri),
+            "mimeType": getattr(resource, "mimeType", None) or getattr(resource, "mime_type", None),
+        }
+        if getattr(resource, "text", None) is not None:
+            converted["text"] = resource.text
+        if getattr(resource, "blob", None) is not None:
+            converted["blob"] = resource.blob
+        return {"type": "resource", "resource": converted}
+    if block_type == "resource_link":
+        return {
+            "type": "resource_link",
+            "uri": str(block.uri),
+            "name": getattr(block, "name", None),
+            "mimeType": getattr(block, "mimeType", None) or getattr(block, "mime_type", None),
+        }
+    if hasattr(block, "model_dump"):
+        return block.model_dump(mode="json", exclude_none=True)
+    return {"type": "text", "text": str(block)}
+
+
+@dataclass
+class ToolResult:
+    """
+    Gateway form of an MCP CallToolResult.
+
+    Built once from the SDK objects and encoded to JSON at most once; the
+    response, the stream notification and the chat history all reuse it.
+    """
+    content: List[Dict[str, Any]]
+    is_error: bool = False
+    structured_content: Optional[Any] = None
+    _encoded: Optional[str] = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_mcp(cls, result: Any) -> "ToolResult":
+        is_error = getattr(result, "isError", None)
+        if is_error is None:
+            is_error = getattr(result, "is_error", False)
+        structured = getattr(result, "structuredContent", None)
+        if structured is None:
+            structured = getattr(result, "structured_content", None)
+        return cls(
+            content=[_content_block(block) for block in getattr(result, "content", None) or []],
+            is_error=bool(is_error),
+            structured_content=structured,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"content": self.content, "isError": self.is_error}
+        if self.structured_content is not None:
+            data["structuredContent"] = self.structured_content
+        return data
+
+    def encoded(self) -> str:
+        if self._encoded is None:
+            self._encoded = dumps(self.to_dict())
+        return self._encoded
+
+
+def to_jsonable(result: Any) -> Any:
+    """Tool results are a ToolResult, or an error string when the call failed."""
+    return result.to_dict() if isinstance(result, ToolResult) else result
+
+
+def encode_result(result: Any) -> str:
+    return result.encoded() if isinstance(result, ToolResult) else dumps(result)
@@ -0,0 +1,159 @@
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
+
+from src.client_and_server_config import ToolResultBudgets
+from src.tool_router import estimate_tokens
+from src.tool_result import dumps, loads, encode_result, to_jsonable
+
+
+@dataclass
+class ShapedToolResult:
+    value: Any                      # what the LLM and the stream notifications see
+    encoded: str                    # JSON of value, encoded once
+    result_ref: Optional[str]       # id of the full result in result_store when value was shortened
+    original_bytes: int
+    shaped_bytes: int
+
+
+class ResultStore:
+    """LRU + TTL store of full tool results that were shortened for the LLM, keyed by ref id."""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.max_entries = config["result_store_max_entries"]
+        self.max_bytes = config["result_store_max_bytes"]
+        self.ttl_seconds = config["result_store_ttl_seconds"]
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.total_bytes = 0
+        self.evictions = 0
+
+    def put(self, tool_name: str, result: Any, size: int) -> str:
+        ref_id = uuid.uuid4().hex
+        self._entries[ref_id] = {
+            "tool_name": tool_name,
+            "result": result,
+            "size": size,
+            "expires_at": time.monotonic() + self.ttl_seconds,
+        }
+        self.total_bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self.total_bytes -= evicted["size"]
+            self.evictions += 1
+        return ref_id
+
+    def get(self, ref_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(ref_id)
+        if entry is None:
+            return None
+        if entry["expires_at"] <= time.monotonic():
+            self._entries.pop(ref_id)
+            self.total_bytes -= entry["size"]
+            self.evictions += 1
+            return None
+        return {"tool_name": entry["tool_name"], "result": entry["result"]}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "evictions": self.evictions,
+        }
+
+
+result_store = ResultStore(ToolResultBudgets)
+
+
+def budget_for(tool_name: str) -> Dict[str, Any]:
+    return {**ToolResultBudgets["default"], **ToolResultBudgets["per_tool"].get(tool_name, {})}
+
+
+def _parse_text_blocks(result: Any) -> Any:
+    """MCP servers usually return JSON as text; parse it so its structure can be shaped."""
+    if not (isinstance(result, dict) and isinstance(result.get("content"), list)):
+        return result
+    content = []
+    for block in result["content"]:
+        text = block.get("text") if isinstance(block, dict) and block.get("type") == "text" else None
+        if isinstance(text, str) and text.lstrip()[:1] in ("{", "["):
+            try:
+                content.append({"type": "json", "data": loads(text)})
+                continue
+            except ValueError:
+                pass
+        content.append(block)
+    return {**result, "content": content}
+
+
+def _project(record: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    projected = {key: record[key] for key in fields if key in record}
+    # Records that carry none of the configured fields are left alone
+    return projected or record
+
+
+def _shape(value: Any, max_items: int, max_chars: int, fields: Optional[List[str]]) -> Any:
+    if isinstance(value, list):
+        items = []
+        for item in value[:max_items]:
+            if fields and isinstance(item, dict):
+                item = _project(item, fields)
+            items.append(_shape(item, max_items, max_chars, fields))
+        if len(value) > max_items:
+            return {"items": items, "total_count": len(value), "omitted": len(value) - max_items}
+        return items
+    if isinstance(value, dict):
+        return {key: _shape(item, max_items, max_chars, fields) for key, item in value.items()}
+    if isinstance(value, str) and len(value) > max_chars:
+        return f"{value[:max_chars]}... [{len(value) - max_chars} more characters]"
+    return value
+
+
+def _within(encoded: str, budget: Dict[str, Any]) -> bool:
+    return len(encoded.encode("utf-8")) <= budget["max_bytes"] and estimate_tokens(encoded) <= budget["max_tokens"]
+
+
+def shape_tool_result(tool_name: str, result: Any) -> ShapedToolResult:
+    """
+    Fit a tool result into the tool's byte and token budget before it reaches
+    the LLM and the stream.
+
+    Results already within budget pass through untouched. Larger ones get
+    field projection (budget "fields"), lists cut to the first max_list_items
+    plus a count, and long strings clipped. List and string limits are halved
+    until the result fits. The full result is kept in result_store, and the
+    shaped value carries its result_ref.
+    """
+    budget = budget_for(tool_name)
+    # A ToolResult's encoding is cached on it and reused by every consumer
+    encoded = encode_result(result)
+    result = to_jsonable(result)
+    original_bytes = len(encoded.encode("utf-8"))
+    if _within(encoded, budget):
+        return ShapedToolResult(result, encoded, None, original_bytes, original_bytes)
+
+    parsed = _parse_text_blocks(result)
+    max_items = budget["max_list_items"]
+    max_chars = budget["max_string_chars"]
+    while True:
+        shaped = _shape(parsed, max_items, max_chars, budget.get("fields"))
+        shaped_encoded = dumps(shaped)
+        if _within(shaped_encoded, budget) or (max_items <= 1 and max_chars <= 200):
+            break
+        max_items = max(1, max_items // 2)
+        max_chars = max(200, max_chars // 2)
+
+    if not _within(shaped_encoded, budget):
+        # Deeply nested payloads: fall back to a clipped JSON prefix
+        shaped = {"partial_json": shaped_encoded[:max(200, budget["max_bytes"] - 200)]}
+
+    result_ref = result_store.put(tool_name, result, original_bytes)
+    value = {
+        "result": shaped,
+        "truncated": True,
+        "result_ref": result_ref,
+        "original_bytes": original_bytes,
+    }
+    value_encoded = dumps(value)
+    return ShapedToolResult(value, value_encoded, result_ref, original_bytes, len(value_encoded.encode("utf-8")))
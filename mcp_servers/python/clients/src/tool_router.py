@@ -0,0 +1,144 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.client_and_server_config import RoutingConfig, ServersConfig
+
+ROUTING_MODES = ("two_stage", "single_stage", "local_prefilter")
+
+_CAMEL_RE = re.compile(r"([a-z0-9])([A-Z])")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "with", "by", "from", "at", "as",
+    "is", "are", "be", "it", "this", "that", "my", "me", "i", "you", "your", "can", "please", "all",
+    "use", "tool", "tools", "using", "if", "not", "provided", "optional", "returns", "return",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    text = _CAMEL_RE.sub(r"\1 \2", text or "").lower()
+    tokens = []
+    for token in _TOKEN_RE.findall(text):
+        if token in _STOPWORDS:
+            continue
+        # Cheap plural folding so "emails" matches "email"
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class LexicalToolIndex:
+    """BM25 index over tool names and descriptions, built once per catalog refresh."""
+
+    NAME_WEIGHT = 3
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, tools: List[Dict[str, Any]]):
+        self.names: List[str] = []
+        self.term_freqs: List[Counter] = []
+        self.doc_lengths: List[int] = []
+        doc_freq: Counter = Counter()
+
+        for tool in tools:
+            function = tool.get("function", {})
+            name = function.get("name", "")
+            terms = tokenize(name) * self.NAME_WEIGHT + tokenize(function.get("description", ""))
+            tf = Counter(terms)
+            self.names.append(name)
+            self.term_freqs.append(tf)
+            self.doc_lengths.append(len(terms))
+            doc_freq.update(tf.keys())
+
+        count = len(self.names)
+        self.avg_doc_length = (sum(self.doc_lengths) / count) if count else 0.0
+        self.idf = {
+            term: math.log(1 + (count - df + 0.5) / (df + 0.5))
+            for term, df in doc_freq.items()
+        }
+
+    def rank(self, query: str) -> List[Tuple[str, float]]:
+        """Return (tool_name, score) for every tool with a positive score, best first."""
+        query_terms = set(tokenize(query))
+        scored = []
+        for name, tf, length in zip(self.names, self.term_freqs, self.doc_lengths):
+            score = 0.0
+            for term in query_terms:
+                freq = tf.get(term)
+                if not freq:
+                    continue
+                norm = self.K1 * (1 - self.B + self.B * length / (self.avg_doc_length or 1))
+                score += self.idf[term] * freq * (self.K1 + 1) / (freq + norm)
+            if score > 0:
+                scored.append((name, score))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored
+
+
+def prefilter_tools(query: str, indexes: List[LexicalToolIndex], config: Dict[str, Any] = RoutingConfig) -> Optional[List[str]]:
+    """
+    Pick tools locally from the lexical indexes.
+
+    Returns the best max_tools names when the top score is high enough and
+    clearly ahead of the runner-up, or None when the match is ambiguous and the
+    router LLM should decide.
+    """
+    ranked: List[Tuple[str, float]] = []
+    for index in indexes:
+        ranked.extend(index.rank(query))
+    ranked.sort(key=lambda item: item[1], reverse=True)
+
+    if not ranked or ranked[0][1] < config["prefilter_min_score"]:
+        return None
+    if len(ranked) > 1 and ranked[0][1] < ranked[1][1] * config["prefilter_margin"]:
+        return None
+    return [name for name, _ in ranked[:config["prefilter_max_tools"]]]
+
+
+def resolve_routing_mode(client_details: Dict[str, Any], selected_server: str) -> str:
+    """Request setting wins over the server's ServersConfig setting, which wins over the default."""
+    mode = client_details.get("routing_mode")
+    if mode not in ROUTING_MODES:
+        server_config = next((s for s in ServersConfig if s["server_name"] == selected_server), {})
+        mode = server_config.get("routing_mode")
+    if mode not in ROUTING_MODES:
+        mode = RoutingConfig["default_mode"]
+    return mode
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token) used for savings reports."""
+    return len(text) // 4
+
+
+class RoutingStats:
+    """Per-mode totals of routing latency, router LLM calls and estimated token savings."""
+
+    def __init__(self):
+        self.modes: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, routing: Dict[str, Any]):
+        stats = self.modes.setdefault(routing["mode"], {
+            "requests": 0,
+            "router_llm_calls": 0,
+            "total_routing_latency_ms": 0.0,
+            "router_tokens_spent": 0,
+            "estimated_tokens_saved": 0,
+        })
+        stats["requests"] += 1
+        stats["router_llm_calls"] += 1 if routing["router_llm_called"] else 0
+        stats["total_routing_latency_ms"] += routing["routing_latency_ms"]
+        stats["router_tokens_spent"] += routing["router_tokens"]
+        stats["estimated_tokens_saved"] += routing["estimated_tokens_saved"]
+
+    def stats(self) -> Dict[str, Any]:
+        report = {}
+        for mode, stats in self.modes.items():
+            report[mode] = dict(stats)
+            report[mode]["avg_routing_latency_ms"] = round(stats["total_routing_latency_ms"] / stats["requests"], 3)
+        return report
+
+
+routing_stats = RoutingStats()
@@ -0,0 +1,272 @@
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from typing import Dict, Any, List, Optional
+
+from src.client_and_server_config import TracingConfig
+
+logger = logging.getLogger(__name__)
+
+# Innermost active span of the current asyncio task
+_current_span: contextvars.ContextVar = contextvars.ContextVar("mcp_gateway_span", default=None)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+
+class NonRecordingSpan:
+    """
+    Stand-in used when a request is not sampled. The root one carries the
+    trace id (still returned to the client); every other method is a no-op.
+    """
+
+    is_recording = False
+
+    def __init__(self, trace_id: Optional[str] = None, root: bool = False):
+        self.trace_id = trace_id
+        self._root = root
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        pass
+
+    def record_error(self, error: Any):
+        pass
+
+    def __enter__(self):
+        if self._root:
+            self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._root and self._token is not None:
+            _current_span.reset(self._token)
+        return False
+
+
+# Returned for every span below a non-sampled root and outside any request
+NOOP_SPAN = NonRecordingSpan()
+
+
+class Span:
+    is_recording = True
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent: Optional["Span"], attributes: Optional[Dict[str, Any]]):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status_code = 0  # UNSET
+        self.status_message = ""
+        self.start_ns = 0
+        self.end_ns = 0
+        # Finished spans of the whole trace, exported when the root ends
+        self._trace: List["Span"] = parent._trace if parent else []
+        self._is_root = parent is None
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def record_error(self, error: Any):
+        """Mark the span failed; `error` is an exception or a provider error payload."""
+        self.status_code = 2  # ERROR
+        self.status_message = str(error) or error.__class__.__name__
+        self.attributes["error.type"] = error.__class__.__name__ if isinstance(error, BaseException) else "provider_error"
+
+    def __enter__(self):
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.record_error(exc)
+        self._trace.append(self)
+        if self._is_root:
+            self.tracer.export(self._trace)
+        return False
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": self.status_code, "message": self.status_message},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class FileSpanExporter:
+    """Appends one OTLP/JSON ExportTraceServiceRequest per trace to a JSONL file."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, body: Dict[str, Any]):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(body) + "\n")
+
+
+class OtlpHttpSpanExporter:
+    """POSTs OTLP/JSON to a collector's /v1/traces endpoint."""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.timeout = timeout
+
+    def export(self, body: Dict[str, Any]):
+        req = urllib.request.Request(
+            self.url,
+            data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout):
+            pass
+
+
+class Tracer:
+    """
+    Minimal OpenTelemetry-compatible tracer for the gateway.
+
+    The sampling decision is taken once per request, at the root span (or
+    taken from an incoming W3C traceparent header). Unsampled requests only
+    get a trace id; their child spans are a shared no-op object. Finished
+    traces are encoded as OTLP/JSON and exported from a background thread.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.enabled = config["enabled"]
+        self.sample_ratio = float(config["sample_ratio"])
+        self.exporter = self._build_exporter(config)
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._worker: Optional[threading.Thread] = None
+        self.exported_traces = 0
+        self.export_errors = 0
+
+    @staticmethod
+    def _build_exporter(config: Dict[str, Any]):
+        if config["exporter"] == "file":
+            return FileSpanExporter(config["file_path"])
+        if config["exporter"] == "otlp":
+            return OtlpHttpSpanExporter(config["otlp_endpoint"])
+        return None
+
+    @staticmethod
+    def _parse_traceparent(traceparent: Optional[str]):
+        # version-traceid-parentid-flags
+        parts = (traceparent or "").strip().split("-")
+        if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+            try:
+                return parts[1], parts[2], bool(int(parts[3], 16) & 1)
+            except ValueError:
+                pass
+        return None, None, None
+
+    def start_trace(self, name: str, traceparent: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None):
+        """Root span of one gateway request."""
+        trace_id, remote_parent_id, sampled = self._parse_traceparent(traceparent)
+        trace_id = trace_id or os.urandom(16).hex()
+        if sampled is None:
+            sampled = random.random() < self.sample_ratio
+        if not (sampled and self.enabled and self.exporter is not None):
+            return NonRecordingSpan(trace_id, root=True)
+        span = Span(self, name, trace_id, None, attributes)
+        span.parent_id = remote_parent_id
+        return span
+
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        """Child of the current span; a no-op when the request is not sampled."""
+        parent = _current_span.get()
+        if parent is None or not parent.is_recording:
+            return NOOP_SPAN
+        return Span(self, name, parent.trace_id, parent, attributes)
+
+    @staticmethod
+    def current_span():
+        return _current_span.get() or NOOP_SPAN
+
+    def export(self, spans: List[Span]):
+        if self.exporter is None:
+            return
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+            self._worker.start()
+        self._queue.put(spans)
+
+    def _run(self):
+        while True:
+            spans = self._queue.get()
+            if spans is None:
+                return
+            body = {
+                "resourceSpans": [{
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.config["service_name"]}}]},
+                    "scopeSpans": [{"scope": {"name": "mcp-gateway"}, "spans": [span.to_otlp() for span in spans]}],
+                }]
+            }
+            try:
+                self.exporter.export(body)
+                self.exported_traces += 1
+            except Exception as err:
+                self.export_errors += 1
+                logger.debug("Trace export failed: %s", err)
+
+    def shutdown(self, timeout: float = 5.0):
+        """Flush queued traces (called on gateway shutdown)."""
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join(timeout)
+            self._worker = None
+
+    def queue_depth(self) -> int:
+        """Finished traces waiting for the exporter thread."""
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_ratio": self.sample_ratio,
+            "exporter": self.config["exporter"],
+            "exported_traces": self.exported_traces,
+            "export_errors": self.export_errors,
+        }
+
+
+# Global tracer used by run.py, validation, execution and the tool calls
+tracer = Tracer(TracingConfig)
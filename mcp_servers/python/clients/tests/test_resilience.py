@@ -0,0 +1,127 @@
+import asyncio
+import time
+import unittest
+
+from src.client_and_server_config import LlmResilienceConfig
+from src.llm.deployment_pool import AzureDeploymentPool
+from src.llm.http_client import LlmHttpError
+from src.llm.resilience import CircuitBreaker, CircuitOpenError, LlmResilience, llm_resilience
+
+
+class HalfOpenProbeTest(unittest.IsolatedAsyncioTestCase):
+    """A half-open probe that never reports an outcome must not pin the breaker half_open."""
+
+    def setUp(self):
+        self.resilience = LlmResilience()
+        self.breaker = self.resilience.breaker("test:provider", LlmResilienceConfig)
+        # Opened long enough ago that the next call is a half-open probe
+        self.breaker.state = "open"
+        self.breaker.opened_at = time.monotonic() - self.breaker.open_seconds - 1
+
+    async def call(self, send):
+        return await self.resilience.call("MCP_CLIENT_OPENAI", "openai", "test:provider", send)
+
+    async def answer(self):
+        return "ok"
+
+    async def test_cancelled_probe_releases_its_slot(self):
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(3600)
+
+        probe = asyncio.create_task(self.call(hang))
+        await started.wait()
+        probe.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await probe
+
+        self.assertEqual(self.breaker.state, "half_open")
+        self.assertEqual(self.breaker.half_open_calls, 0)
+        self.assertEqual(await self.call(self.answer), "ok")
+        self.assertEqual(self.breaker.state, "closed")
+
+    async def test_unexpected_error_counts_as_failure(self):
+        async def broken():
+            raise ValueError("unparseable answer")
+
+        with self.assertRaises(ValueError):
+            await self.call(broken)
+
+        self.assertEqual(self.breaker.state, "open")
+        with self.assertRaises(CircuitOpenError):
+            await self.call(self.answer)
+
+    def test_record_interrupted_outside_half_open(self):
+        breaker = CircuitBreaker("test:closed", LlmResilienceConfig)
+        breaker.record_interrupted(asyncio.CancelledError())
+        self.assertEqual((breaker.state, breaker.consecutive_failures, breaker.half_open_calls), ("closed", 0, 0))
+
+
+class QuotaErrorTest(unittest.IsolatedAsyncioTestCase):
+    """One caller's 429s are retried but never open the breaker every caller shares."""
+
+    async def test_quota_errors_do_not_open_the_breaker(self):
+        resilience = LlmResilience()
+        breaker = resilience.breaker("test:quota", LlmResilienceConfig)
+
+        async def over_quota():
+            raise LlmHttpError(429, {"error": {"code": "rate_limit_exceeded"}}, {"retry-after-ms": "0"})
+
+        for _ in range(breaker.failure_threshold):
+            with self.assertRaises(LlmHttpError):
+                await resilience.call("MCP_CLIENT_OPENAI", "openai", "test:quota", over_quota)
+
+        self.assertGreater(resilience.retries, 0)
+        self.assertEqual((breaker.state, breaker.consecutive_failures), ("closed", 0))
+
+    async def test_server_errors_still_open_it(self):
+        resilience = LlmResilience()
+        breaker = resilience.breaker("test:unavailable", LlmResilienceConfig)
+
+        async def unavailable():
+            raise LlmHttpError(503, {"error": {"code": "unavailable"}}, {"retry-after-ms": "0"})
+
+        for _ in range(breaker.failure_threshold):
+            with self.assertRaises(LlmHttpError):
+                await resilience.call("MCP_CLIENT_OPENAI", "openai", "test:unavailable", unavailable)
+        self.assertEqual(breaker.state, "open")
+
+
+class DeploymentPoolProbeTest(unittest.IsolatedAsyncioTestCase):
+    """Same for the per-deployment breakers of the Azure deployment pool."""
+
+    def setUp(self):
+        self.pool = AzureDeploymentPool({"deployments": [
+            {"endpoint": "https://probe-test.openai.azure.com", "deployment_id": "gpt", "api_version": "2024-02-01"},
+        ]})
+        self.deployment = self.pool.deployments[0]
+        self.breaker = llm_resilience.breaker(self.deployment.breaker_key, LlmResilienceConfig)
+        self.breaker.state = "open"
+        self.breaker.opened_at = time.monotonic() - self.breaker.open_seconds - 1
+
+    async def test_cancelled_probe_releases_its_slot(self):
+        started = asyncio.Event()
+
+        async def hang(deployment, response_headers):
+            started.set()
+            await asyncio.sleep(3600)
+
+        async def answer(deployment, response_headers):
+            return deployment.name
+
+        probe = asyncio.create_task(self.pool.call(hang))
+        await started.wait()
+        probe.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await probe
+
+        self.assertEqual(self.breaker.half_open_calls, 0)
+        self.assertEqual(self.deployment.in_flight, 0)
+        self.assertEqual(await self.pool.call(answer), self.deployment.name)
+        self.assertEqual(self.breaker.state, "closed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Peak memory of saving one large attachment: the former path (whole
+base64 JSON response, then the whole decoded file, then write) versus
+the streaming download that decodes chunk by chunk into the file.
+
+The stub runs in a subprocess so only the client's allocations are traced.
+
+    cd mcp-gsuite && python -m benchmarks.gmail_attachment_memory --size 25000000
+"""
+import argparse
+import base64
+import hashlib
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from mcp_gsuite import attachments  # noqa: E402
+
+from benchmarks.gmail_batch import stub_gmail_service  # noqa: E402
+from benchmarks.stub_gmail_server import Mailbox, attachment_content  # noqa: E402
+
+
+def start_stub_process(size: int) -> tuple[subprocess.Popen, str]:
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.stub_gmail_server', '--port', '0', '--messages', '1',
+         '--attachments', '1', '--attachment-size', str(size), '--latency', '0'],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        stdout=subprocess.PIPE, text=True,
+    )
+    url = process.stdout.readline().strip().rsplit(' ', 1)[-1]
+    return process, url
+
+
+def save_whole(gmail, message_id: str, attachment_id: str, save_path: str):
+    data = gmail.get_attachment(message_id, attachment_id)['data']
+    with open(save_path, 'wb') as f:
+        f.write(base64.urlsafe_b64decode(data + '=' * (-len(data) % 4)))
+
+
+def traced(run) -> tuple[float, int]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Peak memory of whole vs streaming attachment download')
+    parser.add_argument('--size', type=int, default=25_000_000, help='attachment size in bytes')
+    parser.add_argument('--chunk-size', type=int, default=attachments.CHUNK_SIZE)
+    args = parser.parse_args()
+
+    process, url = start_stub_process(args.size)
+    try:
+        gmail = stub_gmail_service(url)
+        mailbox = Mailbox(1, attachments=1, attachment_size=args.size)
+        message_id = mailbox.order[0]
+        attachment_id = mailbox.messages[message_id]['payload']['parts'][2]['body']['attachmentId']
+        expected = hashlib.sha256(attachment_content(attachment_id, args.size)).hexdigest()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'attachment.bin')
+            rows = []
+            seconds, peak = traced(lambda: save_whole(gmail, message_id, attachment_id, path))
+            rows.append(('whole', seconds, peak))
+            os.remove(path)
+            seconds, peak = traced(lambda: gmail.download_attachment(
+                message_id, attachment_id, path, chunk_size=args.chunk_size, expected_sha256=expected
+            ))
+            rows.append(('streaming', seconds, peak))
+    finally:
+        process.terminate()
+        process.wait()
+
+    print(f'attachment of {args.size} bytes, chunk size {args.chunk_size}')
+    print(f"{'path':<12}{'seconds':>10}{'peak_MiB':>11}")
+    for name, seconds, peak in rows:
+        print(f'{name:<12}{seconds:>10.3f}{peak / 2 ** 20:>11.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Round-trips and latency of GmailService.query_emails against the local
+Gmail stub: the former one-GET-per-message loop (format=full) versus the
+batched metadata fetch.
+
+    cd mcp-gsuite && python -m benchmarks.gmail_batch --messages 100 --latency 0.02
+
+--fail-rate makes that share of the messages answer 429 once inside a
+batch, to show the retry pass. Both paths must return the same metadata.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import httplib2
+from google.auth.credentials import AnonymousCredentials
+from googleapiclient.discovery import build_from_document
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from mcp_gsuite.gmail import GmailService  # noqa: E402
+
+from benchmarks.stub_gmail_server import Mailbox, discovery_document, start_stub_gmail  # noqa: E402
+
+
+def stub_gmail_service(url: str) -> GmailService:
+    """A GmailService talking to the stub instead of googleapis.com (no credentials)."""
+    gmail = GmailService.__new__(GmailService)
+    gmail.credentials = AnonymousCredentials()
+    gmail.service = build_from_document(discovery_document(url), http=httplib2.Http())
+    gmail._local = threading.local()
+    return gmail
+
+
+def sequential_query(gmail: GmailService, max_results: int) -> list[dict]:
+    """query_emails as it was before batching: one messages.get per result."""
+    result = gmail.service.users().messages().list(userId='me', maxResults=max_results).execute()
+    parsed = []
+    for msg in result.get('messages', []):
+        txt = gmail.service.users().messages().get(userId='me', id=msg['id']).execute()
+        parsed_message = gmail._parse_message(txt=txt, parse_body=False)
+        if parsed_message:
+            parsed.append(parsed_message)
+    return parsed
+
+
+def measure(name: str, stub, run) -> tuple[list[dict], dict]:
+    stub.stats.reset()
+    started = time.perf_counter()
+    emails = run()
+    elapsed = time.perf_counter() - started
+    row = {'path': name, 'emails': len(emails), 'seconds': round(elapsed, 3), **stub.stats.as_dict()}
+    return emails, row
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sequential vs batched Gmail message fetch')
+    parser.add_argument('--messages', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds per HTTP round-trip')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='share of messages throttled once in a batch')
+    parser.add_argument('--json', action='store_true', help='print the rows as JSON')
+    args = parser.parse_args()
+
+    stub = start_stub_gmail(mailbox=Mailbox(args.messages), latency=args.latency, fail_rate=args.fail_rate)
+    gmail = stub_gmail_service(stub.url)
+    try:
+        sequential, sequential_row = measure('sequential', stub, lambda: sequential_query(gmail, args.messages))
+        batched, batched_row = measure('batch', stub, lambda: gmail.query_emails(max_results=args.messages))
+    finally:
+        stub.shutdown()
+
+    if sequential != batched:
+        raise SystemExit('batched results differ from the sequential ones')
+
+    rows = [sequential_row, batched_row]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{'path':<12}{'emails':>8}{'seconds':>10}{'round_trips':>13}{'sub_requests':>14}{'bytes_sent':>12}{'throttled':>11}")
+    for row in rows:
+        print(f"{row['path']:<12}{row['emails']:>8}{row['seconds']:>10}{row['round_trips']:>13}"
+              f"{row['sub_requests']:>14}{row['bytes_sent']:>12}{row['throttled']:>11}")
+    print(f"speed-up x{sequential_row['seconds'] / max(batched_row['seconds'], 1e-9):.1f}, "
+          f"round-trips {sequential_row['round_trips']} -> {batched_row['round_trips']}")
+
+
+if __name__ == '__main__':
+    main()
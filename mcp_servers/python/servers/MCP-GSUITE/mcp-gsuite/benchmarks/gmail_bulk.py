@@ -0,0 +1,115 @@
+"""
+bulk_get_gmail_emails and bulk_save_gmail_attachments against the local
+Gmail stub: the former one-at-a-time loops versus the batched message
+lookups and the parallel attachment downloads.
+
+    cd mcp-gsuite && python -m benchmarks.gmail_bulk --messages 20 --attachments 3 --latency 0.05
+
+Saved files are checked against the stub's content.
+"""
+import argparse
+import base64
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from mcp_gsuite.gmail import BULK_MAX_WORKERS, GmailService  # noqa: E402
+
+from benchmarks.gmail_batch import stub_gmail_service  # noqa: E402
+from benchmarks.stub_gmail_server import Mailbox, attachment_content, start_stub_gmail  # noqa: E402
+
+
+def sequential_get(gmail: GmailService, email_ids: list[str]) -> list[dict]:
+    """bulk_get_gmail_emails before: one full fetch per ID."""
+    results = []
+    for email_id in email_ids:
+        email, attachments = gmail.get_email_by_id_with_attachments(email_id)
+        if email is not None:
+            email["attachments"] = attachments
+            results.append(email)
+    return results
+
+
+def sequential_save(gmail: GmailService, items: list[dict]):
+    """bulk_save_gmail_attachments before: message fetch, download and write per attachment."""
+    for item in items:
+        _, attachments = gmail.get_email_by_id_with_attachments(item["message_id"])
+        attachment_id = attachments[item["part_id"]]["attachmentId"]
+        data = gmail.get_attachment(item["message_id"], attachment_id)["data"]
+        with open(item["save_path"], "wb") as f:
+            f.write(base64.urlsafe_b64decode(data + "=" * (-len(data) % 4)))
+
+
+def check_files(mailbox: Mailbox, items: list[dict]):
+    for item in items:
+        message = mailbox.messages[item["message_id"]]
+        part = next(p for p in message["payload"]["parts"] if p["partId"] == item["part_id"])
+        expected = attachment_content(part["body"]["attachmentId"], part["body"]["size"])
+        with open(item["save_path"], "rb") as f:
+            if f.read() != expected:
+                raise SystemExit(f"{item['save_path']} does not match the attachment")
+
+
+def measure(name: str, stub, run) -> tuple[object, dict]:
+    stub.stats.reset()
+    started = time.perf_counter()
+    result = run()
+    seconds = time.perf_counter() - started
+    return result, {"path": name, "seconds": round(seconds, 3), **stub.stats.as_dict()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs batched/parallel Gmail bulk tools")
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--attachments", type=int, default=3, help="attachments per message")
+    parser.add_argument("--attachment-size", type=int, default=256 * 1024)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per HTTP round-trip")
+    parser.add_argument("--workers", type=int, default=BULK_MAX_WORKERS)
+    args = parser.parse_args()
+
+    mailbox = Mailbox(args.messages, attachments=args.attachments, attachment_size=args.attachment_size)
+    stub = start_stub_gmail(mailbox=mailbox, latency=args.latency)
+    gmail = stub_gmail_service(stub.url)
+    email_ids = list(mailbox.order)
+    rows = []
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            items = [
+                {"message_id": message_id, "part_id": str(2 + number),
+                 "save_path": os.path.join(directory, f"{message_id}-{number}.pdf")}
+                for message_id in email_ids for number in range(args.attachments)
+            ]
+
+            old, row = measure("get sequential", stub, lambda: sequential_get(gmail, email_ids))
+            rows.append(row)
+            new, row = measure("get batch", stub, lambda: gmail.get_emails_by_ids_with_attachments(email_ids))
+            rows.append(row)
+            if [{k: v for k, v in e.items() if k != "status"} for e in new] != old:
+                raise SystemExit("batched emails differ from the sequential ones")
+
+            _, row = measure("save sequential", stub, lambda: sequential_save(gmail, items))
+            rows.append(row)
+            check_files(mailbox, items)
+            for item in items:
+                os.remove(item["save_path"])
+
+            saved, row = measure("save parallel", stub, lambda: gmail.save_attachments(items, max_workers=args.workers))
+            rows.append(row)
+            failed = [result for result in saved if result["status"] != "saved"]
+            if failed:
+                raise SystemExit(f"{len(failed)} attachments failed: {failed[0]}")
+            check_files(mailbox, items)
+    finally:
+        stub.shutdown()
+
+    print(f"{len(email_ids)} messages, {len(items)} attachments of {args.attachment_size} bytes, {args.workers} workers")
+    print(f"{'path':<18}{'seconds':>10}{'round_trips':>13}{'sub_requests':>14}{'bytes_sent':>12}")
+    for row in rows:
+        print(f"{row['path']:<18}{row['seconds']:>10}{row['round_trips']:>13}{row['sub_requests']:>14}{row['bytes_sent']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Tight loop of CalendarService(...).list_calendars() against the local
+stub, as every calendar tool call does it: building the service per call
+(authorize the credentials, read and parse the discovery document, build
+the service with a new HTTP connection) versus the per-credential
+service cache.
+
+    cd mcp-gsuite && python -m benchmarks.service_cache --calls 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from googleapiclient import discovery_cache  # noqa: E402
+from googleapiclient.discovery import build_from_document  # noqa: E402
+
+from mcp_gsuite import gauth, service_cache  # noqa: E402
+from mcp_gsuite.calendar import CalendarService  # noqa: E402
+
+from benchmarks.stub_gmail_server import CALENDARS, discovery_document, start_stub_gmail  # noqa: E402
+
+# Authorized user info as stored by the OAuth flow; not expired, so nothing is refreshed
+CREDS_DATA = {
+    "token": "ya29.stub-access-token",
+    "refresh_token": "1//stub-refresh-token",
+    "client_id": "stub-client.apps.googleusercontent.com",
+    "client_secret": "stub-secret",
+    "expiry": "2999-01-01T00:00:00Z",
+}
+
+
+def uncached_calendar_service(url: str) -> CalendarService:
+    """CalendarService as built before the cache: what build('calendar', 'v3', credentials=...) does."""
+    calendar = CalendarService.__new__(CalendarService)
+    credentials = gauth.authorize_credentials(CREDS_DATA)
+    document = json.loads(discovery_cache.get_static_doc('calendar', 'v3'))
+    document['rootUrl'] = url + '/'
+    calendar.service = build_from_document(document, credentials=credentials)
+    return calendar
+
+
+def loop(calls: int, make_service) -> tuple[float, list[float]]:
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(calls):
+        call_started = time.perf_counter()
+        calendars = make_service().list_calendars()
+        latencies.append(time.perf_counter() - call_started)
+        if len(calendars) != len(CALENDARS):
+            raise SystemExit(f'list_calendars returned {len(calendars)} calendars')
+    return time.perf_counter() - started, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description='list_calendars with and without the service cache')
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds per HTTP round-trip')
+    args = parser.parse_args()
+
+    stub = start_stub_gmail(latency=args.latency)
+    # The cache reads the stub's rewritten document instead of the bundled one
+    service_cache._discovery_documents[('calendar', 'v3')] = json.dumps(discovery_document(stub.url, 'calendar', 'v3'))
+    rows = []
+    try:
+        for name, make_service in [
+            ('uncached', lambda: uncached_calendar_service(stub.url)),
+            ('cached', lambda: CalendarService(credentials=CREDS_DATA)),
+        ]:
+            stub.stats.reset()
+            seconds, latencies = loop(args.calls, make_service)
+            latencies.sort()
+            rows.append((name, seconds, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99) - 1],
+                         stub.stats.round_trips))
+    finally:
+        stub.shutdown()
+
+    print(f'{args.calls} list_calendars calls, {args.latency}s per round-trip; cache {service_cache.service_cache.stats()}')
+    print(f"{'path':<10}{'seconds':>10}{'calls/s':>10}{'p50_ms':>9}{'p99_ms':>9}{'round_trips':>13}")
+    for name, seconds, p50, p99, round_trips in rows:
+        print(f'{name:<10}{seconds:>10.3f}{args.calls / seconds:>10.0f}{p50 * 1000:>9.2f}{p99 * 1000:>9.2f}{round_trips:>13}')
+
+
+if __name__ == '__main__':
+    main()
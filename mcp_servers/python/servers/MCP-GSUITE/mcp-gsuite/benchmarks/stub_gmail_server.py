@@ -0,0 +1,339 @@
+"""
+Local stub of the Gmail REST API for the benchmarks.
+
+Serves a generated mailbox over plain HTTP:
+
+  GET  /gmail/v1/users/me/messages          list (q is ignored, maxResults honoured)
+  GET  /gmail/v1/users/me/messages/{id}     format=full|metadata|minimal, metadataHeaders
+  GET  /gmail/v1/users/me/messages/{id}/attachments/{attachmentId}
+  POST /batch, /batch/gmail/v1              multipart/mixed batch of the GETs above
+  GET  /calendar/v3/users/me/calendarList   a few calendars
+  POST /token                               OAuth2 refresh, a new access token valid for --token-lifetime
+
+Every HTTP round-trip costs --latency seconds, like the RTT to Google.
+With --fail-rate a share of the messages answers 429 the first time it is
+requested inside a batch, to exercise the client's retries.
+
+Point a googleapiclient service at it with `discovery_document(url, api, version)`:
+
+    service = build_from_document(discovery_document(stub.url), http=httplib2.Http())
+"""
+import argparse
+import base64
+import email.parser
+import email.policy
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+import zlib
+from googleapiclient import discovery_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DISCOVERY_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gmail.v1.json')
+MESSAGES_PATH = '/gmail/v1/users/me/messages'
+CALENDAR_LIST_PATH = '/calendar/v3/users/me/calendarList'
+TOKEN_PATH = '/token'
+# gmail.v1.json says batchPath "batch"; Google also documents /batch/gmail/v1
+BATCH_PATHS = ('/batch', '/batch/gmail/v1')
+
+
+def discovery_document(url: str, api: str = 'gmail', version: str = 'v1') -> dict:
+    """Discovery document (the repo's gmail.v1.json for Gmail) with every URL rewritten to the stub at `url`."""
+    if (api, version) == ('gmail', 'v1'):
+        with open(DISCOVERY_FILE) as f:
+            document = json.load(f)
+    else:
+        document = json.loads(discovery_cache.get_static_doc(api, version))
+    document['rootUrl'] = url.rstrip('/') + '/'
+    document['baseUrl'] = document['rootUrl']
+    document['mtlsRootUrl'] = document['rootUrl']
+    return document
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode('ascii')
+
+
+def attachment_content(attachment_id: str, size: int) -> bytes:
+    """Deterministic content of a stub attachment, so downloads can be checked."""
+    block = hashlib.sha256(attachment_id.encode()).digest() * 32
+    return (block * (size // len(block) + 1))[:size]
+
+
+class Mailbox:
+    """
+    `count` generated messages with realistic headers, a text body and
+    `attachments` attachments of `attachment_size` bytes each.
+    """
+
+    def __init__(self, count: int = 100, body_size: int = 4096, attachments: int = 0, attachment_size: int = 256 * 1024):
+        self.messages = {}
+        self.order = []
+        self.attachment_sizes = {}
+        for index in range(count):
+            message_id = f'{0x18c0000000000000 + index:x}'
+            self.order.append(message_id)
+            message = self._message(index, message_id, body_size)
+            for number in range(attachments):
+                attachment_id = f'ANGjdJ{message_id}x{number}'
+                self.attachment_sizes[(message_id, attachment_id)] = attachment_size
+                message['payload']['parts'].append({
+                    'partId': str(2 + number), 'mimeType': 'application/pdf', 'filename': f'report-{index}-{number}.pdf',
+                    'headers': [], 'body': {'attachmentId': attachment_id, 'size': attachment_size},
+                })
+            if attachments:
+                message['payload']['mimeType'] = 'multipart/mixed'
+            self.messages[message_id] = message
+
+    def attachment(self, message_id: str, attachment_id: str) -> dict | None:
+        size = self.attachment_sizes.get((message_id, attachment_id))
+        if size is None:
+            return None
+        return {'size': size, 'data': _b64url(attachment_content(attachment_id, size))}
+
+    @staticmethod
+    def _message(index: int, message_id: str, body_size: int) -> dict:
+        sender = f'sender{index % 7}@example.com'
+        headers = [
+            {'name': 'Delivered-To', 'value': 'me@example.com'},
+            # Headers _parse_message does not read; a metadata fetch leaves them out
+            *({'name': 'Received', 'value': f'from mx{hop}.example.com by mx.google.com; hop {hop}'} for hop in range(4)),
+            {'name': 'DKIM-Signature', 'value': 'v=1; a=rsa-sha256; ' + 'b' * 344},
+            {'name': 'Subject', 'value': f'Quarterly report #{index}'},
+            {'name': 'From', 'value': f'Sender {index % 7} <{sender}>'},
+            {'name': 'To', 'value': 'me@example.com'},
+            {'name': 'Cc', 'value': 'team@example.com'},
+            {'name': 'Date', 'value': 'Mon, 6 Oct 2025 09:00:00 +0000'},
+            {'name': 'Message-ID', 'value': f'<{message_id}@example.com>'},
+        ]
+        body = (f'Message {index}. ' * (body_size // 12 + 1))[:body_size].encode('utf-8')
+        return {
+            'id': message_id,
+            'threadId': message_id,
+            'labelIds': ['INBOX', 'UNREAD'],
+            'snippet': f'Message {index}. Message {index}.',
+            'historyId': str(1000 + index),
+            'internalDate': str(1759741200000 + index * 1000),
+            'sizeEstimate': len(body) + 2048,
+            'payload': {
+                'partId': '',
+                'mimeType': 'multipart/alternative',
+                'filename': '',
+                'headers': headers,
+                'body': {'size': 0},
+                'parts': [
+                    {'partId': '0', 'mimeType': 'text/plain', 'filename': '', 'headers': [],
+                     'body': {'size': len(body), 'data': _b64url(body)}},
+                    {'partId': '1', 'mimeType': 'text/html', 'filename': '', 'headers': [],
+                     'body': {'size': len(body) + 13, 'data': _b64url(b'<p>' + body + b'</p>')}},
+                ],
+            },
+        }
+
+    def get(self, message_id: str, format: str = 'full', metadata_headers: list[str] | None = None) -> dict | None:
+        message = self.messages.get(message_id)
+        if message is None:
+            return None
+        if format == 'full':
+            return message
+        reply = {key: value for key, value in message.items() if key != 'payload'}
+        if format == 'metadata':
+            wanted = {name.lower() for name in metadata_headers or []}
+            headers = [h for h in message['payload']['headers'] if not wanted or h['name'].lower() in wanted]
+            reply['payload'] = {'mimeType': message['payload']['mimeType'], 'headers': headers}
+        return reply
+
+
+class StubStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.round_trips = 0
+        self.sub_requests = 0
+        self.bytes_sent = 0
+        self.throttled = 0
+
+    def reset(self):
+        with self.lock:
+            self.round_trips = self.sub_requests = self.bytes_sent = self.throttled = 0
+
+    def as_dict(self) -> dict:
+        return {
+            'round_trips': self.round_trips,
+            'sub_requests': self.sub_requests,
+            'bytes_sent': self.bytes_sent,
+            'throttled': self.throttled,
+        }
+
+
+class StubGmailServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, mailbox: Mailbox, latency: float = 0.02, fail_rate: float = 0.0):
+        super().__init__(address, _Handler)
+        self.mailbox = mailbox
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.stats = StubStats()
+        self.token_lifetime = 3600
+        self.tokens_issued = 0
+        self._throttled_ids = set()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def should_throttle(self, message_id: str) -> bool:
+        # Deterministic per id, and only the first time the id is seen
+        if not self.fail_rate or message_id in self._throttled_ids:
+            return False
+        if zlib.crc32(message_id.encode()) % 1000 >= self.fail_rate * 1000:
+            return False
+        self._throttled_ids.add(message_id)
+        return True
+
+    def answer(self, method: str, target: str, in_batch: bool = False) -> tuple[int, dict]:
+        """Status and JSON body for one (possibly batched) API request."""
+        parts = urlsplit(target)
+        query = parse_qs(parts.query)
+        if method == 'GET' and parts.path == CALENDAR_LIST_PATH:
+            return 200, {'kind': 'calendar#calendarList', 'items': CALENDARS}
+        if method != 'GET' or not parts.path.startswith(MESSAGES_PATH):
+            return 404, {'error': {'code': 404, 'message': f'Unknown route {method} {parts.path}'}}
+
+        if parts.path == MESSAGES_PATH:
+            limit = int(query.get('maxResults', ['100'])[0])
+            ids = self.mailbox.order[:limit]
+            return 200, {'messages': [{'id': i, 'threadId': i} for i in ids], 'resultSizeEstimate': len(ids)}
+
+        message_id, _, attachment_id = parts.path[len(MESSAGES_PATH) + 1:].partition('/attachments/')
+        if attachment_id:
+            with self.stats.lock:
+                self.stats.sub_requests += 1
+            attachment = self.mailbox.attachment(message_id, attachment_id)
+            if attachment is None:
+                return 404, {'error': {'code': 404, 'message': 'Invalid attachment token'}}
+            return 200, attachment
+
+        with self.stats.lock:
+            self.stats.sub_requests += 1
+            throttled = in_batch and self.should_throttle(message_id)
+            if throttled:
+                self.stats.throttled += 1
+        if throttled:
+            return 429, {'error': {'code': 429, 'message': 'Too many concurrent requests for user', 'status': 'RESOURCE_EXHAUSTED'}}
+        message = self.mailbox.get(message_id, query.get('format', ['full'])[0], query.get('metadataHeaders'))
+        if message is None:
+            return 404, {'error': {'code': 404, 'message': 'Requested entity was not found.'}}
+        return 200, message
+
+
+CALENDARS = [
+    {'kind': 'calendar#calendarListEntry', 'id': calendar_id, 'summary': summary, 'timeZone': 'Europe/Berlin',
+     'etag': f'"{1700000000000 + number}"', 'accessRole': 'owner', **({'primary': True} if number == 0 else {})}
+    for number, (calendar_id, summary) in enumerate([
+        ('me@example.com', 'me@example.com'),
+        ('family@group.calendar.google.com', 'Family'),
+        ('en.german#holiday@group.v.calendar.google.com', 'Holidays in Germany'),
+    ])
+]
+
+_REASONS = {200: 'OK', 404: 'Not Found', 429: 'Too Many Requests'}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body leave in one write; separate small writes on a kept-alive
+    # connection would add the client's delayed-ACK wait (~40ms) to every request
+    wbufsize = -1
+    disable_nagle_algorithm = True
+    server: StubGmailServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, content_type: str, body: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with self.server.stats.lock:
+            self.server.stats.bytes_sent += len(body)
+
+    def _round_trip(self):
+        with self.server.stats.lock:
+            self.server.stats.round_trips += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+    def do_GET(self):
+        self._round_trip()
+        status, payload = self.server.answer('GET', self.path)
+        self._reply(status, 'application/json; charset=UTF-8', json.dumps(payload).encode('utf-8'))
+
+    def do_POST(self):
+        self._round_trip()
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if urlsplit(self.path).path == TOKEN_PATH:
+            with self.server.stats.lock:
+                self.server.tokens_issued += 1
+                token = f'ya29.stub-{self.server.tokens_issued}'
+            payload = {'access_token': token, 'expires_in': self.server.token_lifetime, 'token_type': 'Bearer'}
+            self._reply(200, 'application/json', json.dumps(payload).encode('utf-8'))
+            return
+        if urlsplit(self.path).path not in BATCH_PATHS:
+            self._reply(404, 'application/json', b'{"error": {"code": 404}}')
+            return
+
+        envelope = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            b'Content-Type: ' + self.headers['Content-Type'].encode() + b'\r\n\r\n' + body
+        )
+        boundary = f'batch_{uuid.uuid4().hex}'
+        chunks = []
+        for part in envelope.iter_parts():
+            request_line = part.get_payload(decode=True).decode('utf-8').lstrip().split('\n', 1)[0].strip()
+            method, target = request_line.split(' ')[:2]
+            status, payload = self.server.answer(method, target, in_batch=True)
+            content = json.dumps(payload)
+            chunks.append(
+                f'--{boundary}\r\n'
+                f'Content-Type: application/http\r\n'
+                f'Content-ID: <response-{part["Content-ID"].strip("<>")}>\r\n\r\n'
+                f'HTTP/1.1 {status} {_REASONS.get(status, "Error")}\r\n'
+                f'Content-Type: application/json; charset=UTF-8\r\n'
+                f'Content-Length: {len(content.encode("utf-8"))}\r\n\r\n'
+                f'{content}\r\n'
+            )
+        chunks.append(f'--{boundary}--\r\n')
+        self._reply(200, f'multipart/mixed; boundary={boundary}', ''.join(chunks).encode('utf-8'))
+
+
+def start_stub_gmail(host: str = '127.0.0.1', port: int = 0, mailbox: Mailbox | None = None,
+                     latency: float = 0.02, fail_rate: float = 0.0) -> StubGmailServer:
+    """Start the stub in a daemon thread; port 0 picks a free port (see `.url`)."""
+    server = StubGmailServer((host, port), mailbox or Mailbox(), latency=latency, fail_rate=fail_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8700)
+    parser.add_argument('--messages', type=int, default=100)
+    parser.add_argument('--attachments', type=int, default=0, help='attachments per message')
+    parser.add_argument('--attachment-size', type=int, default=256 * 1024)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    parser.add_argument('--token-lifetime', type=int, default=3600, help='expires_in of the tokens /token issues')
+    args = parser.parse_args()
+    mailbox = Mailbox(args.messages, attachments=args.attachments, attachment_size=args.attachment_size)
+    stub = StubGmailServer((args.host, args.port), mailbox, args.latency, args.fail_rate)
+    stub.token_lifetime = args.token_lifetime
+    print(f'Stub Gmail API on {stub.url}', flush=True)
+    stub.serve_forever()
@@ -0,0 +1,157 @@
+"""
+OAuth2 token refreshes and credential file writes for bursts of
+concurrent tool calls of one account, with the stub as token endpoint:
+the former per-call authorize (parse, refresh when expired) versus the
+gauth credential manager.
+
+    cd mcp-gsuite && python -m benchmarks.token_refresh --threads 16 --calls 10
+
+The credentials file starts without an expiry, as files written before
+the manager; such credentials count as expired on every load. Failed
+calls of the former stored path read the file while another thread was
+rewriting it in place.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import google.oauth2.credentials  # noqa: E402
+from google.auth.transport.requests import Request  # noqa: E402
+from google.oauth2.credentials import Credentials  # noqa: E402
+
+from mcp_gsuite import gauth  # noqa: E402
+
+from benchmarks.stub_gmail_server import start_stub_gmail  # noqa: E402
+
+USER_ID = 'me@example.com'
+
+
+def old_authorize(creds_data: dict) -> Credentials:
+    """authorize_credentials before the credential manager."""
+    credentials = Credentials.from_authorized_user_info(creds_data)
+    if credentials.expired:
+        credentials.refresh(Request())
+    return credentials
+
+
+def old_get_stored(user_id: str) -> Credentials:
+    """get_stored_credentials before the credential manager: refresh and rewrite when expired."""
+    with open(gauth._get_credential_filename(user_id)) as f:
+        creds_data = json.load(f)
+    credentials = Credentials.from_authorized_user_info(creds_data)
+    if credentials.expired:
+        credentials.refresh(Request())
+        with open(gauth._get_credential_filename(user_id), 'w') as f:
+            json.dump({'token': credentials.token, 'refresh_token': credentials.refresh_token,
+                       'token_uri': credentials.token_uri, 'client_id': credentials.client_id,
+                       'client_secret': credentials.client_secret, 'scopes': credentials.scopes}, f)
+    return credentials
+
+
+def burst(threads: int, calls: int, call) -> tuple[float, int]:
+    """
+    `threads` threads making `calls` calls each, all starting together.
+    Returns the seconds taken and the number of failed calls.
+    """
+    start = threading.Barrier(threads)
+    errors = []
+
+    def worker():
+        start.wait()
+        for _ in range(calls):
+            try:
+                if not call().token:
+                    raise RuntimeError('no access token')
+            except Exception as e:
+                errors.append(e)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - started, len(errors)
+
+
+class FileWrites:
+    """Counts replacements and rewrites of a file by polling its inode and mtime."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.writes = 0
+        self._last = self._stat()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+        self._thread.start()
+
+    def _stat(self):
+        stat = os.stat(self.path)
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _poll(self):
+        while not self._stop.wait(0.0005):
+            current = self._stat()
+            if current != self._last:
+                self.writes += 1
+                self._last = current
+
+    def stop(self) -> int:
+        self._stop.set()
+        self._thread.join()
+        return self.writes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Token refreshes with and without the credential manager')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--calls', type=int, default=10, help='calls per thread')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per token request')
+    args = parser.parse_args()
+
+    stub = start_stub_gmail(latency=args.latency)
+    # from_authorized_user_info always uses Google's token endpoint, whatever token_uri says
+    google.oauth2.credentials._GOOGLE_OAUTH2_TOKEN_ENDPOINT = stub.url + '/token'
+    creds_data = {
+        'token': 'ya29.stale', 'refresh_token': '1//stub-refresh-token',
+        'client_id': 'stub-client.apps.googleusercontent.com', 'client_secret': 'stub-secret',
+    }
+    rows = []
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            sys.argv += ['--credentials-dir', directory]
+            cred_file = gauth._get_credential_filename(USER_ID)
+
+            for name, call, stored in [
+                ('authorize, before', lambda: old_authorize(creds_data), False),
+                ('authorize, manager', lambda: gauth.authorize_credentials(creds_data), False),
+                ('stored, before', lambda: old_get_stored(USER_ID), True),
+                ('stored, manager', lambda: gauth.get_stored_credentials(USER_ID), True),
+            ]:
+                gauth.credential_manager = gauth.CredentialManager()
+                with open(cred_file, 'w') as f:
+                    json.dump(creds_data, f)
+                writes = FileWrites(cred_file)
+                issued = stub.tokens_issued
+                try:
+                    seconds, failed = burst(args.threads, args.calls, call)
+                finally:
+                    file_writes = writes.stop()
+                rows.append((name, seconds, stub.tokens_issued - issued, file_writes if stored else '-', failed))
+    finally:
+        stub.shutdown()
+
+    print(f'{args.threads} threads x {args.calls} calls, {args.latency}s per token request')
+    print(f"{'path':<20}{'seconds':>9}{'refreshes':>11}{'file_writes':>13}{'failed':>8}")
+    for name, seconds, refreshes, file_writes, failed in rows:
+        print(f'{name:<20}{seconds:>9.3f}{refreshes:>11}{file_writes:>13}{failed:>8}')
+
+
+if __name__ == '__main__':
+    main()
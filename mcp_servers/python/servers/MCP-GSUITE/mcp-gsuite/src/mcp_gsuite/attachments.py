@@ -0,0 +1,243 @@
+import argparse
+import base64
+import contextlib
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+
+import requests
+
+# Bytes of the HTTP response read per step; a download holds about
+# DOWNLOAD_BUFFERS of these at once (raw, decompressed and decoded data)
+CHUNK_SIZE = 256 * 1024
+DOWNLOAD_BUFFERS = 3
+DOWNLOAD_TIMEOUT = 60
+
+
+def get_attachment_memory_limit() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--attachment-memory-limit",
+        type=int,
+        default=32 * 1024 * 1024,
+        help="Upper bound in bytes of the buffers of all attachment downloads in flight",
+    )
+    args, _ = parser.parse_known_args()
+    return args.attachment_memory_limit
+
+
+def get_attachment_inline_limit() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--attachment-inline-limit",
+        type=int,
+        default=1024 * 1024,
+        help="Attachments larger than this (bytes) are returned as a file reference instead of inline",
+    )
+    args, _ = parser.parse_known_args()
+    return args.attachment_inline_limit
+
+
+def get_attachment_dir() -> str:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--attachment-dir",
+        type=str,
+        default=os.path.join(tempfile.gettempdir(), "mcp-gsuite-attachments"),
+        help="Directory for attachments returned as file references",
+    )
+    args, _ = parser.parse_known_args()
+    return args.attachment_dir
+
+
+def get_attachment_retention() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--attachment-retention",
+        type=int,
+        default=3600,
+        help="Seconds a file returned as a reference is kept in --attachment-dir before it is deleted",
+    )
+    args, _ = parser.parse_known_args()
+    return args.attachment_retention
+
+
+# Prefix of the per-download directories under --attachment-dir; only these are ever cleaned up
+_DOWNLOAD_DIR_PREFIX = "download-"
+
+
+def new_attachment_path(filename: str, directory: str | None = None) -> str:
+    """Unique path for one download: the file name in a directory of its own under the attachment dir."""
+    directory = directory or get_attachment_dir()
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(tempfile.mkdtemp(dir=directory, prefix=_DOWNLOAD_DIR_PREFIX), os.path.basename(filename))
+
+
+def remove_attachment_path(path: str):
+    """Delete a file from new_attachment_path() along with its directory."""
+    shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+
+def cleanup_attachment_dir(retention: float, directory: str | None = None) -> int:
+    """
+    Delete the download directories of the attachment dir older than
+    retention seconds. Returns how many were deleted.
+    """
+    directory = directory or get_attachment_dir()
+    deadline = time.time() - retention
+    removed = 0
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if (entry.name.startswith(_DOWNLOAD_DIR_PREFIX) and entry.is_dir(follow_symlinks=False)
+                    and entry.stat(follow_symlinks=False).st_mtime < deadline):
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        except FileNotFoundError:
+            # Removed by a concurrent cleanup
+            continue
+    return removed
+
+
+def download_limits(memory_limit: int, max_workers: int) -> tuple[int, int]:
+    """(parallel downloads, chunk size) keeping all download buffers under memory_limit."""
+    chunk_size = max(4096, min(CHUNK_SIZE, memory_limit // DOWNLOAD_BUFFERS))
+    workers = max(1, min(max_workers, memory_limit // (DOWNLOAD_BUFFERS * chunk_size)))
+    return workers, chunk_size
+
+
+class AttachmentIntegrityError(Exception):
+    """The downloaded attachment does not match its declared size or expected checksum."""
+
+
+class Base64FieldWriter:
+    """
+    Decodes the base64url "data" field of a Gmail attachments.get response
+    while it streams in and writes the bytes to a file, so neither the
+    base64 text nor the decoded attachment is ever held in memory whole.
+    The rest of the JSON (size, attachmentId) is parsed by close().
+    """
+
+    _DATA_FIELD = re.compile(rb'"data"\s*:\s*"')
+    # The JSON around the data value is a few fields; anything bigger is not an attachment
+    MAX_ENVELOPE = 64 * 1024
+
+    def __init__(self, file):
+        self.file = file
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self._state = "before"
+        self._envelope = b""
+        self._pending = b""
+
+    def feed(self, chunk: bytes):
+        while chunk:
+            if self._state == "data":
+                end = chunk.find(b'"')
+                self._decode(chunk if end < 0 else chunk[:end])
+                if end < 0:
+                    return
+                self._decode(b"", final=True)
+                self._state = "after"
+                chunk = chunk[end:]
+                continue
+
+            self._envelope += chunk
+            match = self._DATA_FIELD.search(self._envelope) if self._state == "before" else None
+            if match is None:
+                if len(self._envelope) > self.MAX_ENVELOPE:
+                    raise ValueError("Unexpected attachment response: no data field")
+                return
+            chunk = self._envelope[match.end():]
+            self._envelope = self._envelope[:match.end()]
+            self._state = "data"
+
+    def _decode(self, data: bytes, final: bool = False):
+        data = self._pending + data
+        if b"\\" in data:
+            # Google JSON may escape the padding as \u003d; keep a split escape for the next chunk
+            escape = data.rfind(b"\\")
+            if not final and len(data) - escape < 6:
+                data, self._pending = data[:escape], data[escape:]
+            else:
+                self._pending = b""
+            data = data.replace(b"\\u003d", b"=").replace(b"\\u003D", b"=")
+        else:
+            self._pending = b""
+
+        if final:
+            usable = len(data)
+            data += b"=" * (-len(data) % 4)
+        else:
+            usable = len(data) - len(data) % 4
+            data, self._pending = data[:usable], data[usable:] + self._pending
+        if usable:
+            content = base64.urlsafe_b64decode(data)
+            self.file.write(content)
+            self.sha256.update(content)
+            self.size += len(content)
+
+    def close(self) -> dict:
+        """The response's other fields; raises ValueError on a truncated response."""
+        if self._state != "after":
+            raise ValueError("Attachment response ended before the end of its data")
+        return json.loads(self._envelope.decode("utf-8"))
+
+
+def download_attachment(session: requests.Session, url: str, save_path: str, chunk_size: int = CHUNK_SIZE,
+                        expected_sha256: str | None = None, timeout: float = DOWNLOAD_TIMEOUT) -> dict:
+    """
+    Stream an attachments.get response into save_path.
+
+    The file is written next to save_path under a temporary name and only
+    moved into place once complete and verified, so a failed download never
+    leaves a partial file behind.
+
+    Args:
+        session (requests.Session): Authorized session to download with
+        url (str): attachments.get URL
+        save_path (str): Where to write the decoded attachment
+        chunk_size (int): Bytes of the response processed at a time
+        expected_sha256 (str, optional): Hex SHA-256 the content must have
+
+    Returns:
+        dict: {'path', 'size', 'sha256'} of the saved file
+
+    Raises:
+        AttachmentIntegrityError: If the size differs from the one the API declared,
+                                  or the content from expected_sha256
+        requests.RequestException: On HTTP and connection errors
+    """
+    save_path = os.path.abspath(save_path)
+    directory = os.path.dirname(save_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".download-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            writer = Base64FieldWriter(f)
+            with session.get(url, stream=True, timeout=timeout) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(chunk_size):
+                    writer.feed(chunk)
+            metadata = writer.close()
+
+        sha256 = writer.sha256.hexdigest()
+        declared = metadata.get("size")
+        if declared is not None and int(declared) != writer.size:
+            raise AttachmentIntegrityError(f"Attachment is {writer.size} bytes, the API declared {declared}")
+        if expected_sha256 and expected_sha256.lower() != sha256:
+            raise AttachmentIntegrityError(f"Attachment SHA-256 is {sha256}, expected {expected_sha256}")
+        os.replace(temp_path, save_path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_path)
+        raise
+
+    return {"path": save_path, "size": writer.size, "sha256": sha256}
@@ -7,6 +7,11 @@ import os
 import pydantic
 import json
 import argparse
+import hashlib
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 
@@ -127,14 +132,8 @@ def get_stored_credentials(user_id: str) -> Optional[Credentials]:
         with open(cred_file, 'r') as f:
             creds_data = json.load(f)
             
-        credentials = Credentials.from_authorized_user_info(creds_data)
-        
-        # Refresh if expired
-        if credentials.expired:
-            credentials.refresh(Request())
-            store_credentials(credentials, user_id)
-            
-        return credentials
+        # Refreshed (once, however many callers) only when close to expiry
+        return credential_manager.credentials(creds_data, user_id=user_id)
         
     except Exception as e:
         logging.error(f"Error loading stored credentials: {e}")
@@ -143,14 +142,22 @@ def get_stored_credentials(user_id: str) -> Optional[Credentials]:
 
 
 
+# Content last written to (or read from) each credentials file
+_stored_content: dict[str, str] = {}
+_store_lock = threading.Lock()
+
+
 def store_credentials(credentials: Credentials, user_id: str):
     """Store credentials to file.
+
+    The file is replaced atomically, and only when its content (token and
+    expiry) actually changed.
     
     Args:
         credentials: Google OAuth2 credentials
         user_id: User's email address
     """
-    cred_file = _get_credential_filename(user_id)
+    cred_file = os.path.abspath(_get_credential_filename(user_id))
     os.makedirs(os.path.dirname(cred_file), exist_ok=True)
     
     creds_data = {
@@ -159,11 +166,29 @@ def store_credentials(credentials: Credentials, user_id: str):
         'token_uri': credentials.token_uri,
         'client_id': credentials.client_id,
         'client_secret': credentials.client_secret,
-        'scopes': credentials.scopes
+        'scopes': credentials.scopes,
+        # Without an expiry, loaded credentials count as expired and get refreshed on every load
+        'expiry': credentials.expiry.strftime('%Y-%m-%dT%H:%M:%SZ') if credentials.expiry else None
     }
-    
-    with open(cred_file, 'w') as f:
-        json.dump(creds_data, f)
+    content = json.dumps(creds_data)
+
+    with _store_lock:
+        if cred_file not in _stored_content and os.path.exists(cred_file):
+            with open(cred_file, 'r') as f:
+                _stored_content[cred_file] = f.read()
+        if _stored_content.get(cred_file) == content:
+            return
+
+        fd, temp_file = tempfile.mkstemp(dir=os.path.dirname(cred_file), prefix='.oauth2.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(content)
+            os.replace(temp_file, cred_file)
+        except BaseException:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            raise
+        _stored_content[cred_file] = content
 
 
 def get_authorization_url(email_address: str, state: str) -> str:
@@ -259,6 +284,153 @@ def get_user_info(credentials: Credentials) -> dict:
         raise NoUserIdException()
 
 
+def credential_identity(creds_data: dict) -> str:
+    """Key of an account: its client_id and a hash of its refresh token (never the token itself)."""
+    secret = creds_data.get("refresh_token") or creds_data.get("token") or ""
+    return f"{creds_data.get('client_id', '')}:{hashlib.sha256(secret.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _utcnow() -> datetime:
+    # google-auth keeps expiry as a naive UTC datetime
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class _CachedCredentials:
+    def __init__(self, credentials: Credentials):
+        self.credentials = credentials
+        # Held while refreshing: concurrent callers wait for that refresh instead of starting their own
+        self.lock = threading.Lock()
+        self.user_id: Optional[str] = None
+        self.timer: Optional[threading.Timer] = None
+        self.last_used = time.monotonic()
+        self.refreshes = 0
+
+
+class CredentialManager:
+    """
+    Authorized credentials kept in memory per account (credential_identity).
+
+    A cached access token is handed out until refresh_margin before its
+    expiry. Concurrent callers needing a refresh of the same account share
+    a single refresh. After every refresh a timer refreshes the token again
+    ahead of its expiry, as long as the account was used within
+    idle_timeout, so tool calls rarely wait for a refresh at all. When the
+    account's user_id is known the refreshed token is stored to disk.
+    """
+
+    def __init__(self, refresh_margin: timedelta = timedelta(minutes=5), idle_timeout: float = 3600):
+        self.refresh_margin = refresh_margin
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._accounts: dict[str, _CachedCredentials] = {}
+
+    def _fresh(self, credentials: Credentials) -> bool:
+        if not credentials.token:
+            return False
+        return credentials.expiry is None or credentials.expiry - self.refresh_margin > _utcnow()
+
+    def credentials(self, creds_data: dict, user_id: Optional[str] = None) -> Credentials:
+        """
+        Credentials for creds_data with an access token valid beyond the refresh margin.
+
+        Args:
+            creds_data (dict): Authorized user info (client_id, client_secret, refresh_token, ...)
+            user_id (str, optional): Account email; refreshed tokens are then stored to its file
+
+        Returns:
+            Credentials: Shared by every caller of the same account
+
+        Raises:
+            google.auth.exceptions.RefreshError: If the token cannot be refreshed
+        """
+        identity = credential_identity(creds_data)
+        with self._lock:
+            cached = self._accounts.get(identity)
+            created = cached is None
+            if created:
+                cached = _CachedCredentials(Credentials.from_authorized_user_info(creds_data))
+                self._accounts[identity] = cached
+        cached.last_used = time.monotonic()
+        if user_id:
+            cached.user_id = user_id
+        if self._fresh(cached.credentials):
+            if created:
+                with cached.lock:
+                    self._schedule(identity, cached)
+            return cached.credentials
+
+        with cached.lock:
+            # Another caller may have refreshed while we waited for the lock
+            if not self._fresh(cached.credentials):
+                offered = Credentials.from_authorized_user_info(creds_data)
+                if self._fresh(offered):
+                    # The caller brought a newer token than the cached one; keep the
+                    # shared Credentials object, which services hold on to
+                    cached.credentials.token = offered.token
+                    cached.credentials.expiry = offered.expiry
+                    self._schedule(identity, cached)
+                else:
+                    self._refresh(identity, cached)
+        return cached.credentials
+
+    def _refresh(self, identity: str, cached: _CachedCredentials):
+        """Refresh the token (cached.lock held), store it and schedule the next refresh."""
+        cached.credentials.refresh(Request())
+        cached.refreshes += 1
+        if cached.user_id:
+            try:
+                store_credentials(cached.credentials, cached.user_id)
+            except Exception as e:
+                logging.error(f"Error storing refreshed credentials for {cached.user_id}: {e}")
+        self._schedule(identity, cached)
+
+    def _schedule(self, identity: str, cached: _CachedCredentials):
+        if cached.timer is not None:
+            cached.timer.cancel()
+            cached.timer = None
+        expiry = cached.credentials.expiry
+        if expiry is None:
+            return
+        delay = max(1.0, (expiry - self.refresh_margin - _utcnow()).total_seconds())
+        # Long-lived tokens: wake up by idle_timeout anyway to drop the account once idle
+        delay = min(delay, self.idle_timeout)
+        cached.timer = threading.Timer(delay, self._background_refresh, args=(identity,))
+        cached.timer.daemon = True
+        cached.timer.start()
+
+    def _background_refresh(self, identity: str):
+        with self._lock:
+            cached = self._accounts.get(identity)
+        if cached is None:
+            return
+        if time.monotonic() - cached.last_used > self.idle_timeout:
+            # Idle account: forget it rather than keep refreshing forever
+            with self._lock:
+                self._accounts.pop(identity, None)
+            return
+        with cached.lock:
+            if self._fresh(cached.credentials):
+                self._schedule(identity, cached)
+                return
+            try:
+                self._refresh(identity, cached)
+            except Exception as e:
+                # The next caller retries the refresh in the foreground
+                cached.timer = None
+                logging.error(f"Error refreshing credentials in the background: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "accounts": len(self._accounts),
+                "refreshes": sum(cached.refreshes for cached in self._accounts.values()),
+            }
+
+
+# Shared by get_stored_credentials, authorize_credentials and the service cache
+credential_manager = CredentialManager()
+
+
 def authorize_credentials(creds_data):
     """
     Authorize credentials, refreshing them if necessary.
@@ -277,13 +449,8 @@ def authorize_credentials(creds_data):
         raise ValueError("Credentials cannot be None")
         
     try:
-        credentials = Credentials.from_authorized_user_info(creds_data)
-        
-        # Refresh if expired
-        if credentials.expired:
-            credentials.refresh(Request())
-            
-        return credentials
+        # Cached per account; refreshed once for concurrent callers, and ahead of expiry
+        return credential_manager.credentials(creds_data)
     except Exception as e:
         logging.error(f"Error authorizing credentials: {e}")
         if "invalid_grant" in str(e):
@@ -1,11 +1,36 @@
-from googleapiclient.discovery import build 
-from . import gauth
+from googleapiclient.errors import HttpError
+from concurrent.futures import ThreadPoolExecutor
+from google.auth.transport.requests import AuthorizedSession
+from . import attachments
+from .service_cache import service_cache
 import logging
 import base64
+import random
+import requests
+import threading
+import time
 import traceback
 from email.mime.text import MIMEText
 from typing import Tuple
 
+# Gmail batch requests take at most 100 sub-requests per HTTP call
+BATCH_SIZE = 100
+# Passes over the sub-requests that failed with a retryable status
+BATCH_MAX_ATTEMPTS = 4
+BATCH_RETRY_BASE_DELAY = 0.5
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Worker threads of the bulk attachment downloads
+BULK_MAX_WORKERS = 8
+# Retries of a single attachment download on 429/5xx and connection errors
+REQUEST_NUM_RETRIES = 3
+
+# The only headers _parse_message reads; metadata fetches ask for just these
+METADATA_HEADERS = [
+    'Subject', 'From', 'To', 'Date', 'Cc', 'Bcc',
+    'Message-ID', 'In-Reply-To', 'References', 'Delivered-To',
+]
+
 
 class GmailService():
     def __init__(self, credentials):
@@ -15,8 +40,20 @@ class GmailService():
         Args:
             credentials: Google OAuth2 credentials object
         """
-        authorized_credentials = gauth.authorize_credentials(credentials)
-        self.service = build('gmail', 'v1', credentials=authorized_credentials)
+        self.credentials, self.service = service_cache.get(credentials, 'gmail', 'v1')
+        self._local = threading.local()
+
+    def _thread_session(self) -> AuthorizedSession:
+        """
+        Streaming downloads go through requests rather than the service's
+        httplib2.Http, which reads whole bodies and is not thread-safe: each
+        worker thread gets a session of its own, authorized with the same credentials.
+        """
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = AuthorizedSession(self.credentials)
+            self._local.session = session
+        return session
 
     def _parse_message(self, txt, parse_body=False) -> dict | None:
         """
@@ -126,6 +163,90 @@ class GmailService():
             logging.error(f"Error extracting body: {str(e)}")
             return None
 
+    @staticmethod
+    def _attachments_of(message: dict) -> dict:
+        """Attachments of a raw message keyed by part ID."""
+        found = {}
+        for part in message.get("payload", {}).get("parts", []):
+            if "attachmentId" in part.get("body", {}):
+                found[part["partId"]] = {
+                    "filename": part["filename"],
+                    "mimeType": part["mimeType"],
+                    "attachmentId": part["body"]["attachmentId"],
+                    "partId": part["partId"]
+                }
+        return found
+
+    def _batch_get_messages(self, message_ids: list[str], format: str = 'metadata',
+                            metadata_headers: list[str] | None = METADATA_HEADERS,
+                            errors: dict[str, str] | None = None) -> dict[str, dict]:
+        """
+        Fetch several messages with Gmail batch requests instead of one
+        HTTPS round-trip per message.
+
+        Args:
+            message_ids (list[str]): Gmail message IDs (duplicates are fetched once)
+            format (str): 'metadata', 'full', 'minimal' or 'raw'
+            metadata_headers (list[str], optional): Headers returned with format='metadata'
+            errors (dict, optional): Filled with the error of every message that could not be fetched
+
+        Returns:
+            dict: Raw messages keyed by message ID. Sub-requests that fail with a
+                  retryable status (429, 5xx) are retried with backoff; messages
+                  that still fail are left out and logged.
+        """
+        messages: dict[str, dict] = {}
+        failures: dict[str, str] = {}
+        pending = list(dict.fromkeys(message_ids))
+
+        for attempt in range(BATCH_MAX_ATTEMPTS):
+            if not pending:
+                break
+            if attempt:
+                time.sleep(random.uniform(0, BATCH_RETRY_BASE_DELAY * (2 ** attempt)))
+
+            failed: list[str] = []
+
+            def on_response(request_id, response, exception):
+                if exception is None:
+                    messages[request_id] = response
+                    failures.pop(request_id, None)
+                    return
+                failures[request_id] = str(exception)
+                if isinstance(exception, HttpError) and exception.resp.status in RETRYABLE_STATUSES:
+                    failed.append(request_id)
+                else:
+                    logging.error(f"Error retrieving email {request_id}: {str(exception)}")
+
+            for start in range(0, len(pending), BATCH_SIZE):
+                chunk = pending[start:start + BATCH_SIZE]
+                batch = self.service.new_batch_http_request(callback=on_response)
+                for message_id in chunk:
+                    request_args = {'userId': 'me', 'id': message_id, 'format': format}
+                    if format == 'metadata' and metadata_headers:
+                        request_args['metadataHeaders'] = metadata_headers
+                    batch.add(self.service.users().messages().get(**request_args), request_id=message_id)
+                try:
+                    batch.execute()
+                except HttpError as e:
+                    # The whole batch call failed; retry its sub-requests that have no answer yet
+                    if e.resp.status not in RETRYABLE_STATUSES:
+                        raise
+                    for message_id in chunk:
+                        if message_id not in messages and message_id not in failed:
+                            failures[message_id] = str(e)
+                            failed.append(message_id)
+
+            if failed and attempt + 1 < BATCH_MAX_ATTEMPTS:
+                logging.warning(f"Retrying {len(failed)} of {len(pending)} message fetches (attempt {attempt + 2})")
+            pending = failed
+
+        if pending:
+            logging.error(f"Giving up on {len(pending)} messages after {BATCH_MAX_ATTEMPTS} attempts")
+        if errors is not None:
+            errors.update(failures)
+        return messages
+
     def query_emails(self, query=None, max_results=100):
         """
         Query emails from Gmail based on a search query.
@@ -152,12 +273,12 @@ class GmailService():
             messages = result.get('messages', [])
             parsed = []
 
-            # Fetch full message details for each message
+            # Fetch the headers of every message in batches of up to 100 per round-trip
+            fetched = self._batch_get_messages([msg['id'] for msg in messages])
             for msg in messages:
-                txt = self.service.users().messages().get(
-                    userId='me', 
-                    id=msg['id']
-                ).execute()
+                txt = fetched.get(msg['id'])
+                if txt is None:
+                    continue
                 parsed_message = self._parse_message(txt=txt, parse_body=False)
                 if parsed_message:
                     parsed.append(parsed_message)
@@ -193,27 +314,48 @@ class GmailService():
             if parsed_email is None:
                 return None, []
 
-            attachments = {}
-            for part in message["payload"]["parts"]:
-                if "attachmentId" in part["body"]:
-                    attachment_id = part["body"]["attachmentId"]
-                    part_id = part["partId"]
-                    attachment = {
-                        "filename": part["filename"],
-                        "mimeType": part["mimeType"],
-                        "attachmentId": attachment_id,
-                        "partId": part_id
-                    }
-                    attachments[part_id] = attachment
-
-
-            return parsed_email, attachments
+            return parsed_email, self._attachments_of(message)
             
         except Exception as e:
             logging.error(f"Error retrieving email {email_id}: {str(e)}")
             logging.error(traceback.format_exc())
             return None, []
         
+    def get_emails_by_ids_with_attachments(self, email_ids: list[str]) -> list[dict]:
+        """
+        Fetch and parse several complete email messages, batching the fetches
+        (up to 100 messages per round-trip).
+
+        Args:
+            email_ids (list[str]): Gmail message IDs to retrieve (duplicates are fetched once)
+
+        Returns:
+            list[dict]: One result per distinct ID, in request order. Retrieved emails
+                        carry 'status': 'ok' and their 'attachments'; the others are
+                        {'id', 'status': 'error', 'error'}.
+        """
+        errors: dict[str, str] = {}
+        try:
+            messages = self._batch_get_messages(email_ids, format='full', errors=errors)
+        except Exception as e:
+            logging.error(f"Error retrieving emails: {str(e)}")
+            logging.error(traceback.format_exc())
+            messages = {}
+            errors = {email_id: str(e) for email_id in email_ids}
+
+        results = []
+        for email_id in dict.fromkeys(email_ids):
+            message = messages.get(email_id)
+            parsed_email = self._parse_message(txt=message, parse_body=True) if message is not None else None
+            if parsed_email is None:
+                error = errors.get(email_id) or ("Failed to parse message" if message is not None else "Message not retrieved")
+                results.append({"id": email_id, "status": "error", "error": error})
+                continue
+            parsed_email["attachments"] = self._attachments_of(message)
+            parsed_email["status"] = "ok"
+            results.append(parsed_email)
+        return results
+
     def get_email_by_id(self, email_id: str) -> dict | None: 
         """
         Fetch and parse a complete email message by its ID.
@@ -417,6 +559,125 @@ class GmailService():
             logging.error(traceback.format_exc())
             return None
 
+    def download_attachment(self, message_id: str, attachment_id: str, save_path: str,
+                            chunk_size: int = attachments.CHUNK_SIZE, expected_sha256: str | None = None) -> dict:
+        """
+        Stream an attachment to disk, decoding its base64 chunk by chunk.
+        Retried on 429/5xx and connection errors.
+
+        Args:
+            message_id (str): The ID of the Gmail message containing the attachment
+            attachment_id (str): The ID of the attachment to download
+            save_path (str): Where to write the attachment
+            chunk_size (int): Bytes of the response held in memory at a time
+            expected_sha256 (str, optional): Hex SHA-256 the attachment must have
+
+        Returns:
+            dict: {'path', 'size', 'sha256'} of the saved file
+
+        Raises:
+            attachments.AttachmentIntegrityError: If the content fails verification
+            requests.RequestException: If the download keeps failing
+        """
+        url = self.service.users().messages().attachments().get(
+            userId='me',
+            messageId=message_id,
+            id=attachment_id
+        ).uri
+        for attempt in range(REQUEST_NUM_RETRIES + 1):
+            try:
+                return attachments.download_attachment(
+                    self._thread_session(), url, save_path, chunk_size=chunk_size, expected_sha256=expected_sha256
+                )
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                status = e.response.status_code if e.response is not None else None
+                if attempt == REQUEST_NUM_RETRIES or (status is not None and status not in RETRYABLE_STATUSES):
+                    raise
+                logging.warning(f"Retrying download of attachment {attachment_id} ({str(e)})")
+                time.sleep(random.uniform(0, BATCH_RETRY_BASE_DELAY * (2 ** (attempt + 1))))
+
+    def save_attachment(self, message_id: str, attachment_id: str, save_path: str,
+                        expected_sha256: str | None = None) -> dict | None:
+        """
+        Save a Gmail attachment to disk without holding it in memory.
+
+        Args:
+            message_id (str): The ID of the Gmail message containing the attachment
+            attachment_id (str): The ID of the attachment to save
+            save_path (str): Where to write the attachment
+            expected_sha256 (str, optional): Hex SHA-256 the attachment must have
+
+        Returns:
+            dict: {'path', 'size', 'sha256'} of the saved file
+            None: If the download or its verification fails
+        """
+        try:
+            _, chunk_size = attachments.download_limits(attachments.get_attachment_memory_limit(), 1)
+            return self.download_attachment(message_id, attachment_id, save_path,
+                                            chunk_size=chunk_size, expected_sha256=expected_sha256)
+        except Exception as e:
+            logging.error(f"Error saving attachment {attachment_id} from message {message_id}: {str(e)}")
+            logging.error(traceback.format_exc())
+            return None
+
+    def save_attachments(self, items: list[dict], max_workers: int = BULK_MAX_WORKERS) -> list[dict]:
+        """
+        Save several attachments to disk. Each message is fetched once (batched)
+        however many of its attachments are requested; the attachments are then
+        streamed to disk on up to max_workers threads, fewer if their buffers
+        would exceed the attachment memory limit.
+
+        Args:
+            items (list[dict]): Items with 'message_id', 'part_id', 'save_path'
+                                and optionally 'sha256' to verify
+            max_workers (int): Maximum number of parallel downloads
+
+        Returns:
+            list[dict]: One result per item, in request order, with 'status'
+                        ('saved' or 'error'), 'size' and 'sha256' or 'error', and 'seconds'
+        """
+        if not items:
+            return []
+        workers, chunk_size = attachments.download_limits(
+            attachments.get_attachment_memory_limit(), min(max_workers, len(items))
+        )
+
+        errors: dict[str, str] = {}
+        try:
+            messages = self._batch_get_messages(
+                [item["message_id"] for item in items], format='full', errors=errors
+            )
+        except Exception as e:
+            logging.error(f"Error retrieving messages: {str(e)}")
+            logging.error(traceback.format_exc())
+            messages = {}
+            errors = {item["message_id"]: str(e) for item in items}
+        parts_by_message = {message_id: self._attachments_of(message) for message_id, message in messages.items()}
+
+        def save(item: dict) -> dict:
+            started = time.perf_counter()
+            message_id = item["message_id"]
+            result = {"message_id": message_id, "part_id": item["part_id"], "save_path": item["save_path"]}
+            try:
+                parts = parts_by_message.get(message_id)
+                if parts is None:
+                    raise LookupError(f"Failed to retrieve message with ID: {message_id}: {errors.get(message_id, 'not found')}")
+                part = parts.get(item["part_id"])
+                if part is None:
+                    raise LookupError(f"Message {message_id} has no attachment in part {item['part_id']}")
+                saved = self.download_attachment(message_id, part["attachmentId"], item["save_path"],
+                                                 chunk_size=chunk_size, expected_sha256=item.get("sha256"))
+                result.update(status="saved", size=saved["size"], sha256=saved["sha256"])
+            except Exception as e:
+                logging.error(f"Error saving attachment {item['part_id']} of message {message_id}: {str(e)}")
+                result["status"] = "error"
+                result["error"] = str(e)
+            result["seconds"] = round(time.perf_counter() - started, 3)
+            return result
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(save, items))
+
     def send_email(self, to: str, subject: str, body: str, cc: list[str] | None = None, is_html: bool = False) -> dict | None:
         """
         Directly sends an email message.
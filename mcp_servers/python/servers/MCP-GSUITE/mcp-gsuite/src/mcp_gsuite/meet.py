@@ -1,5 +1,4 @@
-from googleapiclient.discovery import build
-from . import gauth
+from .service_cache import service_cache
 import logging
 import traceback
 from datetime import datetime
@@ -13,8 +12,7 @@ class MeetService():
         Args:
             credentials: Google OAuth2 credentials object
         """
-        authorized_credentials = gauth.authorize_credentials(credentials)
-        self.service = build('calendar', 'v3', credentials=authorized_credentials)
+        _, self.service = service_cache.get(credentials, 'calendar', 'v3')
 
     def create_meeting(self, summary: str, start_time: str, end_time: str,
                       description: str | None = None,
@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+
+import google_auth_httplib2
+import httplib2
+from google.oauth2.credentials import Credentials
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+
+from . import gauth
+from .gauth import credential_identity
+
+# Entries kept (one per account and thread), least recently used evicted first
+SERVICE_CACHE_SIZE = 32
+# Age after which an entry is rebuilt from the credentials passed in
+SERVICE_CACHE_TTL = 30 * 60
+
+_discovery_documents: dict[tuple[str, str], str] = {}
+
+
+def discovery_document(api: str, version: str) -> str:
+    """
+    Discovery document bundled with googleapiclient, read once per process.
+    Kept as JSON text: googleapiclient amends the parsed document while
+    building methods, so every build parses its own copy.
+    """
+    document = _discovery_documents.get((api, version))
+    if document is None:
+        document = discovery_cache.get_static_doc(api, version)
+        if document is None:
+            raise ValueError(f"No static discovery document for {api} {version}")
+        _discovery_documents[(api, version)] = document
+    return document
+
+
+class _Entry:
+    def __init__(self, credentials: Credentials):
+        self.credentials = credentials
+        # One transport per account and thread, shared by all its APIs; refreshes the token when it expires
+        self.http = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http())
+        self.services = {}
+        self.created = time.monotonic()
+
+
+class ServiceCache:
+    """
+    Authorized Google API services cached per credential identity, so tool
+    calls stop re-authorizing credentials and re-building services (which
+    parses the discovery document) every time.
+
+    Entries are also keyed by thread because httplib2.Http is not
+    thread-safe; the MCP server runs its tool calls on one thread, so that
+    is one entry per account. Entries expire after `ttl` seconds and the
+    least recently used are evicted beyond `max_size`.
+    """
+
+    def __init__(self, max_size: int = SERVICE_CACHE_SIZE, ttl: float = SERVICE_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, int], _Entry] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _entry(self, creds_data: dict) -> _Entry:
+        key = (credential_identity(creds_data), threading.get_ident())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry.created < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Authorizing may refresh the token over the network: not under the lock
+        entry = _Entry(gauth.authorize_credentials(creds_data))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def get(self, creds_data: dict, api: str, version: str):
+        """
+        Authorized credentials and service for an account and API.
+
+        Args:
+            creds_data (dict): Authorized user info, as passed to the tools
+            api (str): API name, e.g. 'gmail'
+            version (str): API version, e.g. 'v1'
+
+        Returns:
+            Tuple[Credentials, Resource]: The account's credentials and the API service
+        """
+        entry = self._entry(creds_data)
+        # Only the entry's own thread uses its services
+        service = entry.services.get((api, version))
+        if service is None:
+            service = build_from_document(discovery_document(api, version), http=entry.http)
+            entry.services[(api, version)] = service
+        return entry.credentials, service
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Shared by the Gmail, Calendar and Meet services
+service_cache = ServiceCache()
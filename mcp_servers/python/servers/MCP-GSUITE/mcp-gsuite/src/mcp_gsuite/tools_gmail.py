@@ -7,16 +7,12 @@ from mcp.types import (
     LoggingLevel,
 )
 from . import gmail
+from . import attachments
 import json
 from . import toolhandler
 import base64
-
-def decode_base64_data(file_data):
-    standard_base64_data = file_data.replace("-", "+").replace("_", "/")
-    missing_padding = len(standard_base64_data) % 4
-    if missing_padding:
-        standard_base64_data += '=' * (4 - missing_padding)
-    return base64.b64decode(standard_base64_data, validate=True)
+import os
+import pathlib
 
 class QueryEmailsToolHandler(toolhandler.ToolHandler):
     def __init__(self):
@@ -135,7 +131,7 @@ class BulkGetEmailsByIdsToolHandler(toolhandler.ToolHandler):
     def get_tool_description(self) -> Tool:
         return Tool(
             name=self.name,
-            description="Retrieves multiple Gmail email messages by their IDs in a single request, including the full message bodies and attachment IDs.",
+            description="Retrieves multiple Gmail email messages by their IDs in a single request, including the full message bodies and attachment IDs. Each result has a status ('ok' or 'error').",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -164,15 +160,9 @@ class BulkGetEmailsByIdsToolHandler(toolhandler.ToolHandler):
             raise RuntimeError(f"Missing required argument: {toolhandler.CREDENTIALS_ARG}")
 
         gmail_service = gmail.GmailService(credentials=credentials)
-        
-        results = []
-        for email_id in args["email_ids"]:
-            email, attachments = gmail_service.get_email_by_id_with_attachments(email_id)
-            if email is not None:
-                email["attachments"] = attachments
-                results.append(email)
-
-        if not results:
+        results = gmail_service.get_emails_by_ids_with_attachments(args["email_ids"])
+
+        if not any(result["status"] == "ok" for result in results):
             return [
                 TextContent(
                     type="text",
@@ -424,7 +414,11 @@ class GetAttachmentToolHandler(toolhandler.ToolHandler):
                     },
                     "save_to_disk": {
                         "type": "string",
-                        "description": "The fullpath to save the attachment to disk. If not provided, the attachment is returned as a resource."
+                        "description": "The fullpath to save the attachment to disk. If not provided, the attachment is returned as a resource: inline when small, else as a reference to a local file."
+                    },
+                    "sha256": {
+                        "type": "string",
+                        "description": "Optional hex SHA-256 the attachment must match"
                     }
                 },
                 "required": ["message_id", "attachment_id", "mime_type", "filename"]
@@ -451,9 +445,20 @@ class GetAttachmentToolHandler(toolhandler.ToolHandler):
             raise RuntimeError(f"Missing required argument: {toolhandler.CREDENTIALS_ARG}")
 
         gmail_service = gmail.GmailService(credentials=credentials)
-        attachment_data = gmail_service.get_attachment(args["message_id"], args["attachment_id"])
+        if args.get("save_to_disk"):
+            save_path = args["save_to_disk"]
+        else:
+            # Files handed out as references earlier are kept for --attachment-retention seconds
+            attachments.cleanup_attachment_dir(attachments.get_attachment_retention())
+            # A directory per call: concurrent calls for the same attachment never share a file
+            save_path = attachments.new_attachment_path(os.path.basename(filename) or args["attachment_id"])
+        saved = gmail_service.save_attachment(
+            args["message_id"], args["attachment_id"], save_path, expected_sha256=args.get("sha256")
+        )
 
-        if attachment_data is None:
+        if saved is None:
+            if not args.get("save_to_disk"):
+                attachments.remove_attachment_path(save_path)
             return [
                 TextContent(
                     type="text",
@@ -461,23 +466,36 @@ class GetAttachmentToolHandler(toolhandler.ToolHandler):
                 )
             ]
 
-        file_data = attachment_data["data"]
-        attachment_url = f"attachment://gmail/{args['message_id']}/{args['attachment_id']}/{filename}"
         if args.get("save_to_disk"):
-            decoded_data = decode_base64_data(file_data)
-            with open(args["save_to_disk"], "wb") as f:
-                f.write(decoded_data)
             return [
                 TextContent(
                     type="text",
-                    text=f"Attachment saved to disk: {args['save_to_disk']}"
+                    text=f"Attachment saved to disk: {saved['path']} ({saved['size']} bytes, sha256 {saved['sha256']})"
+                )
+            ]
+
+        if saved["size"] > attachments.get_attachment_inline_limit():
+            # Too big to inline: hand out a reference to the downloaded file
+            return [
+                EmbeddedResource(
+                    type="resource",
+                    resource={
+                        "uri": pathlib.Path(saved["path"]).as_uri(),
+                        "mimeType": mime_type,
+                        "text": f"Attachment {filename} ({saved['size']} bytes, sha256 {saved['sha256']}) saved to {saved['path']}",
+                    },
                 )
             ]
+
+        with open(saved["path"], "rb") as f:
+            blob = base64.b64encode(f.read()).decode("ascii")
+        attachments.remove_attachment_path(saved["path"])
+        attachment_url = f"attachment://gmail/{args['message_id']}/{args['attachment_id']}/{filename}"
         return [
             EmbeddedResource(
                 type="resource",
                 resource={
-                    "blob": file_data,
+                    "blob": blob,
                     "uri": attachment_url,
                     "mimeType": mime_type,
                 },
@@ -491,7 +509,7 @@ class BulkSaveAttachmentsToolHandler(toolhandler.ToolHandler):
     def get_tool_description(self) -> Tool:
         return Tool(
             name=self.name,
-            description="Saves multiple Gmail attachments to disk by their message IDs and attachment IDs in a single request.",
+            description="Saves multiple Gmail attachments to disk by their message IDs and attachment IDs in a single request. Reports the status, size and time of every attachment.",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -511,6 +529,10 @@ class BulkSaveAttachmentsToolHandler(toolhandler.ToolHandler):
                                 "save_path": {
                                     "type": "string",
                                     "description": "Path where the attachment should be saved"
+                                },
+                                "sha256": {
+                                    "type": "string",
+                                    "description": "Optional hex SHA-256 the attachment must match"
                                 }
                             },
                             "required": ["message_id", "part_id", "save_path"]
@@ -534,57 +556,14 @@ class BulkSaveAttachmentsToolHandler(toolhandler.ToolHandler):
             raise RuntimeError(f"Missing required argument: {toolhandler.CREDENTIALS_ARG}")
 
         gmail_service = gmail.GmailService(credentials=credentials)
-        results = []
+        results = gmail_service.save_attachments(args["attachments"])
 
-        for attachment_info in args["attachments"]:
-            # get attachment data from message_id and part_id
-            message, attachments = gmail_service.get_email_by_id_with_attachments(
-                attachment_info["message_id"]
-            )
-            if message is None:
-                results.append(
-                    TextContent(
-                        type="text",
-                        text=f"Failed to retrieve message with ID: {attachment_info['message_id']}"
-                    )
-                )
-                continue
-            # get attachment_id from part_id
-            attachment_id = attachments[attachment_info["part_id"]]["attachmentId"]
-            attachment_data = gmail_service.get_attachment(
-                attachment_info["message_id"], 
-                attachment_id
+        return [
+            TextContent(
+                type="text",
+                text=json.dumps(results, indent=2)
             )
-            if attachment_data is None:
-                results.append(
-                    TextContent(
-                        type="text",
-                        text=f"Failed to retrieve attachment with ID: {attachment_id} from message: {attachment_info['message_id']}"
-                    )
-                )
-                continue
-
-            file_data = attachment_data["data"]
-            try:    
-                decoded_data = decode_base64_data(file_data)
-                with open(attachment_info["save_path"], "wb") as f:
-                    f.write(decoded_data)
-                results.append(
-                    TextContent(
-                        type="text",
-                        text=f"Attachment saved to: {attachment_info['save_path']}"
-                    )
-                )
-            except Exception as e:
-                results.append(
-                    TextContent(
-                        type="text",
-                        text=f"Failed to save attachment to {attachment_info['save_path']}: {str(e)}"
-                    )
-                )
-                continue
-
-        return results
+        ]
 
 class SendEmailToolHandler(toolhandler.ToolHandler):
     def __init__(self):